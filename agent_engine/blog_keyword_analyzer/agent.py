@@ -1,20 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import math
 import re
 import time
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI, OpenAIError
 
 from .config import settings
 from .schemas import Cluster, TopicIdea
 from .tools.metrics import RunMetrics
+from .tools.near_duplicates import shingles
+from .tools.prompt_budget import estimate_tokens, select_existing_topics
 
 
 logger = logging.getLogger(__name__)
 
+# Sharded topic generation: first retry of a failed shard waits this long, then doubles
+SHARD_RETRY_BACKOFF_SECONDS = 1.0
+
 
 class KeywordResearchAgent:
     """
@@ -25,6 +32,7 @@ class KeywordResearchAgent:
       - Apply platform / language constraints
       - Respect existing topics to avoid duplication
       - Call LLM and parse a strict JSON response into TopicIdea objects
+      - Optionally split the clusters into shards generated concurrently
     """
 
     def __init__(self, model: str | None = None) -> None:
@@ -94,51 +102,19 @@ class KeywordResearchAgent:
             return "C#"
         return fw  # fallback: echo as-is
 
-    def generate_topics(
+    def _build_payload(
         self,
         brand: str,
         product: str,
         locale: str,
-        clusters: List[Cluster],
-        top_n: int = 10,
-        platform: Optional[str] = None,
-        existing_topics: Optional[List[Dict[str, Any]]] = None,
-        metrics: Optional[RunMetrics] = None,
-    ) -> List[TopicIdea]:
-        """
-        Generate topic ideas from the top N clusters.
-
-        Args:
-            brand: Brand name (e.g. "Aspose").
-            product: Product name (e.g. "Aspose.Cells").
-            locale: Locale string like "en-US".
-            clusters: List of scored Cluster objects.
-            top_n: How many top clusters to consider.
-            platform: Optional canonical platform (e.g. "python", "csharp").
-            existing_topics: Existing blog posts used for deduplication.
-
-        Returns:
-            List[TopicIdea] parsed from the LLM response. Empty list on failure.
-        """
-        if not clusters:
-            logger.warning("generate_topics called with no clusters – returning empty list.")
-            return []
-
-        chosen = clusters[:top_n]
-        logger.info(
-            "Preparing to generate topics: brand=%s product=%s locale=%s clusters_used=%d "
-            "top_n=%d platform=%s existing_topics=%d",
-            brand,
-            product,
-            locale,
-            len(chosen),
-            top_n,
-            platform,
-            len(existing_topics or []),
-        )
-
+        chosen: List[Cluster],
+        platform: Optional[str],
+        existing_topics: Optional[List[Dict[str, Any]]],
+        taken_angles: Optional[List[str]],
+    ) -> Tuple[Dict[str, Any], int]:
+        """User payload for the clusters of one request, and how many existing posts it carries."""
         # Compact payload for the LLM – keep it lightweight but informative
-        payload = {
+        payload: Dict[str, Any] = {
             "brand": brand,
             "product": product,
             "locale": locale,
@@ -146,10 +122,11 @@ class KeywordResearchAgent:
                 {
                     "cluster_id": c.cluster_id,
                     "label": c.label,
+                    "label_terms": c.label_terms,
                     "intent": c.metrics.intent,
                     "brand_fit": c.metrics.brand_fit,
                     "score": c.metrics.score,
-                    "keywords": [m.keyword for m in c.members[:12]],
+                    "keywords": c.keywords[:12],
                 }
                 for c in chosen
             ],
@@ -158,30 +135,34 @@ class KeywordResearchAgent:
         if platform:
             payload["platform"] = platform
 
+        existing_sent = 0
         if existing_topics:
-            # Keep payload small: only title + url + slug + platforms
-            compact: List[Dict[str, Any]] = []
-            for e in existing_topics:
-                compact.append(
-                    {
-                        "title": e.get("title"),
-                        "url": e.get("url"),
-                        "slug": e.get("slug"),
-                        "platforms": e.get("platforms"),
-                    }
-                )
+            # Keep payload small: title + url + slug + platforms of the posts
+            # most relevant to the chosen clusters, within the token budget
+            compact, existing_tokens = select_existing_topics(
+                existing_topics, chosen, settings.KRA_EXISTING_TOPICS_TOKEN_BUDGET
+            )
             payload["existing_topics"] = compact
+            existing_sent = len(compact)
+            logger.info(
+                "existing_topics payload: %d of %d posts, ~%d tokens (budget %d)",
+                len(compact),
+                len(existing_topics),
+                existing_tokens,
+                settings.KRA_EXISTING_TOPICS_TOKEN_BUDGET,
+            )
 
+        if taken_angles:
+            payload["taken_angles"] = list(taken_angles)
+
+        return payload, existing_sent
+
+    def _system_prompt(self, platform: Optional[str], topic_range: Tuple[int, int] = (10, 20)) -> str:
+        """System prompt asking for `topic_range` topics from the payload clusters."""
         # Derive a human-readable label like "Python", "Java", "C#"
         fw_label = self._platform_label(platform)
         logger.debug("platform=%r -> fw_label=%r", platform, fw_label)
 
-        if settings.DEBUG:
-            logger.debug(
-                "Payload sent to LLM (truncated): %s",
-                json.dumps(payload, indent=2)[:2000],
-            )
-
         system = (
             "You are a 'Blog Keyword Analyzer' agent.\n\n"
             "CONTEXT\n"
@@ -198,7 +179,7 @@ class KeywordResearchAgent:
             "- 'supporting_keywords': 3–8 related keywords from the SAME cluster.\n"
             "- 'internal_links': list of 0–5 internal link targets as strings.\n\n"
             "TOPIC COUNT\n"
-            "- Generate between 10 and 20 topics in total.\n"
+            f"- Generate between {topic_range[0]} and {topic_range[1]} topics in total.\n"
             "- It is better to return fewer, higher-quality topics than many weak ones.\n\n"
             "CLUSTER & KEYWORD CONSISTENCY\n"
             "- 'cluster_id' MUST be taken directly from the input cluster identifier.\n"
@@ -210,7 +191,10 @@ class KeywordResearchAgent:
             "- You MUST NOT propose any topic whose title or core idea substantially overlaps\n"
             "  with any 'existing_topics' entry.\n"
             "- Treat 'existing_topics' as a RESERVED set of angles; look for gaps and new angles.\n"
-            "- If 'existing_topics' is missing or empty, ignore this rule and propose the best topics you can.\n\n"
+            "- If 'existing_topics' is missing or empty, ignore this rule and propose the best topics you can.\n"
+            "- The payload may also include 'taken_angles': titles proposed in earlier runs.\n"
+            "  Do NOT propose them again or close rewordings of them.\n"
+            "- Never return two topics in this response that cover the same idea.\n\n"
             "INTERNAL LINKS\n"
             "- 'internal_links' should be 0–5 string slugs or titles of existing posts from 'existing_topics'\n"
             "  that would be relevant as internal links.\n"
@@ -247,50 +231,50 @@ class KeywordResearchAgent:
             "- No trailing commas.\n"
             "- Do not include any explanations or meta text outside the JSON object.\n"
         )
+        return system
 
-        if settings.DEBUG:
-            logger.debug("System prompt for LLM:\n%s", system)
-
-        # Build request kwargs
+    def _request_kwargs(self, system: str, user_content: str) -> Dict[str, Any]:
         request_kwargs: Dict[str, Any] = {
             "model": self.model,
             "temperature": 0.2,
             "messages": [
                 {"role": "system", "content": system},
-                {"role": "user", "content": json.dumps(payload)},
+                {"role": "user", "content": user_content},
             ],
         }
         if self._use_response_format:
             request_kwargs["response_format"] = {"type": "json_object"}
+        return request_kwargs
 
-        # Call LLM with timing
-        logger.info("Calling LLM to generate topics...")
-        t0 = time.perf_counter()
-        resp = self.client.chat.completions.create(**request_kwargs)
-        dt = time.perf_counter() - t0
-        logger.info("LLM call completed in %.3f seconds", dt)
-
-        # 🔹 Token usage
+    @staticmethod
+    def _record_usage(resp: Any, metrics: Optional[RunMetrics]) -> None:
+        """Log the token usage of one completion and add it to the run metrics."""
         usage = getattr(resp, "usage", None)
-        if usage is not None:
-            # openai-python returns a CompletionUsage object
-            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
-            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
-            total_tokens = getattr(usage, "total_tokens", 0) or 0
+        if usage is None:
+            return
+        # openai-python returns a CompletionUsage object
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        total_tokens = getattr(usage, "total_tokens", 0) or 0
 
-            logger.info(
-                "LLM token usage: prompt=%d completion=%d total=%d",
-                prompt_tokens,
-                completion_tokens,
-                total_tokens,
-            )
+        logger.info(
+            "LLM token usage: prompt=%d completion=%d total=%d",
+            prompt_tokens,
+            completion_tokens,
+            total_tokens,
+        )
 
-            if metrics is not None:
-                # accumulate in case you ever do multiple calls per run
-                metrics.llm_prompt_tokens += prompt_tokens
-                metrics.llm_completion_tokens += completion_tokens
+        if metrics is not None:
+            # accumulated over every call of the run (one per shard in sharded mode)
+            metrics.llm_prompt_tokens += prompt_tokens
+            metrics.llm_completion_tokens += completion_tokens
 
-        txt = resp.choices[0].message.content or ""
+    def _parse_topics(self, txt: str) -> Optional[List[TopicIdea]]:
+        """
+        TopicIdea objects from a raw LLM response. None when the response is
+        not a JSON object with a 'topics' list (the request failed); entries
+        that do not validate are skipped.
+        """
         logger.debug("Raw LLM response (truncated to 1200 chars): %s", txt[:1200])
 
         # Try to parse JSON strictly
@@ -314,12 +298,12 @@ class KeywordResearchAgent:
 
         if not isinstance(data_obj, dict):
             logger.error("LLM JSON payload is not an object; returning no topics.")
-            return []
+            return None
 
         topics_raw = data_obj.get("topics", [])
         if not isinstance(topics_raw, list):
             logger.error("'topics' key missing or not a list in JSON; returning no topics.")
-            return []
+            return None
 
         out: List[TopicIdea] = []
         invalid_count = 0
@@ -341,3 +325,232 @@ class KeywordResearchAgent:
         )
 
         return out
+
+    def generate_topics(
+        self,
+        brand: str,
+        product: str,
+        locale: str,
+        clusters: List[Cluster],
+        top_n: int = 10,
+        platform: Optional[str] = None,
+        existing_topics: Optional[List[Dict[str, Any]]] = None,
+        metrics: Optional[RunMetrics] = None,
+        taken_angles: Optional[List[str]] = None,
+        shard_size: Optional[int] = None,
+    ) -> List[TopicIdea]:
+        """
+        Generate topic ideas from the top N clusters.
+
+        Args:
+            brand: Brand name (e.g. "Aspose").
+            product: Product name (e.g. "Aspose.Cells").
+            locale: Locale string like "en-US".
+            clusters: List of scored Cluster objects.
+            top_n: How many top clusters to consider.
+            platform: Optional canonical platform (e.g. "python", "csharp").
+            existing_topics: Existing blog posts used for deduplication.
+            taken_angles: Titles proposed by earlier runs (topic registry summary).
+            shard_size: Clusters per request (default KRA_TOPIC_SHARD_SIZE). When
+                fewer than the chosen clusters, see `generate_topics_sharded`;
+                0 sends them all in one request.
+
+        Every LLM request is recorded with `metrics.mark_llm_call`.
+
+        Returns:
+            List[TopicIdea] parsed from the LLM response. Empty list on failure.
+        """
+        if not clusters:
+            logger.warning("generate_topics called with no clusters – returning empty list.")
+            return []
+
+        chosen = clusters[:top_n]
+        logger.info(
+            "Preparing to generate topics: brand=%s product=%s locale=%s clusters_used=%d "
+            "top_n=%d platform=%s existing_topics=%d",
+            brand,
+            product,
+            locale,
+            len(chosen),
+            top_n,
+            platform,
+            len(existing_topics or []),
+        )
+
+        shard_size = settings.KRA_TOPIC_SHARD_SIZE if shard_size is None else shard_size
+        if 0 < shard_size < len(chosen):
+            return asyncio.run(
+                self.generate_topics_sharded(
+                    brand, product, locale, chosen, shard_size,
+                    platform=platform,
+                    existing_topics=existing_topics,
+                    metrics=metrics,
+                    taken_angles=taken_angles,
+                )
+            )
+
+        payload, existing_sent = self._build_payload(
+            brand, product, locale, chosen, platform, existing_topics, taken_angles
+        )
+
+        if settings.DEBUG:
+            logger.debug(
+                "Payload sent to LLM (truncated): %s",
+                json.dumps(payload, indent=2)[:2000],
+            )
+
+        system = self._system_prompt(platform)
+        if settings.DEBUG:
+            logger.debug("System prompt for LLM:\n%s", system)
+
+        user_content = json.dumps(payload)
+        if metrics is not None:
+            metrics.existing_topics_sent = existing_sent
+            metrics.prompt_tokens_estimate = estimate_tokens(system) + estimate_tokens(user_content)
+
+        # Call LLM with timing
+        logger.info("Calling LLM to generate topics...")
+        t0 = time.perf_counter()
+        try:
+            resp = self.client.chat.completions.create(**self._request_kwargs(system, user_content))
+        except Exception:
+            if metrics is not None:
+                metrics.mark_llm_call(duration_seconds=time.perf_counter() - t0, failed=True)
+            raise
+        dt = time.perf_counter() - t0
+        logger.info("LLM call completed in %.3f seconds", dt)
+
+        self._record_usage(resp, metrics)
+        out = self._parse_topics(resp.choices[0].message.content or "")
+        if metrics is not None:
+            metrics.mark_llm_call(duration_seconds=dt, failed=out is None)
+        return out or []
+
+    async def generate_topics_sharded(
+        self,
+        brand: str,
+        product: str,
+        locale: str,
+        chosen: List[Cluster],
+        shard_size: int,
+        platform: Optional[str] = None,
+        existing_topics: Optional[List[Dict[str, Any]]] = None,
+        metrics: Optional[RunMetrics] = None,
+        taken_angles: Optional[List[str]] = None,
+        concurrency: Optional[int] = None,
+        retries: Optional[int] = None,
+    ) -> List[TopicIdea]:
+        """
+        Generate topics for `chosen` clusters in shards of `shard_size`
+        clusters, one chat completion per shard over one `AsyncOpenAI`
+        client, at most `concurrency` (default KRA_LLM_CONCURRENCY) in flight.
+
+        Each shard is asked for its share of the 10–20 topics and gets the
+        existing posts most relevant to its own clusters. A shard whose
+        request raises, whose response does not parse or that yields no valid
+        topic is retried alone,
+        up to `retries` (default KRA_TOPIC_SHARD_RETRIES) times with backoff;
+        a shard that still fails contributes no topics. Results are merged
+        in cluster rank order, dropping titles that repeat an earlier shard's
+        (shingle Jaccard >= KRA_DUPLICATE_THRESHOLD).
+
+        Every attempt is recorded with `metrics.mark_llm_call`, so
+        `llm_duration_seconds` is the summed shard latency, to compare with
+        the wall-clock time of the call.
+        """
+        concurrency = concurrency or settings.KRA_LLM_CONCURRENCY
+        retries = settings.KRA_TOPIC_SHARD_RETRIES if retries is None else retries
+        shards = [chosen[i:i + shard_size] for i in range(0, len(chosen), shard_size)]
+
+        requests: List[Dict[str, Any]] = []
+        existing_sent = 0
+        prompt_estimate = 0
+        for shard in shards:
+            share = len(shard) / len(chosen)
+            lo = max(1, math.ceil(10 * share))
+            topic_range = (lo, max(lo + 1, math.ceil(20 * share)))
+            payload, sent = self._build_payload(
+                brand, product, locale, shard, platform, existing_topics, taken_angles
+            )
+            system = self._system_prompt(platform, topic_range)
+            user_content = json.dumps(payload)
+            requests.append(self._request_kwargs(system, user_content))
+            existing_sent += sent
+            prompt_estimate += estimate_tokens(system) + estimate_tokens(user_content)
+        if metrics is not None:
+            metrics.existing_topics_sent = existing_sent
+            metrics.prompt_tokens_estimate = prompt_estimate
+
+        logger.info(
+            "Calling LLM to generate topics: %d shards of up to %d clusters, concurrency=%d",
+            len(shards),
+            shard_size,
+            concurrency,
+        )
+        limiter = asyncio.Semaphore(concurrency)
+        t0 = time.perf_counter()
+
+        async def run_shard(client: AsyncOpenAI, index: int, kwargs: Dict[str, Any]) -> List[TopicIdea]:
+            for attempt in range(retries + 1):
+                if attempt:
+                    await asyncio.sleep(SHARD_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                async with limiter:
+                    t_call = time.perf_counter()
+                    try:
+                        resp = await client.chat.completions.create(**kwargs)
+                    except OpenAIError as exc:
+                        logger.warning("Topic shard %d attempt %d failed: %s", index, attempt + 1, exc)
+                        if metrics is not None:
+                            metrics.mark_llm_call(duration_seconds=time.perf_counter() - t_call, failed=True)
+                        continue
+                    dt = time.perf_counter() - t_call
+                logger.info("Topic shard %d completed in %.3f seconds (attempt %d)", index, dt, attempt + 1)
+                self._record_usage(resp, metrics)
+                topics = self._parse_topics(resp.choices[0].message.content or "")
+                if metrics is not None:
+                    metrics.mark_llm_call(duration_seconds=dt, failed=not topics)
+                if topics:
+                    return topics
+                logger.warning(
+                    "Topic shard %d attempt %d returned %s", index, attempt + 1,
+                    "no parseable JSON" if topics is None else "no valid topics",
+                )
+            logger.error("Topic shard %d failed after %d attempts; its clusters get no topics.", index, retries + 1)
+            return []
+
+        client = self._async_client()
+        try:
+            results = await asyncio.gather(*(run_shard(client, i, kw) for i, kw in enumerate(requests)))
+        finally:
+            await client.close()
+
+        out = self._merge_shard_topics(results)
+        logger.info(
+            "Sharded topic generation: %d topics from %d shards in %.3f seconds wall-clock",
+            len(out),
+            len(shards),
+            time.perf_counter() - t0,
+        )
+        return out
+
+    def _async_client(self) -> AsyncOpenAI:
+        """A fresh async client for one event loop, with the sync client's backend."""
+        return AsyncOpenAI(
+            base_url=settings.ASPOSE_LLM_BASE_URL,
+            api_key=settings.ASPOSE_LLM_API_KEY,
+        )
+
+    @staticmethod
+    def _merge_shard_topics(results: List[List[TopicIdea]]) -> List[TopicIdea]:
+        """Concatenate shard results, dropping topics whose title repeats a kept one."""
+        out: List[TopicIdea] = []
+        kept: List[set] = []
+        for topics in results:
+            for topic in topics:
+                key = set(shingles(topic.title)) or {topic.title.lower().strip()}
+                if any(len(key & k) >= settings.KRA_DUPLICATE_THRESHOLD * len(key | k) for k in kept):
+                    logger.debug("Dropping cross-shard duplicate topic %r", topic.title)
+                    continue
+                kept.append(key)
+                out.append(topic)
+        return out
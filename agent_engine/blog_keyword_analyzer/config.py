@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -19,6 +19,15 @@ class Settings(BaseSettings):
     # --- SerpAPI integration ---
     SERPAPI_API_KEY: str | None = None
     SERPAPI_ENGINE: str = "google"  # we’ll use standard Google search
+    SERPAPI_BASE_URL: str = "https://serpapi.com"  # point at scripts/serp_replay_server.py for offline runs
+    SERPAPI_CONCURRENCY: int = 8       # harvest mode: requests in flight
+    SERPAPI_RATE_PER_SEC: float = 5.0  # harvest mode: token-bucket rate (0 = unlimited)
+    SERPAPI_MAX_PAGES: int = 3         # harvest mode: result pages per query
+    SERPAPI_MAX_DEPTH: int = 2         # harvest mode: related-search / PAA expansion levels
+    SERPAPI_MAX_REQUESTS: int = 60     # harvest mode: paid requests per harvest (hard cap)
+    SERPAPI_MAX_KEYWORDS: int = 300    # keywords kept from SerpAPI (--serp-max-keywords)
+    SERPAPI_CACHE_TTL_HOURS: float = 24.0  # response cache lifetime (0 = no cache)
+    SERPAPI_CACHE_MAX_MB: int = 64         # response cache size before LRU eviction
 
     # --- KRA scoring / data dirs (unchanged) ---
     W_VOLUME: float = 0.35
@@ -29,9 +38,32 @@ class Settings(BaseSettings):
     TOP_CLUSTERS: int = 15
     MAX_ROWS: int = 50000    
     KRA_DATA_DIR: str = "./content"
+    KRA_PRODUCTS_DATA_DIR: str = "./content/productsData"
     KRA_OUTPUT_DIR: str = "./content"
     BLOG_CONTENT_ROOT: str = ""
+    BLOG_INDEX_DB: str = "./content/.kra_cache/content_index.sqlite"
+    BLOG_INDEX_JSON: str = "./content/.kra_cache/blog_index.json"
+    BLOG_SCAN_MODE: str = "process"  # front matter parsing: process | thread (network mounts) | serial
+    BLOG_SCAN_WORKERS: int = 0       # 0 = CPU count (at least 8 in thread mode)
+    BLOG_INDEX_SERVICE_URL: str = "http://127.0.0.1:8766"  # tools/content_service.py ("" = never ask it)
+    BLOG_INDEX_WATCH_SECONDS: float = 2.0  # content_service poll interval
     KRA_METRICS_DB_PATH: str = "./src/data/kra_metrics_db.json"
+    KRA_CLUSTER_CACHE_MAX_MB: int = 256
+    KRA_K_SEARCH_MAX_SECONDS: float = 20.0
+    KRA_K_SEARCH_JOBS: int = -1
+    KRA_EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    KRA_EMBEDDING_BATCH_SIZE: int = 256
+    KRA_EMBEDDING_CACHE_MAX_MB: int = 256  # embedding shards kept under .kra_cache/embeddings (0 = unbounded)
+    KRA_STREAM_CHUNK_SIZE: int = 50000
+    KRA_INCREMENTAL_MIN_SIMILARITY: float = 0.2
+    KRA_DUPLICATE_THRESHOLD: float = 0.7  # title shingle Jaccard above which a topic repeats an existing post
+    KRA_TOPIC_FINGERPRINT: str = "hashing"  # topic registry fingerprints: hashing | embedding
+    KRA_TOPIC_DUP_THRESHOLD: float = 0.75   # fingerprint cosine above which two generated topics are the same idea
+    KRA_TAKEN_ANGLES_MAX: int = 40          # earlier-run titles sent to the topic prompt
+    KRA_EXISTING_TOPICS_TOKEN_BUDGET: int = 4000  # existing posts in the topic prompt, most relevant first (0 = all)
+    KRA_TOPIC_SHARD_SIZE: int = 0      # clusters per topic-generation request (0 = one request for all)
+    KRA_LLM_CONCURRENCY: int = 4       # sharded topic generation: requests in flight
+    KRA_TOPIC_SHARD_RETRIES: int = 2   # retries of a shard whose request fails or does not parse
     DEBUG: bool = False
 
     # --- NEW: Metrics / Google Apps Script webhook ---
@@ -48,6 +80,22 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+
+def project_root(start: Optional[Path] = None) -> Path:
+    """
+    Walk up from 'start' (or CWD) to find a directory containing pyproject.toml or .git.
+
+    This keeps paths robust across local dev, containers, or CI.
+    """
+    p = (start or Path.cwd()).resolve()
+    for _ in range(10):
+        if (p / "pyproject.toml").exists() or (p / ".git").exists():
+            return p
+        if p.parent == p:
+            break
+        p = p.parent
+    return Path.cwd().resolve()
+
 BRAND_METRICS: dict[str, Tuple[str, str]] = {
     # key: normalized brand (lowercase)
     "aspose": ("aspose.com", "Blog"),
@@ -58,6 +106,52 @@ BRAND_METRICS: dict[str, Tuple[str, str]] = {
     "familiarize": ("familiarize.com", "Blog"),
     # add more brands here...
 }
+
+# Intent lexicons: phrases matched as whole words inside each keyword.
+INTENT_LEXICONS: Dict[str, List[str]] = {
+    "informational": ["how to", "guide", "tutorial", "what is", "example", "examples"],
+    "commercial": [
+        "best", "top", "tool", "tools", "software", "alternative", "alternatives",
+        "compare", "vs", "vs.",
+    ],
+    "transactional": ["buy", "price", "pricing", "download", "license", "trial"],
+    "navigational": ["docs", "reference", "api", "login", "account"],
+}
+
+# Keyword tokens that point at a product family (keyed by productsData urlPrefix),
+# on top of the family's own name / urlPrefix
+PRODUCT_FORMAT_ALIASES: Dict[str, List[str]] = {
+    "cells": ["excel", "xlsx", "xls", "xlsm", "xlsb", "csv", "ods", "spreadsheet", "workbook", "worksheet"],
+    "words": ["word", "docx", "doc", "docm", "dotx", "rtf", "odt"],
+    "slides": ["powerpoint", "pptx", "ppt", "pps", "ppsx", "odp", "presentation", "slide"],
+    "pdf": ["pdf"],
+    "email": ["email", "msg", "eml", "emlx", "pst", "ost", "mbox", "outlook", "mail"],
+    "imaging": ["image", "png", "jpg", "jpeg", "bmp", "gif", "tiff", "tif", "webp"],
+    "barcode": ["barcode", "qr", "qrcode", "datamatrix"],
+    "omr": ["omr"],
+    "psd": ["psd", "photoshop", "psb"],
+    "cad": ["cad", "dwg", "dxf", "dgn", "dwf"],
+    "3d": ["3d", "obj", "stl", "fbx", "gltf", "glb", "3ds"],
+    "gis": ["gis", "kml", "gpx", "shapefile", "geojson", "osm"],
+    "html": ["html", "htm", "mhtml", "css"],
+    "page": ["xps", "oxps"],
+    "tex": ["tex", "latex"],
+    "zip": ["zip", "rar", "7z", "tar", "gz", "archive"],
+    "note": ["onenote"],
+    "diagram": ["visio", "vsdx", "vsd", "diagram"],
+    "tasks": ["mpp"],
+    "conversion": ["convert", "converter", "conversion"],
+    "total": [],
+}
+
+# Extra intent phrases per normalized brand, added to INTENT_LEXICONS
+BRAND_INTENT_LEXICONS: dict[str, Dict[str, List[str]]] = {
+    "aspose": {"navigational": ["aspose"]},
+    "groupdocs": {"navigational": ["groupdocs"]},
+    "asposecloud": {"navigational": ["aspose", "aspose cloud"]},
+    "groupdocscloud": {"navigational": ["groupdocs", "groupdocs cloud"]},
+    "conholdate": {"navigational": ["conholdate"]},
+}
 platform_LABELS: Dict[str, str] = {
     "python": "Python",
     "java": "Java",
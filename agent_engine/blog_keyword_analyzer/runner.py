@@ -5,44 +5,45 @@ import argparse
 import json
 import logging
 import re
+import sqlite3
 import sys
 import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from statistics import mean
-from typing import Optional, List, Mapping, Any, Dict, Tuple
+from typing import Optional, List, Mapping, Any, Dict, Tuple, Union
 import requests
 
 from .metrics_sender import send_stage_metrics
 from .tools.content_index import get_existing_posts
-from .schemas import RunRequest, RunResult, Cluster, KeywordRecord
+from .schemas import RunRequest, RunResult, Cluster, KeywordRecord, WeightSweepResult
 from .agent import KeywordResearchAgent
-from .tools.file_import import import_file
+from .tools.file_import import import_batch, iter_keyword_batches
+from .tools.keyword_batch import KeywordBatch
 from .tools.preprocess import preprocess
 from .tools.cluster import cluster_records
+from .tools.stream_cluster import stream_cluster
+from .tools.cluster_model import incremental_cluster
 from .tools.intent_brand import annotate_intent_brand
-from .tools.scoring import score_clusters
-from .config import settings, BRAND_METRICS
+from .tools.scoring import (
+    NORMALIZED_FEATURES,
+    NORMALIZERS,
+    ClusterAggregates,
+    score_clusters,
+    expand_weight_grid,
+    sweep_weights,
+)
+from .config import settings, BRAND_METRICS, platform_LABELS, project_root
 from .tools.metrics import RunMetrics, timed_step
+from .tools.near_duplicates import MinHashLSH
+from .tools.topic_registry import RegisteredTopic, TopicRegistry, dedup_topics, open_topic_registry
+from .tools.serp_import import SerpStats
 
 logger = logging.getLogger(__name__)
 
 
-def _project_root(start: Optional[Path] = None) -> Path:
-    """
-    Walk up from 'start' (or CWD) to find a directory containing pyproject.toml or .git.
-
-    This keeps paths robust across local dev, containers, or CI.
-    """
-    p = (start or Path.cwd()).resolve()
-    for _ in range(10):
-        if (p / "pyproject.toml").exists() or (p / ".git").exists():
-            return p
-        if p.parent == p:
-            break
-        p = p.parent
-    return Path.cwd().resolve()
+_project_root = project_root
 
 def _resolve_brand_output_dir(brand_folder: str) -> Path:
     root = _project_root()
@@ -216,50 +217,159 @@ def _load_existing_topics_for_prompt(
 
     return topics_for_prompt
 
-def _build_existing_keys(existing_topics: List[dict]) -> set[str]:
+def _build_existing_keys(existing_topics: List[dict]) -> Dict[str, dict]:
     """
-    Build a set of normalized keys from existing topics (url/title/slug).
-    Used for post-filtering as a safety net.
+    Map normalized keys of existing topics (url, title and slug) to the
+    topic they came from. Used for post-filtering as a safety net.
     """
-    keys: set[str] = set()
+    keys: Dict[str, dict] = {}
     for e in existing_topics:
         for field in ("url", "title", "slug"):
             val = e.get(field)
             if val:
-                keys.add(_normalize_topic_key(str(val)))
-                break
+                keys.setdefault(_normalize_topic_key(str(val)), e)
     return keys
 
 def _filter_duplicate_topics(
     topics,
     existing_topics: List[dict],
+    threshold: Optional[float] = None,
+    metrics: Optional[RunMetrics] = None,
 ):
     """
-    Drop any generated topics whose normalized title matches an existing topic key.
+    Drop generated topics that repeat an existing post: an exact match of the
+    normalized title against an existing url/title/slug key, or a near
+    duplicate whose title shingles have an estimated Jaccard similarity of at
+    least `threshold` (default KRA_DUPLICATE_THRESHOLD) with an existing
+    title, found through a MinHash LSH index over all existing posts.
+    Each drop is logged and recorded in metrics.duplicate_matches.
     """
     existing_keys = _build_existing_keys(existing_topics)
     if not existing_keys:
         return topics
 
+    threshold = settings.KRA_DUPLICATE_THRESHOLD if threshold is None else threshold
+    lsh = MinHashLSH(threshold=threshold).index(
+        [e.get("title") or (e.get("slug") or "").replace("-", " ") for e in existing_topics]
+    )
+
     filtered = []
     dropped = 0
     for t in topics:
         title = getattr(t, "title", "") or ""
         key = _normalize_topic_key(title)
-        if key in existing_keys:
-            dropped += 1
+        match, similarity, kind = existing_keys.get(key), 1.0, "exact"
+        if match is None:
+            hits = lsh.query(title)
+            if hits:
+                match, similarity, kind = existing_topics[hits[0][0]], hits[0][1], "near"
+        if match is None:
+            filtered.append(t)
             continue
-        filtered.append(t)
+
+        dropped += 1
+        logger.info(
+            "Duplicate topic dropped: %r ~ %r (%s, similarity=%.2f, url=%s)",
+            title, match.get("title"), kind, similarity, match.get("url"),
+        )
+        if metrics is not None:
+            metrics.duplicate_matches.append({
+                "topic": title,
+                "existing_title": match.get("title"),
+                "existing_url": match.get("url"),
+                "similarity": round(similarity, 3),
+                "match": kind,
+            })
 
     logger.info(
-        "Duplicate filter: kept=%d dropped=%d (existing_keys=%d)",
+        "Duplicate filter: kept=%d dropped=%d (existing_topics=%d, threshold=%.2f)",
         len(filtered),
         dropped,
-        len(existing_keys),
+        len(existing_topics),
+        threshold,
     )
 
     return filtered
 
+def _topic_registry_path() -> Path:
+    return _resolve_output_dir() / ".kra_cache" / "topics.sqlite"
+
+def _seed_topic_registry(registry: TopicRegistry, req: RunRequest, platform: Optional[str]) -> int:
+    """
+    Register the topics of the committed `content/<Brand>/output/*_topics.md`
+    files for this product/platform that the registry does not hold yet, so
+    a fresh clone (the registry lives under the gitignored KRA_OUTPUT_DIR)
+    knows what earlier runs proposed. Returns how many topics were added.
+    """
+    product_key = _brand_slug(req.product)
+    platform_key = _canonical_platform(platform)
+    paths = sorted(_resolve_brand_output_dir(req.brand).glob("*_topics.md"), key=lambda p: p.stat().st_mtime)
+    seeded = 0
+    for md_path in paths:
+        try:
+            parsed = read_topics_markdown(md_path)
+        except (OSError, UnicodeDecodeError) as exc:
+            logger.warning("Could not read %s (%s); not seeding the topic registry from it.", md_path, exc)
+            continue
+        if _brand_slug(parsed["product"]) != product_key or _canonical_platform(parsed["platform"]) != platform_key:
+            continue
+        seeded += registry.seed(req.brand, req.product, platform_key, parsed["run_id"], parsed["topics"])
+    if seeded:
+        logger.info("Topic registry: seeded %d topics from %d topic files", seeded, len(paths))
+    return seeded
+
+def _dedup_with_registry(
+    topics,
+    registry: TopicRegistry,
+    req: RunRequest,
+    platform: Optional[str],
+    run_id: str,
+    metrics: Optional[RunMetrics] = None,
+):
+    """
+    Drop topics that repeat a higher-ranked topic of this run, mark (or, with
+    `drop_repeated_topics`, drop) those that repeat an earlier run's topic,
+    then register the new ones. Registry failures are logged and leave the
+    topics untouched.
+    """
+    try:
+        kept, matches, fingerprints = dedup_topics(
+            topics, registry, req.brand, req.product, _canonical_platform(platform),
+            drop_repeats=req.drop_repeated_topics,
+        )
+        repeats = {m.title: m for m in matches if not m.dropped}
+        new = [i for i, t in enumerate(kept) if t.title not in repeats]
+        registered = registry.add(
+            req.brand, req.product, _canonical_platform(platform), run_id,
+            [kept[i] for i in new], fingerprints[new],
+        )
+    except sqlite3.Error as exc:
+        logger.warning("Topic registry unavailable (%s); skipping cross-run dedup.", exc)
+        return topics
+
+    for t in kept:
+        if t.title in repeats:
+            t.repeat_of = repeats[t.title].other
+    for m in matches:
+        logger.info(
+            "Duplicate topic %s: %r ~ %r (%s, similarity=%.2f)",
+            "dropped" if m.dropped else "kept", m.title, m.other, m.source, m.similarity,
+        )
+        if metrics is not None:
+            metrics.duplicate_matches.append({
+                "topic": m.title,
+                "existing_title": m.other,
+                "existing_url": None,
+                "similarity": round(m.similarity, 3),
+                "match": m.source,
+                "dropped": m.dropped,
+            })
+    logger.info(
+        "Topic registry: kept=%d dropped=%d repeated=%d registered=%d",
+        len(kept), len(matches) - len(repeats), len(repeats), registered,
+    )
+    return kept
+
 def _summarize_cluster_scores(clusters: List[Cluster]) -> dict:
     """
     Compute simple summary statistics for cluster scores.
@@ -282,12 +392,15 @@ def write_topics_markdown(
     """
     Write a Markdown file with the generated topics for this run.
     Example: <runid>_<product>_<platform>_topics.md
+
+    `platform` is the run's platform (RunResult does not carry it); the file
+    name uses its canonical form, e.g. "csharp" for "C#".
     """
     # Respect the caller-provided output_dir (workflow sets KRA_OUTPUT_DIR)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     safe_product = _brand_slug(result.product)
-    safe_platform = _brand_slug(platform or "all")
+    safe_platform = _brand_slug(_canonical_platform(platform) or "all")
 
     run_suffix = result.run_id[:8] if result.run_id else "run"
     md_path = output_dir / f"{run_suffix}_{safe_product}_{safe_platform}_topics.md"
@@ -299,7 +412,7 @@ def write_topics_markdown(
     lines.append("")
     lines.append(f"- **Brand:** {result.brand}")
     lines.append(f"- **Product:** {result.product}")
-    lines.append(f"- **Platform:** {result.platform}")
+    lines.append(f"- **Platform:** {platform or 'all'}")
     lines.append(f"- **Run ID:** {result.run_id}")
     lines.append(f"- **Topics:** {len(result.topics)}")
     lines.append("")
@@ -307,15 +420,20 @@ def write_topics_markdown(
     lines.append("")
 
     for idx, t in enumerate(result.topics, start=1):
-        title = getattr(t, "title", None) or t.get("title")
-        cluster_id = getattr(t, "cluster_id", None) or t.get("cluster_id")
-        angle = getattr(t, "angle", None) or t.get("angle")
-        primary_kw = getattr(t, "primary_keyword", None) or t.get("primary_keyword")
-        supporting_kws = getattr(t, "supporting_keywords", None) or t.get("supporting_keywords") or []
-        outline = getattr(t, "outline", None) or t.get("outline") or []
-        persona = getattr(t, "target_persona", None) or t.get("target_persona")
+        # TopicIdea objects, or their dicts
+        get = t.get if isinstance(t, dict) else lambda name: getattr(t, name, None)
+        title = get("title")
+        cluster_id = get("cluster_id")
+        angle = get("angle")
+        primary_kw = get("primary_keyword")
+        supporting_kws = get("supporting_keywords") or []
+        outline = get("outline") or []
+        persona = get("target_persona")
+        repeat_of = get("repeat_of")
 
         lines.append(f"## {idx}. {title}")
+        if repeat_of:
+            lines.append(f"- **Repeats earlier topic:** {repeat_of}")
         if cluster_id is not None:
             lines.append(f"- **Cluster ID:** `{cluster_id}`")
         if persona:
@@ -342,6 +460,57 @@ def write_topics_markdown(
     logger.info("Saved topics markdown to %s", md_path)
     return md_path
 
+_TOPICS_HEADING_RE = re.compile(r"^# Blog Topics for (?P<product>.+) \([^)]*\)\s*$")
+_TOPICS_FIELD_RE = re.compile(r"^- \*\*(?P<key>[^:*]+):\*\* ?(?P<value>.*)$")
+_TOPIC_TITLE_RE = re.compile(r"^## \d+\. (?P<title>.+)$")
+
+def read_topics_markdown(md_path: Path) -> Dict[str, Any]:
+    """
+    Parse a file written by `write_topics_markdown` back into
+    {"product", "platform", "run_id", "topics"}, with the topics as
+    RegisteredTopic (title, angle, primary keyword). Older files without a
+    Platform line take it from the file name.
+    """
+    header: Dict[str, str] = {}
+    product: Optional[str] = None
+    topics: List[RegisteredTopic] = []
+    for line in md_path.read_text(encoding="utf-8").splitlines():
+        m = _TOPIC_TITLE_RE.match(line)
+        if m:
+            topics.append(RegisteredTopic(title=m.group("title").strip()))
+            continue
+        m = _TOPICS_FIELD_RE.match(line)
+        if m:
+            key, value = m.group("key").strip().lower(), m.group("value").strip()
+            if not topics:
+                header[key] = value
+            elif key == "angle":
+                topics[-1].angle = value
+            elif key == "primary keyword":
+                topics[-1].primary_keyword = value.strip("`")
+            continue
+        m = _TOPICS_HEADING_RE.match(line)
+        if m and product is None:
+            product = m.group("product").strip()
+
+    platform = header.get("platform")
+    if not platform or platform == "None":
+        stem = md_path.name[: -len("_topics.md")]
+        platform = stem.rsplit("_", 1)[-1] if stem.count("_") >= 2 else None
+        if platform == "c":
+            platform = "c#"  # file names from before the slug used the canonical platform
+    if platform == "all":
+        platform = None
+    run_id = header.get("run id")
+    for t in topics:
+        t.platform, t.run_id = platform, run_id
+    return {
+        "product": header.get("product") or product or "",
+        "platform": platform,
+        "run_id": run_id,
+        "topics": topics,
+    }
+
 def append_metrics_db_entry(
     result: RunResult,
     metrics: RunMetrics,
@@ -402,6 +571,7 @@ def append_metrics_db_entry(
     topics_generated_raw = getattr(metrics, "topics_generated_raw", None)
     topics_after_dedup = getattr(metrics, "topics_after_dedup", None)
     existing_topics = getattr(metrics, "existing_topics_loaded", None)
+    existing_topics_sent = getattr(metrics, "existing_topics_sent", None)
     duplicates_dropped = getattr(metrics, "duplicates_dropped", None)
 
     # LLM / content index
@@ -413,6 +583,7 @@ def append_metrics_db_entry(
     content_index_time = getattr(metrics, "content_index_duration_seconds", None)
 
     llm_prompt_tokens = getattr(metrics, "llm_prompt_tokens", None)
+    prompt_tokens_estimate = getattr(metrics, "prompt_tokens_estimate", None)
     llm_completion_tokens = getattr(metrics, "llm_completion_tokens", None)
     llm_duration_total = getattr(metrics, "llm_duration_seconds", None)
 
@@ -445,6 +616,7 @@ def append_metrics_db_entry(
         "topics_generated_raw": topics_generated_raw,
         "topics_after_dedup": topics_after_dedup,
         "existing_topics": existing_topics,
+        "existing_topics_sent": existing_topics_sent,
         "duplicates_dropped": duplicates_dropped,
 
         # LLM / content index
@@ -452,6 +624,7 @@ def append_metrics_db_entry(
         "llm_failures": llm_failures,
         "llm_duration_total": llm_duration_total,
         "llm_prompt_tokens": llm_prompt_tokens,
+        "prompt_tokens_estimate": prompt_tokens_estimate,
         "llm_completion_tokens": llm_completion_tokens,
         "total_tokens": llm_total_tokens,
         "content_index_calls": content_index_calls,
@@ -479,7 +652,7 @@ def _print_summary(result: RunResult) -> None:
         print(
             f"  - {c.cluster_id} [{c.metrics.intent}] "
             f"score={c.metrics.score:.3f} brand_fit={c.metrics.brand_fit:.2f} "
-            f"label='{c.label}' (n={len(c.members)})"
+            f"label='{c.label}' (n={c.size})"
         )
 
     print("\nTopic ideas:")
@@ -520,11 +693,221 @@ def _resolve_metric_context(brand: str) -> Tuple[str, str]:
 
     return website, section
 
+def _cluster_model_path(req: RunRequest) -> Path:
+    """
+    Persisted incremental cluster model for the request's brand/product.
+
+    It lives next to the committed topic files (content/<Brand>/output/
+    cluster_models) so cluster IDs stay stable on every clone, not just on
+    the machine that built the model. It is a plain .npz (no pickle), see
+    `cluster_model.save_model`.
+    """
+    name = f"{_brand_slug(req.brand)}__{_brand_slug(req.product)}.npz"
+    return _resolve_brand_output_dir(req.brand) / "cluster_models" / name
+
+def _stream_clusters(req: RunRequest, metrics: RunMetrics) -> tuple[List[Cluster], ClusterAggregates]:
+    """
+    `req.stream` variant of import -> preprocess -> cluster: the keyword file
+    is read twice in chunks of `req.chunk_size` rows and never held in memory.
+    """
+    def batches():
+        return (preprocess(b) for b in iter_keyword_batches(req, req.chunk_size))
+
+    with timed_step(metrics, "cluster"):
+        result = stream_cluster(
+            batches,
+            k=req.clustering_k,
+            k_search=req.k_search,
+            metrics=metrics,
+            label_terms=req.label_terms,
+            label_method=req.label_method,
+        )
+    metrics.keywords_processed = result.keywords
+    metrics.keywords_after_preprocess = result.keywords
+    return result.clusters, result.agg
+
+def _build_clusters(
+    req: RunRequest,
+    metrics: RunMetrics,
+    records: Optional[Union[KeywordBatch, List[KeywordRecord]]] = None,
+) -> tuple[List[Cluster], Optional[ClusterAggregates]]:
+    """
+    Stage 1 up to (not including) scoring: import -> preprocess -> cluster -> intent/brand.
+
+    Returns the clusters plus, for streamed runs, their precomputed
+    aggregates (None otherwise) to pass on to scoring.
+    """
+    if req.stream and records is None:
+        clusters, agg = _stream_clusters(req, metrics)
+        metrics.clusters_created = len(clusters)
+        metrics.keywords_clustered = sum(c.size for c in clusters)
+        metrics.keywords_not_clustered = max(
+            0, metrics.keywords_after_preprocess - metrics.keywords_clustered
+        )
+        with timed_step(metrics, "annotate_intent_brand"):
+            clusters = annotate_intent_brand(clusters, req.product, brand=req.brand)
+        return clusters, agg
+
+    with timed_step(metrics, "import"):
+        if records is None:
+            batch = import_batch(req)
+        else:
+            batch = KeywordBatch.coerce(records)
+    metrics.keywords_processed = len(batch)
+
+    with timed_step(metrics, "preprocess"):
+        batch = preprocess(batch)
+    metrics.keywords_after_preprocess = len(batch)
+
+    cache_root = _resolve_output_dir() / ".kra_cache"
+    cache_dir = cache_root / "clusters" if req.use_cluster_cache else None
+    with timed_step(metrics, "cluster"):
+        if req.incremental:
+            clusters = incremental_cluster(
+                batch,
+                _cluster_model_path(req),
+                k=req.clustering_k,
+                k_search=req.k_search,
+                metrics=metrics,
+                label_terms=req.label_terms,
+                label_method=req.label_method,
+            )
+        else:
+            clusters = cluster_records(
+                batch,
+                k=req.clustering_k,
+                cache_dir=cache_dir,
+                metrics=metrics,
+                label_terms=req.label_terms,
+                label_method=req.label_method,
+                k_search=req.k_search,
+                vectorizer=req.vectorizer,
+                backend=req.cluster_backend,
+                embedding_cache_dir=cache_root / "embeddings" if req.use_cluster_cache else None,
+            )
+    metrics.clusters_created = len(clusters)
+
+    clustered_keywords: set[str] = set()
+    for c in clusters:
+        clustered_keywords.update(c.keywords)
+
+    metrics.keywords_clustered = len(clustered_keywords)
+    metrics.keywords_not_clustered = max(
+        0, metrics.keywords_after_preprocess - metrics.keywords_clustered
+    )
+
+    with timed_step(metrics, "annotate_intent_brand"):
+        clusters = annotate_intent_brand(clusters, req.product, brand=req.brand)
+
+    return clusters, None
+
+def run_weight_sweep(
+    req: RunRequest,
+    sweep: Union[Dict[str, Any], List[Dict[str, float]]],
+    records: Optional[Union[KeywordBatch, List[KeywordRecord]]] = None,
+    serp_stats: Optional[SerpStats] = None,
+) -> tuple[List[WeightSweepResult], List[Cluster], RunMetrics]:
+    """
+    Cluster once, then rank the clusters under every weight configuration in `sweep`.
+
+    `sweep` is a list of weight dicts or a dict of value lists (cartesian grid);
+    missing weights default to `req.weights`. No LLM call and no metrics webhooks.
+    """
+    metrics = RunMetrics(
+        run_id=str(uuid.uuid4())[:8],
+        brand=req.brand,
+        product=req.product,
+        locale=req.locale,
+        file_path=req.file_path or None,
+        job_type="Weight Sweep",
+    )
+    if serp_stats is not None:
+        metrics.set_serp_stats(serp_stats.requests, serp_stats.cache_hits, serp_stats.cache_misses)
+    try:
+        clusters, agg = _build_clusters(req, metrics, records)
+        configs = expand_weight_grid(sweep, req.weights)
+        with timed_step(metrics, "weight_sweep"):
+            results = sweep_weights(
+                clusters, configs, normalizers=req.normalizers, top_n=req.top_clusters, agg=agg
+            )
+    except Exception as exc:
+        metrics.finish(success=False, error_message=str(exc))
+        raise
+    metrics.finish(success=True)
+    metrics.add_event(
+        "KRA_WEIGHT_SWEEP_COMPLETED",
+        "Weight sweep completed.",
+        configurations=len(configs),
+    )
+    return results, clusters, metrics
+
+def _load_weight_sweep(value: str) -> Union[Dict[str, Any], List[Dict[str, float]]]:
+    """
+    --weight-sweep accepts inline JSON or a path to a JSON/YAML file.
+    """
+    p = Path(value)
+    if p.is_file():
+        text = p.read_text(encoding="utf-8")
+        if p.suffix.lower() in {".yaml", ".yml"}:
+            import yaml
+            return yaml.safe_load(text)
+        return json.loads(text)
+    return json.loads(value)
+
+def _normalizer_arg(value: str) -> Tuple[str, str]:
+    """
+    --normalize FEATURE=NAME, checked against the scoring registry so a typo
+    fails at argument parsing instead of after import and clustering.
+    """
+    feature, sep, name = value.partition("=")
+    feature, name = feature.strip(), name.strip()
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected FEATURE=NAME, got '{value}'")
+    if feature not in NORMALIZED_FEATURES:
+        raise argparse.ArgumentTypeError(
+            f"unknown feature '{feature}'; expected one of {', '.join(NORMALIZED_FEATURES)}"
+        )
+    if name not in NORMALIZERS:
+        raise argparse.ArgumentTypeError(f"unknown normalizer '{name}'; expected one of {', '.join(NORMALIZERS)}")
+    return feature, name
+
+def write_weight_sweep_markdown(
+    results: List[WeightSweepResult],
+    clusters: List[Cluster],
+    run_id: str,
+    product: str,
+    output_dir: Path,
+) -> Path:
+    """
+    Write one ranking table per weight configuration.
+    Example: <runid>_<product>_weight_sweep.md
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    md_path = output_dir / f"{run_id}_{_brand_slug(product)}_weight_sweep.md"
+    labels = {c.cluster_id: c.label for c in clusters}
+
+    lines: List[str] = [f"# Weight sweep for {product}", "", f"- **Run ID:** {run_id}",
+                        f"- **Configurations:** {len(results)}", ""]
+    for n, res in enumerate(results, start=1):
+        w = ", ".join(f"{k}={v:g}" for k, v in res.weights.items())
+        lines.append(f"## {n}. {w}")
+        lines.append("")
+        lines.append("| Rank | Cluster ID | Label | Score |")
+        lines.append("|---:|---|---|---:|")
+        for rank, (cid, score) in enumerate(res.ranking, start=1):
+            lines.append(f"| {rank} | `{cid}` | {labels.get(cid, '')} | {score:.6f} |")
+        lines.append("")
+
+    md_path.write_text("\n".join(lines), encoding="utf-8")
+    logger.info("Saved weight sweep markdown to %s", md_path)
+    return md_path
+
 def run_sync(
     req: RunRequest,
     platform: Optional[str] = None,
     use_content_index: bool = True,
-    records: Optional[List[KeywordRecord]] = None,
+    records: Optional[Union[KeywordBatch, List[KeywordRecord]]] = None,
+    serp_stats: Optional[SerpStats] = None,
 ) -> tuple[RunResult, RunMetrics]:
     run_id = str(uuid.uuid4())[:8]
     start = time.perf_counter()
@@ -540,6 +923,8 @@ def run_sync(
         platform=platform,
         file_path=req.file_path or None,
     )
+    if serp_stats is not None:
+        metrics.set_serp_stats(serp_stats.requests, serp_stats.cache_hits, serp_stats.cache_misses)
     metrics.add_event("KRA_RUN_STARTED", "Blog Keyword Analyzer run started.")
 
     website, section = _resolve_metric_context(req.brand)
@@ -552,34 +937,10 @@ def run_sync(
         # -----------------------
         # STAGE 1: Keyword Clustering
         # -----------------------
-        with timed_step(metrics, "import"):
-            if records is None:
-                records = import_file(req)
-        metrics.keywords_processed = len(records)
-
-        with timed_step(metrics, "preprocess"):
-            records = preprocess(records)
-        metrics.keywords_after_preprocess = len(records)
-
-        with timed_step(metrics, "cluster"):
-            clusters = cluster_records(records, k=req.clustering_k)
-        metrics.clusters_created = len(clusters)
-
-        clustered_keywords: set[str] = set()
-        for c in clusters:
-            for m in c.members:
-                clustered_keywords.add(m.keyword)
-
-        metrics.keywords_clustered = len(clustered_keywords)
-        metrics.keywords_not_clustered = max(
-            0, metrics.keywords_after_preprocess - metrics.keywords_clustered
-        )
-
-        with timed_step(metrics, "annotate_intent_brand"):
-            clusters = annotate_intent_brand(clusters, req.product)
+        clusters, agg = _build_clusters(req, metrics, records)
 
         with timed_step(metrics, "score"):
-            clusters = score_clusters(clusters, req.weights)
+            clusters = score_clusters(clusters, req.weights, normalizers=req.normalizers, agg=agg)
 
         metrics.clusters_used_for_topics = min(len(clusters), req.top_clusters)
         metrics.set_cluster_score_stats([c.metrics.score for c in clusters if c.metrics is not None])
@@ -634,6 +995,17 @@ def run_sync(
                 "Content index lookup disabled for this run (use_content_index=False).",
             )
 
+        registry: Optional[TopicRegistry] = None
+        taken_angles: List[str] = []
+        if req.use_topic_registry:
+            try:
+                registry = open_topic_registry(_topic_registry_path())
+                _seed_topic_registry(registry, req, platform)
+                taken_angles = registry.taken_angles(req.brand, req.product, _canonical_platform(platform))
+            except sqlite3.Error as exc:
+                logger.warning("Topic registry unavailable (%s); generating without it.", exc)
+                registry = None
+
         agent = KeywordResearchAgent()
         t0_llm = time.perf_counter()
 
@@ -646,15 +1018,21 @@ def run_sync(
             platform=platform,
             existing_topics=existing_topics,
             metrics=metrics,
+            taken_angles=taken_angles,
+            shard_size=req.topic_shard_size,
         )
+        # Each request (shard) is marked by the agent; this is the wall-clock time
         dt_llm = time.perf_counter() - t0_llm
-        metrics.mark_llm_call(duration_seconds=dt_llm, failed=topics is None)
+        metrics.record_step_duration("generate_topics", dt_llm)
 
         if topics is None:
             topics = []
         metrics.topics_generated_raw = len(topics)
 
-        topics = _filter_duplicate_topics(topics=topics, existing_topics=existing_topics)
+        topics = _filter_duplicate_topics(topics=topics, existing_topics=existing_topics, metrics=metrics)
+        if registry is not None:
+            with timed_step(metrics, "topic_registry"):
+                topics = _dedup_with_registry(topics, registry, req, platform, run_id, metrics=metrics)
         metrics.topics_after_dedup = len(topics)
         metrics.duplicates_dropped = metrics.topics_generated_raw - metrics.topics_after_dedup
 
@@ -778,8 +1156,68 @@ def main() -> None:
     )
     parser.add_argument("--locale", default="en-US")
     parser.add_argument("--k", dest="clustering_k", type=int, default=None, help="Force number of clusters.")
+    parser.add_argument(
+        "--k-search",
+        dest="k_search",
+        choices=["silhouette", "elbow", "heuristic"],
+        default="elbow",
+        help="How k is chosen when --k is not given (inertia elbow, sampled silhouette, or row-count heuristic).",
+    )
+    parser.add_argument(
+        "--vectorizer",
+        choices=["tfidf", "hashing", "char", "embedding"],
+        default="tfidf",
+        help="Keyword features for clustering; 'embedding' needs sentence-transformers.",
+    )
+    parser.add_argument(
+        "--cluster-backend",
+        dest="cluster_backend",
+        choices=["minibatch_kmeans", "agglomerative_knn", "hdbscan"],
+        default="minibatch_kmeans",
+        help="Clustering algorithm; hdbscan picks its own cluster count and leaves noise keywords unclustered.",
+    )
     parser.add_argument("--top", dest="top_clusters", type=int, default=settings.TOP_CLUSTERS)
     parser.add_argument("--max-rows", dest="max_rows", type=int, default=settings.MAX_ROWS)
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Cluster the keyword file in chunks (hashing + MiniBatchKMeans) without loading it whole; ignores --max-rows.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        type=int,
+        default=settings.KRA_STREAM_CHUNK_SIZE,
+        help="Rows per chunk in --stream mode.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Assign keywords to the saved brand/product cluster model so cluster IDs stay stable across runs.",
+    )
+    parser.add_argument(
+        "--import-mode",
+        dest="import_mode",
+        choices=["vectorized", "rows"],
+        default="vectorized",
+        help="Keyword file importer: whole-column 'vectorized' (default) or per-row 'rows'.",
+    )
+    parser.add_argument(
+        "--label-method",
+        dest="label_method",
+        choices=["tfidf", "ctfidf"],
+        default="tfidf",
+        help="How cluster label terms are weighted: summed TF-IDF (default) or class-based c-TF-IDF.",
+    )
+    parser.add_argument(
+        "--normalize",
+        dest="normalizers",
+        action="append",
+        type=_normalizer_arg,
+        default=[],
+        metavar="FEATURE=NAME",
+        help="Score normalizer per feature, e.g. volume=log (minmax | zscore | log). Repeatable.",
+    )
     # By default we DO use content index; this flag turns it OFF.
     parser.add_argument(
         "--no-content-index",
@@ -788,6 +1226,43 @@ def main() -> None:
         help="Disable search for existing topics via content index service.",
     )
     parser.set_defaults(use_content_index=True)
+    parser.add_argument(
+        "--no-cluster-cache",
+        dest="use_cluster_cache",
+        action="store_false",
+        help="Always refit TF-IDF and k-means instead of reusing the on-disk cluster cache.",
+    )
+    parser.set_defaults(use_cluster_cache=True)
+    parser.add_argument(
+        "--no-topic-registry",
+        dest="use_topic_registry",
+        action="store_false",
+        help="Do not check topics against earlier runs or record them (KRA_OUTPUT_DIR/.kra_cache/topics.sqlite).",
+    )
+    parser.set_defaults(use_topic_registry=True)
+    parser.add_argument(
+        "--drop-repeated-topics",
+        dest="drop_repeated_topics",
+        action="store_true",
+        help="Drop topics that repeat an earlier run's topic instead of marking them in the output.",
+    )
+    parser.add_argument(
+        "--topic-shard-size",
+        dest="topic_shard_size",
+        type=int,
+        default=settings.KRA_TOPIC_SHARD_SIZE,
+        help="Clusters per topic-generation LLM request, run concurrently (0 = one request).",
+    )
+
+    parser.add_argument(
+        "--weight-sweep",
+        dest="weight_sweep",
+        default="",
+        help=(
+            "Rank clusters under many weight configurations instead of generating topics. "
+            "Inline JSON or a JSON/YAML file: a list of weight dicts or a dict of value lists."
+        ),
+    )
 
     # NEW: SerpAPI options
     parser.add_argument(
@@ -801,6 +1276,37 @@ def main() -> None:
         default="",
         help="Topic/angle to seed the SerpAPI query, e.g. 'convert CSV to Excel'.",
     )
+    parser.add_argument(
+        "--serp-mode",
+        dest="serp_mode",
+        choices=["single", "harvest"],
+        default="single",
+        help=(
+            "SerpAPI ingestion: one query ('single') or concurrent breadth-first expansion over "
+            "related searches, PAA questions, platform variants and result pages ('harvest')."
+        ),
+    )
+    parser.add_argument(
+        "--serp-max-keywords",
+        dest="serp_max_keywords",
+        type=int,
+        default=settings.SERPAPI_MAX_KEYWORDS,
+        help="Keywords to keep from SerpAPI; harvest mode stops once it has this many.",
+    )
+    parser.add_argument(
+        "--serp-max-requests",
+        dest="serp_max_requests",
+        type=int,
+        default=settings.SERPAPI_MAX_REQUESTS,
+        help="Hard cap on paid SerpAPI requests in harvest mode (cache hits are free).",
+    )
+    parser.add_argument(
+        "--no-serp-cache",
+        dest="use_serp_cache",
+        action="store_false",
+        help="Always call SerpAPI instead of reusing cached responses (KRA_OUTPUT_DIR/.kra_cache/serp.sqlite).",
+    )
+    parser.set_defaults(use_serp_cache=True)
 
     args = parser.parse_args()
 
@@ -829,26 +1335,62 @@ def main() -> None:
         # If resolved_input is None, we pass empty string -> importer may search defaults
         file_path=str(resolved_input) if resolved_input is not None else "",
         clustering_k=args.clustering_k,
+        k_search=args.k_search,
+        vectorizer=args.vectorizer,
+        cluster_backend=args.cluster_backend,
+        stream=args.stream,
+        chunk_size=args.chunk_size,
+        incremental=args.incremental,
         top_clusters=args.top_clusters,
         max_rows=args.max_rows,
+        import_mode=args.import_mode,
+        normalizers=dict(args.normalizers),
+        use_cluster_cache=args.use_cluster_cache,
+        use_topic_registry=args.use_topic_registry,
+        drop_repeated_topics=args.drop_repeated_topics,
+        topic_shard_size=args.topic_shard_size,
+        label_method=args.label_method,
         # weights keep defaults from model unless you want to override here
     )
 
     # If using SerpAPI, fetch KeywordRecord list here
     records: Optional[List[KeywordRecord]] = None
+    serp_stats: Optional[SerpStats] = None
     if args.use_serp_api:
-        from .tools.serp_import import fetch_serp_keywords
+        from .tools.serp_cache import open_serp_cache
+        from .tools.serp_import import fetch_serp_keywords, harvest_serp_keywords
+
+        serp_stats = SerpStats()
+        serp_cache = (
+            open_serp_cache(_resolve_output_dir() / ".kra_cache" / "serp.sqlite")
+            if args.use_serp_cache else None
+        )
 
         topic = args.serp_topic.strip() or args.product
         if settings.DEBUG:
-            print(f"[KRA] Using SerpAPI for topic={topic!r}, product={args.product!r}")
-
-        records = fetch_serp_keywords(
-            topic=topic,
-            product=args.product,
-            locale=args.locale,
-            max_keywords=args.max_rows,
-        )
+            print(f"[KRA] Using SerpAPI ({args.serp_mode}) for topic={topic!r}, product={args.product!r}")
+
+        if args.serp_mode == "harvest":
+            records = harvest_serp_keywords(
+                topic=topic,
+                product=args.product,
+                locale=args.locale,
+                max_keywords=args.serp_max_keywords,
+                max_requests=args.serp_max_requests,
+                # one query variant per platform
+                platforms=[args.platform] if args.platform else list(platform_LABELS.values()),
+                stats=serp_stats,
+                cache=serp_cache,
+            )
+        else:
+            records = fetch_serp_keywords(
+                topic=topic,
+                product=args.product,
+                locale=args.locale,
+                max_keywords=args.serp_max_keywords,
+                cache=serp_cache,
+                stats=serp_stats,
+            )
 
         if not records:
             print("⚠️ SerpAPI returned no keywords; exiting.")
@@ -863,12 +1405,33 @@ def main() -> None:
         req.file_path,
     )
 
+    if args.weight_sweep:
+        sweep_results, sweep_clusters, metrics = run_weight_sweep(
+            req, _load_weight_sweep(args.weight_sweep), records=records, serp_stats=serp_stats
+        )
+        for n, res in enumerate(sweep_results, start=1):
+            w = ", ".join(f"{k}={v:g}" for k, v in res.weights.items())
+            print(f"\n[{n}] {w}")
+            for rank, (cid, score) in enumerate(res.ranking, start=1):
+                print(f"  {rank:>3}. {cid:<6} score={score:.6f}")
+        write_weight_sweep_markdown(
+            sweep_results,
+            sweep_clusters,
+            run_id=metrics.run_id,
+            product=req.product,
+            output_dir=_resolve_brand_output_dir(req.brand),
+        )
+        print()
+        print(metrics.as_cli_summary())
+        return
+
     # Orchestrate
     result, metrics = run_sync(
         req,
         platform=args.platform or None,
         use_content_index=args.use_content_index,
         records=records,  # <--- THIS prevents import_file(req) in SerpAPI mode
+        serp_stats=serp_stats,
     )
 
     # Print a brief human summary of clusters/topics (optional)
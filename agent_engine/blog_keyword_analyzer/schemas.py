@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import List, Optional, Literal, Dict
+from typing import Any, List, Optional, Literal, Dict, Tuple
 
-from pydantic import BaseModel, Field, validator
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, computed_field, model_validator, validator
 
 
 class KeywordRecord(BaseModel):
@@ -21,6 +22,7 @@ class KeywordRecord(BaseModel):
     url: Optional[str] = None
     competition: Optional[float] = None
     competition_label: Optional[str] = None
+    intent: Optional[Literal["informational", "commercial", "transactional", "navigational"]] = None
 
     @validator("keyword")
     def norm_kw(cls, v: str) -> str:
@@ -39,6 +41,8 @@ class ClusterMetrics(BaseModel):
     avg_cpc: float = 0.0
     brand_fit: float = 0.0
     intent: Literal["informational", "commercial", "transactional", "navigational"] = "informational"
+    # volume-weighted share of member intents, e.g. {"transactional": 0.12, ...}
+    intent_distribution: Dict[str, float] = Field(default_factory=dict)
     score: float = 0.0
     avg_competition: Optional[float] = None
 
@@ -46,12 +50,68 @@ class ClusterMetrics(BaseModel):
 class Cluster(BaseModel):
     """
     Represents a cluster of related keywords plus its aggregate metrics.
+
+    Members are stored as row indexes (`member_idx`) into a shared
+    KeywordBatch (`batch`); KeywordRecord objects for `members` are only
+    built when first accessed, e.g. when a RunResult is serialized.
+    Passing `members` instead (records or their dicts) builds a batch for
+    them, so serialized clusters load back with their members.
+
+    Streamed clusters only keep a sample of their members; `n_members`
+    then holds the full member count.
     """
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     cluster_id: str
     label: str
-    members: List[KeywordRecord]
+    label_terms: List[str] = Field(default_factory=list)
     metrics: ClusterMetrics
+    member_idx: Any = Field(default=None, exclude=True, repr=False)
+    batch: Any = Field(default=None, exclude=True, repr=False)
+    n_members: Optional[int] = Field(default=None, exclude=True, repr=False)
+
+    _members: Optional[List[KeywordRecord]] = PrivateAttr(default=None)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _members_to_batch(cls, data: Any) -> Any:
+        """
+        Accept `members` (KeywordRecords or their dicts, e.g. a serialized
+        RunResult) by building a batch that holds just those records.
+        """
+        if not isinstance(data, dict) or "members" not in data:
+            return data
+        data = dict(data)
+        members = data.pop("members") or []
+        if data.get("batch") is not None or data.get("member_idx") is not None:
+            raise ValueError("Pass either `members` or `batch`/`member_idx`, not both.")
+        from .tools.keyword_batch import KeywordBatch  # imports this module
+
+        records = [m if isinstance(m, KeywordRecord) else KeywordRecord.model_validate(m) for m in members]
+        data["batch"] = KeywordBatch.from_records(records)
+        data["member_idx"] = np.arange(len(records))
+        return data
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def members(self) -> List[KeywordRecord]:
+        if self._members is None:
+            self._members = self.batch.to_records(self.member_idx) if self.batch is not None else []
+        return self._members
+
+    @property
+    def keywords(self) -> List[str]:
+        """Member keyword strings, read straight from the batch."""
+        if self.batch is None:
+            return []
+        return self.batch.keyword[self.member_idx].tolist()
+
+    @property
+    def size(self) -> int:
+        if self.n_members is not None:
+            return self.n_members
+        return 0 if self.member_idx is None else len(self.member_idx)
 
 
 class TopicIdea(BaseModel):
@@ -68,6 +128,8 @@ class TopicIdea(BaseModel):
     primary_keyword: str
     supporting_keywords: List[str]
     internal_links: List[str] = []
+    # Title of the earlier run's topic this one nearly repeats (topic registry)
+    repeat_of: Optional[str] = None
 
 
 class RunRequest(BaseModel):
@@ -77,6 +139,20 @@ class RunRequest(BaseModel):
     Note:
       - `file_path` may be an empty string to let the importer search defaults.
       - `weights` allow overriding the default scoring weights if needed.
+      - `import_mode` picks the file importer ("vectorized" or the per-row "rows" path).
+      - `use_cluster_cache` reuses cached TF-IDF/k-means results for identical keyword lists.
+      - `vectorizer` / `cluster_backend` pick the clustering backends; "embedding"
+        needs sentence-transformers and falls back to "tfidf" without it.
+      - `stream` clusters the file chunk by chunk (hashing + MiniBatchKMeans);
+        `max_rows`, `vectorizer`, `cluster_backend`, `incremental` and the cluster cache do not apply.
+      - `incremental` assigns keywords to the saved per-brand/product cluster
+        model (stable cluster IDs) instead of reclustering from scratch.
+      - `use_topic_registry` records topics in the per-brand/product registry
+        (seeded from the committed topic files), drops near duplicates within
+        the run and marks repeats of earlier runs (`repeat_of`).
+      - `drop_repeated_topics` drops those repeats instead of marking them.
+      - `topic_shard_size` > 0 generates topics for that many clusters per LLM
+        request, with the requests running concurrently (0 = one request).
     """
 
     brand: str = "Aspose"
@@ -84,8 +160,21 @@ class RunRequest(BaseModel):
     locale: str = "en-US"
     file_path: str = "/mnt/data/keywords.csv"
     clustering_k: int | None = None
+    k_search: Literal["silhouette", "elbow", "heuristic"] = "elbow"
+    vectorizer: Literal["tfidf", "hashing", "char", "embedding"] = "tfidf"
+    cluster_backend: Literal["minibatch_kmeans", "agglomerative_knn", "hdbscan"] = "minibatch_kmeans"
     top_clusters: int = 10
     max_rows: int = 50000
+    stream: bool = False
+    chunk_size: int = 50000
+    incremental: bool = False
+    import_mode: Literal["vectorized", "rows"] = "vectorized"
+    use_cluster_cache: bool = True
+    use_topic_registry: bool = True
+    drop_repeated_topics: bool = False
+    topic_shard_size: int = 0
+    label_terms: int = 5
+    label_method: Literal["tfidf", "ctfidf"] = "tfidf"
     weights: Dict[str, float] = Field(
         default_factory=lambda: {
             "volume": 0.35,
@@ -95,6 +184,8 @@ class RunRequest(BaseModel):
             "intent": 0.10,
         }
     )
+    # Per-feature score normalizer ("volume"/"kd"/"cpc" -> "minmax" | "zscore" | "log")
+    normalizers: Dict[str, str] = Field(default_factory=dict)
 
 
 class RunResult(BaseModel):
@@ -113,6 +204,17 @@ class RunResult(BaseModel):
     topics: List[TopicIdea]
 
 
+class WeightSweepResult(BaseModel):
+    """
+    Cluster ranking for one weight configuration of a weight sweep.
+
+    `ranking` holds (cluster_id, score) pairs, best first.
+    """
+
+    weights: Dict[str, float]
+    ranking: List[Tuple[str, float]]
+
+
 class ExistingPost(BaseModel):
     """
     Minimal structure used to represent posts discovered in the content index.
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import BRAND_METRICS, PRODUCT_FORMAT_ALIASES, project_root, settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RX = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# Brand fit of a keyword by its best-matching token
+FIT_PRODUCT = 1.0   # the run's product family (name, urlPrefix or file format)
+FIT_BRAND = 0.5     # the brand name itself
+FIT_FAMILY = 0.25   # another product family of the same brand
+
+
+@dataclass
+class BrandIndex:
+    """
+    Token -> product family map for one brand, built from productsData.
+
+    `families[token]` lists the product families (urlPrefix) a keyword token
+    points at; `brand_tokens` are the brand name's tokens.
+    """
+
+    brand_tokens: frozenset
+    families: Dict[str, frozenset]
+
+    def family_of(self, product: str) -> Optional[str]:
+        """Product family of e.g. "Aspose.Cells" ("cells"), if the brand has it."""
+        for token in reversed(TOKEN_RX.findall(product.lower())):
+            fams = self.families.get(token)
+            if fams and len(fams) == 1:
+                return next(iter(fams))
+        return None
+
+    def token_fit(self, product: str) -> Dict[str, float]:
+        """Precomputed token -> brand fit for `product`."""
+        target = self.family_of(product)
+        fit: Dict[str, float] = {}
+        for token, fams in self.families.items():
+            fit[token] = FIT_PRODUCT if target in fams else FIT_FAMILY
+        for token in self.brand_tokens:
+            fit[token] = max(fit.get(token, 0.0), FIT_BRAND)
+        if target is None:
+            # Unknown product: its own name tokens are the product match
+            for token in TOKEN_RX.findall(product.lower()):
+                if token not in self.brand_tokens:
+                    fit[token] = FIT_PRODUCT
+        return fit
+
+
+def _brand_key(brand: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", (brand or "").lower())
+
+
+def _products_file(brand: str) -> Optional[Path]:
+    entry = BRAND_METRICS.get(_brand_key(brand))
+    if not entry:
+        return None
+    data_dir = Path(settings.KRA_PRODUCTS_DATA_DIR)
+    if not data_dir.is_absolute():
+        data_dir = (project_root() / data_dir).resolve()
+    path = data_dir / f"{entry[0]}.json"
+    if not path.is_file():
+        _warn_missing(str(path))
+        return None
+    return path
+
+
+@lru_cache(maxsize=None)
+def _warn_missing(path: str) -> None:
+    """Warn once per file: without productsData brand_fit only knows the brand and product names."""
+    logger.warning(
+        "Products data %s not found (KRA_PRODUCTS_DATA_DIR); brand fit only matches the brand and product names.",
+        path,
+    )
+
+
+@lru_cache(maxsize=16)
+def _build(brand: str, path: Optional[str], mtime: float) -> BrandIndex:
+    brand_tokens = frozenset(TOKEN_RX.findall(brand.lower()))
+    families: Dict[str, set] = {}
+
+    def add(token: str, family: str) -> None:
+        if token and token not in brand_tokens:
+            families.setdefault(token, set()).add(family)
+
+    products: List[dict] = []
+    if path is not None:
+        try:
+            products = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not read products data %s: %s", path, exc)
+
+    for p in products:
+        family = (p.get("urlPrefix") or "").strip().lower()
+        if not family:
+            continue
+        add(family, family)
+        # "Aspose.Cells for .NET" / "Aspose.Cells Product Family" -> "cells"
+        for field in ("ProductName", "Category"):
+            name = (p.get(field) or "").lower().split(" for ")[0].replace("product family", "")
+            for token in TOKEN_RX.findall(name):
+                add(token, family)
+        for alias in PRODUCT_FORMAT_ALIASES.get(family, []):
+            add(alias, family)
+
+    return BrandIndex(
+        brand_tokens=brand_tokens,
+        families={t: frozenset(f) for t, f in families.items()},
+    )
+
+
+def load_brand_index(brand: str) -> BrandIndex:
+    """BrandIndex for `brand`, rebuilt when its productsData file changes."""
+    path = _products_file(brand)
+    mtime = path.stat().st_mtime if path is not None else 0.0
+    return _build(brand, str(path) if path is not None else None, mtime)
+
+
+def keyword_brand_fit(keywords: Sequence[str], token_fit: Dict[str, float]) -> np.ndarray:
+    """
+    Brand fit of every keyword: the best `token_fit` over its tokens (0 if none).
+
+    One regex pass over all keywords joined together, tokens mapped back to
+    keywords by offset.
+    """
+    n = len(keywords)
+    fit = np.zeros(n, dtype=np.float64)
+    if not n or not token_fit:
+        return fit
+
+    lengths = np.fromiter((len(k) + 1 for k in keywords), dtype=np.int64, count=n)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    pos: List[int] = []
+    val: List[float] = []
+    for m in TOKEN_RX.finditer("\n".join(keywords)):
+        v = token_fit.get(m.group())
+        if v:
+            pos.append(m.start())
+            val.append(v)
+    if pos:
+        rows = np.searchsorted(starts, np.asarray(pos), side="right") - 1
+        np.maximum.at(fit, rows, np.asarray(val))
+    return fit
@@ -1,50 +1,213 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import List, Optional, Union
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import MiniBatchKMeans
+from scipy import sparse
 from ..schemas import KeywordRecord, Cluster, ClusterMetrics
+from .keyword_batch import KeywordBatch
+from . import cluster_backends, cluster_cache
+from .metrics import RunMetrics
+from .k_search import search_k
+from ..config import settings
 
-def _auto_k(n_samples: int) -> int:
-    if n_samples < 500: return 10
-    if n_samples < 2000: return 15
-    return 20
+def _cluster_term_weights(
+    X: sparse.spmatrix,
+    rows: np.ndarray,
+    n_clusters: int,
+    method: str = "tfidf",
+) -> sparse.csr_matrix:
+    """
+    Term weights for every cluster at once: (cluster indicator matrix) @ X.
+    Rows whose cluster is -1 (noise) are left out.
 
-def _to_1d(a) -> np.ndarray:
-    """Convert numpy.matrix / sparse row to a flat ndarray safely."""
-    # numpy.matrix has .A1 (flat). For anything else, np.asarray + ravel
-    return a.A1 if hasattr(a, "A1") else np.asarray(a).ravel()
+    - "tfidf": summed TF-IDF weights of the members (cluster centroid x size)
+    - "ctfidf": class-based TF-IDF over member term counts, which favours
+      terms that are frequent in this cluster but rare in the others
+    """
+    n = X.shape[0]
+    member = np.flatnonzero(rows >= 0)
+    indicator = sparse.csr_matrix(
+        (np.ones(member.size, dtype=np.float64), (rows[member], member)), shape=(n_clusters, n)
+    )
+    if method == "tfidf":
+        weights = indicator @ X
+    elif method == "ctfidf":
+        present = X.tocsr(copy=True)
+        present.data[:] = 1.0
+        counts = (indicator @ present).tocsr()
+        row_tot = np.asarray(counts.sum(axis=1)).ravel()
+        col_tot = np.asarray(counts.sum(axis=0)).ravel()
+        avg_words = row_tot.mean() if row_tot.size else 0.0
+        idf = np.log1p(np.divide(avg_words, col_tot, out=np.zeros_like(col_tot), where=col_tot > 0))
+        tf = sparse.diags(np.divide(1.0, row_tot, out=np.zeros_like(row_tot), where=row_tot > 0)) @ counts
+        weights = tf @ sparse.diags(idf)
+    else:
+        raise ValueError(f"Unknown label method '{method}'; expected 'tfidf' or 'ctfidf'")
 
-def cluster_records(records: List[KeywordRecord], k: Optional[int] = None) -> List[Cluster]:
-    texts = [r.keyword for r in records]
-    vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2)
-    X = vectorizer.fit_transform(texts)
+    weights = weights.tocsr()
+    weights.sort_indices()
+    return weights
 
-    k_final = k or _auto_k(X.shape[0])
-    kmeans = MiniBatchKMeans(n_clusters=k_final, random_state=42, n_init="auto", batch_size=2048)
-    labels = kmeans.fit_predict(X)
+def _top_terms(weights: sparse.csr_matrix, row: int, feature_names: np.ndarray, n: int) -> List[str]:
+    """
+    Top-n terms of one cluster row, highest weight first.
 
-    buckets: Dict[int, List[int]] = {}
-    for i, lab in enumerate(labels):
-        buckets.setdefault(lab, []).append(i)
+    Ties go to the lower column index (same as argmax on the dense row).
+    """
+    lo, hi = weights.indptr[row], weights.indptr[row + 1]
+    data, cols = weights.data[lo:hi], weights.indices[lo:hi]
+    keep = data > 0
+    data, cols = data[keep], cols[keep]
+    if not data.size:
+        return []
+    top = np.argsort(-data, kind="stable")[: max(1, n)]
+    return [str(feature_names[c]) for c in cols[top]]
+
+def _fit(
+    texts: List[str],
+    k: Optional[int],
+    k_search: str,
+    volume: Optional[np.ndarray],
+    metrics: Optional[RunMetrics],
+    vectorizer: str = "tfidf",
+    backend: str = "minibatch_kmeans",
+    embedding_cache_dir: Optional[Path] = None,
+) -> cluster_cache.CachedClustering:
+    if vectorizer == "tfidf":
+        X, feature_names = cluster_backends.label_matrix(texts)
+        features = X
+    else:
+        features = cluster_backends.vectorize(vectorizer, texts, embedding_cache_dir)
+        X, feature_names = cluster_backends.label_matrix(texts)
+
+    if backend in cluster_backends.SELF_SIZING_BACKENDS:
+        labels = cluster_backends.fit_labels(backend, features, 0)
+        if metrics is not None:
+            metrics.set_k_search(int(np.unique(labels[labels >= 0]).size), backend)
+        return cluster_cache.CachedClustering(X=X, feature_names=feature_names, labels=labels)
+
+    if k:
+        k_final = k
+        if metrics is not None:
+            metrics.set_k_search(k, "forced")
+    else:
+        found = search_k(
+            features,
+            method=k_search,
+            volume=volume,
+            time_budget_s=settings.KRA_K_SEARCH_MAX_SECONDS,
+            n_jobs=settings.KRA_K_SEARCH_JOBS,
+        )
+        k_final = found.k
+        if metrics is not None:
+            metrics.set_k_search(found.k, found.method, found.curve, found.seconds)
+    labels = cluster_backends.fit_labels(backend, features, k_final)
+    return cluster_cache.CachedClustering(X=X, feature_names=feature_names, labels=labels)
+
+def _backend_key(vectorizer: str, backend: str) -> dict:
+    """Cache-key entries for non-default backends (keeps existing default keys valid)."""
+    key: dict = {}
+    if vectorizer != "tfidf":
+        key["vectorizer_backend"] = vectorizer
+        key["vectorizer_params"] = {
+            "hashing": cluster_backends.HASHING_PARAMS,
+            "char": cluster_backends.CHAR_PARAMS,
+            "embedding": settings.KRA_EMBEDDING_MODEL,
+        }[vectorizer]
+    if backend != "minibatch_kmeans":
+        key["cluster_backend"] = backend
+        key["backend_params"] = {
+            "agglomerative_knn": {"n_neighbors": cluster_backends.KNN_NEIGHBORS, "svd": cluster_backends.SVD_COMPONENTS},
+            "hdbscan": {**cluster_backends.HDBSCAN_PARAMS, "svd": cluster_backends.SVD_COMPONENTS},
+        }[backend]
+    return key
+
+def cluster_records(
+    records: Union[KeywordBatch, List[KeywordRecord]],
+    k: Optional[int] = None,
+    cache_dir: Optional[Path] = None,
+    metrics: Optional[RunMetrics] = None,
+    label_terms: int = 5,
+    label_method: str = "tfidf",
+    k_search: str = "elbow",
+    vectorizer: str = "tfidf",
+    backend: str = "minibatch_kmeans",
+    embedding_cache_dir: Optional[Path] = None,
+) -> List[Cluster]:
+    """
+    Keyword clustering; TF-IDF + MiniBatchKMeans by default.
+
+    `vectorizer` and `backend` pick entries of cluster_backends.VECTORIZERS /
+    CLUSTER_BACKENDS. Keywords a backend marks as noise (HDBSCAN) are left
+    out of every cluster. Embeddings are cached per keyword in
+    `embedding_cache_dir`.
+
+    Each cluster is labelled with its `label_terms` highest-weighted terms
+    ("tfidf" summed weights or "ctfidf" class-based TF-IDF); `label` is the first.
+
+    With `cache_dir`, the TF-IDF matrix, vocabulary and labels are cached on
+    disk keyed by the keyword list, k, backends and their parameters.
+
+    Without an explicit `k`, the number of clusters comes from `search_k`
+    ("silhouette", "elbow" or the old row-count "heuristic").
+    """
+    batch = KeywordBatch.coerce(records)
+    texts = batch.keyword.tolist()
+    vectorizer = cluster_backends.resolve_vectorizer(vectorizer)
+
+    fitted: Optional[cluster_cache.CachedClustering] = None
+    key = ""
+    if cache_dir is not None:
+        key = cluster_cache.cache_key(
+            texts,
+            {
+                "k": k or f"auto:{k_search}",
+                "vectorizer": cluster_backends.VECTORIZER_PARAMS,
+                "kmeans": cluster_backends.KMEANS_PARAMS,
+                **_backend_key(vectorizer, backend),
+            },
+        )
+        fitted = cluster_cache.load(cache_dir, key)
+        if metrics is not None:
+            metrics.cluster_cache_hit = fitted is not None
+            if fitted is not None:
+                found = fitted.labels[fitted.labels >= 0]
+                metrics.set_k_search(int(np.unique(found).size), "cached")
+    if fitted is None:
+        fitted = _fit(
+            texts, k, k_search, batch.values("volume"), metrics,
+            vectorizer=vectorizer, backend=backend, embedding_cache_dir=embedding_cache_dir,
+        )
+        if cache_dir is not None:
+            cluster_cache.store(cache_dir, key, fitted)
+
+    X, feature_names, labels = fitted.X, fitted.feature_names, fitted.labels
+
+    # Stable sort keeps members in input order, clusters in first-seen order
+    valid = np.flatnonzero(labels >= 0)
+    order = valid[np.argsort(labels[valid], kind="stable")]
+    uniq, starts = np.unique(labels[order], return_index=True)
+    groups = dict(zip(uniq.tolist(), np.split(order, starts[1:])))
+    first_seen = sorted(groups, key=lambda lab: groups[lab][0])
+
+    # Row position of each cluster in the term-weight matrix
+    pos = np.empty(int(uniq.max()) + 1 if uniq.size else 0, dtype=np.int64)
+    pos[first_seen] = np.arange(len(first_seen))
+    rows = np.full(labels.shape[0], -1, dtype=np.int64)
+    rows[valid] = pos[labels[valid]]
+    weights = _cluster_term_weights(X, rows, len(first_seen), method=label_method)
 
     clusters: List[Cluster] = []
-    for lab, idxs in buckets.items():
-        members = [records[i] for i in idxs]
-
-        # Use sum (sparse-friendly), then convert to 1D ndarray safely
-        sub = X[idxs].sum(axis=0)          # still a matrix
-        vec = _to_1d(sub)                  # now a flat ndarray
-        if vec.size == 0 or np.all(vec == 0):
-            label_term = members[0].keyword  # fallback
-        else:
-            top_idx = int(vec.argmax())
-            label_term = vectorizer.get_feature_names_out()[top_idx]
+    for row, lab in enumerate(first_seen):
+        idxs = groups[lab]
+        terms = _top_terms(weights, row, feature_names, label_terms)
 
         clusters.append(Cluster(
             cluster_id=f"c{lab}",
-            label=label_term,
-            members=members,
+            label=terms[0] if terms else batch.keyword[idxs[0]],  # fallback
+            label_terms=terms,
+            member_idx=idxs,
+            batch=batch,
             metrics=ClusterMetrics(),
         ))
     return clusters
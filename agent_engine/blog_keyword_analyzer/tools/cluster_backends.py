@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import HDBSCAN, AgglomerativeClustering, MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.neighbors import kneighbors_graph
+from sklearn.preprocessing import normalize
+
+from .embeddings import embed_keywords, embeddings_available
+
+logger = logging.getLogger(__name__)
+
+VECTORIZER_PARAMS = {"ngram_range": (1, 2), "min_df": 2}
+HASHING_PARAMS = {"ngram_range": (1, 2), "n_features": 2 ** 18, "alternate_sign": False, "norm": "l2"}
+CHAR_PARAMS = {"analyzer": "char_wb", "ngram_range": (3, 5), "min_df": 2}
+KMEANS_PARAMS = {"random_state": 42, "n_init": "auto", "batch_size": 2048}
+KNN_NEIGHBORS = 10
+HDBSCAN_PARAMS = {"min_cluster_size": 5, "copy": True}
+SVD_COMPONENTS = 100
+
+
+# -------------------------------------------------------------------
+# Vectorizers: keyword texts -> feature matrix
+# -------------------------------------------------------------------
+
+def _tfidf(texts: List[str], cache_dir: Optional[Path]):
+    return TfidfVectorizer(**VECTORIZER_PARAMS).fit_transform(texts)
+
+
+def _hashing(texts: List[str], cache_dir: Optional[Path]):
+    return HashingVectorizer(**HASHING_PARAMS).transform(texts)
+
+
+def _char(texts: List[str], cache_dir: Optional[Path]):
+    return TfidfVectorizer(**CHAR_PARAMS).fit_transform(texts)
+
+
+def _embedding(texts: List[str], cache_dir: Optional[Path]):
+    return embed_keywords(texts, cache_dir=cache_dir)
+
+
+VECTORIZERS: Dict[str, Callable[[List[str], Optional[Path]], object]] = {
+    "tfidf": _tfidf,
+    "hashing": _hashing,
+    "char": _char,
+    "embedding": _embedding,
+}
+
+
+def resolve_vectorizer(name: str) -> str:
+    """Validate `name`; "embedding" falls back to "tfidf" without sentence-transformers."""
+    if name not in VECTORIZERS:
+        raise ValueError(f"Unknown vectorizer '{name}'; expected one of {sorted(VECTORIZERS)}")
+    if name == "embedding" and not embeddings_available():
+        logger.warning("sentence-transformers is not installed; using the tfidf vectorizer instead.")
+        return "tfidf"
+    return name
+
+
+def vectorize(name: str, texts: List[str], embedding_cache_dir: Optional[Path] = None):
+    """Feature matrix for `texts` (sparse for n-gram vectorizers, dense for embeddings)."""
+    return VECTORIZERS[name](texts, embedding_cache_dir)
+
+
+def label_matrix(texts: List[str]):
+    """Word TF-IDF matrix and vocabulary used for cluster labels, whatever the vectorizer."""
+    vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+    X = vectorizer.fit_transform(texts)
+    return X, vectorizer.get_feature_names_out()
+
+
+# -------------------------------------------------------------------
+# Cluster backends: feature matrix (+ k) -> labels, -1 = noise
+# -------------------------------------------------------------------
+
+def _dense(X) -> np.ndarray:
+    """Dense, L2-normalized features; sparse input is reduced with TruncatedSVD first."""
+    if sparse.issparse(X):
+        # Hashed features are mostly empty columns; drop them before the SVD
+        X = X.tocsc()
+        X = X[:, np.flatnonzero(np.diff(X.indptr))].tocsr()
+        n_comp = min(SVD_COMPONENTS, X.shape[0] - 1, X.shape[1] - 1)
+        if n_comp < 1:
+            return normalize(X.toarray())
+        X = TruncatedSVD(n_components=n_comp, random_state=42).fit_transform(X)
+    return normalize(np.asarray(X, dtype=np.float64))
+
+
+def _minibatch_kmeans(X, k: int) -> np.ndarray:
+    return MiniBatchKMeans(n_clusters=k, **KMEANS_PARAMS).fit_predict(X)
+
+
+def _agglomerative_knn(X, k: int) -> np.ndarray:
+    Xd = _dense(X)
+    n_neighbors = min(KNN_NEIGHBORS, Xd.shape[0] - 1)
+    connectivity = kneighbors_graph(Xd, n_neighbors, include_self=False) if n_neighbors > 0 else None
+    return AgglomerativeClustering(
+        n_clusters=min(k, Xd.shape[0]), connectivity=connectivity, linkage="ward"
+    ).fit_predict(Xd)
+
+
+def _hdbscan(X, k: int) -> np.ndarray:
+    return HDBSCAN(**HDBSCAN_PARAMS).fit_predict(_dense(X))
+
+
+CLUSTER_BACKENDS: Dict[str, Callable[[object, int], np.ndarray]] = {
+    "minibatch_kmeans": _minibatch_kmeans,
+    "agglomerative_knn": _agglomerative_knn,
+    "hdbscan": _hdbscan,
+}
+
+# Backends that find the number of clusters themselves (k is ignored)
+SELF_SIZING_BACKENDS = ("hdbscan",)
+
+
+def fit_labels(backend: str, X, k: int) -> np.ndarray:
+    if backend not in CLUSTER_BACKENDS:
+        raise ValueError(f"Unknown cluster backend '{backend}'; expected one of {sorted(CLUSTER_BACKENDS)}")
+    return CLUSTER_BACKENDS[backend](X, k)
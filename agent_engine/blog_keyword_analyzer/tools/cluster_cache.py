@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+@dataclass
+class CachedClustering:
+    """Everything cluster_records needs to skip vectorizing and k-means."""
+
+    X: sparse.csr_matrix
+    feature_names: np.ndarray
+    labels: np.ndarray
+
+
+def cache_key(keywords: Sequence[str], params: Dict[str, Any]) -> str:
+    """
+    Hash of the normalized keyword list (in order) plus clustering parameters.
+
+    Order matters: MiniBatchKMeans results depend on row order.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps({"v": CACHE_VERSION, **params}, sort_keys=True, default=str).encode("utf-8"))
+    for kw in keywords:
+        h.update(b"\0")
+        h.update(kw.encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def _entry_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / f"{key}.npz"
+
+
+def load(cache_dir: Path, key: str) -> Optional[CachedClustering]:
+    path = _entry_path(cache_dir, key)
+    if not path.is_file():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            X = sparse.csr_matrix(
+                (z["data"], z["indices"], z["indptr"]), shape=tuple(z["shape"])
+            )
+            entry = CachedClustering(X=X, feature_names=z["feature_names"], labels=z["labels"])
+    except Exception as exc:
+        logger.warning("Ignoring unreadable cluster cache entry %s: %s", path, exc)
+        return None
+
+    # Bump mtime so eviction is least-recently-used, not least-recently-written
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry
+
+
+def store(cache_dir: Path, key: str, entry: CachedClustering, max_bytes: Optional[int] = None) -> Path:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = _entry_path(cache_dir, key)
+    X = entry.X.tocsr()
+
+    # Write to a temp file first so concurrent runs never read a partial entry
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                data=X.data,
+                indices=X.indices,
+                indptr=X.indptr,
+                shape=np.asarray(X.shape),
+                feature_names=np.asarray(entry.feature_names, dtype=str),
+                labels=np.asarray(entry.labels, dtype=np.int32),
+            )
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    if max_bytes is None:
+        max_bytes = settings.KRA_CLUSTER_CACHE_MAX_MB * 1024 * 1024
+    evict(cache_dir, max_bytes, keep=path)
+    return path
+
+
+def evict(cache_dir: Path, max_bytes: int, keep: Optional[Path] = None) -> int:
+    """
+    Delete least-recently-used entries until the cache fits in max_bytes.
+    Returns the number of removed entries.
+    """
+    entries = []
+    for p in cache_dir.glob("*.npz"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, p in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if keep is not None and p == keep:
+            continue
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logger.info("Cluster cache: evicted %d entries from %s", removed, cache_dir)
+    return removed
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from ..schemas import Cluster, ClusterMetrics
+from .cluster import _cluster_term_weights, _top_terms
+from .cluster_backends import HASHING_PARAMS, KMEANS_PARAMS, label_matrix
+from .k_search import search_k
+from .keyword_batch import KeywordBatch
+from .metrics import RunMetrics
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 2  # 2: plain .npz arrays instead of a pickle
+
+
+@dataclass
+class ClusterModel:
+    """
+    Persisted clustering for one brand/product, in HashingVectorizer space.
+
+    `sums[i]` is the summed (L2-normalized) vector of every keyword ever
+    assigned to cluster `ids[i]`; its direction is the centroid. Known
+    keywords (by 64-bit hash) keep their cluster on later runs.
+    """
+
+    ids: List[str]
+    sums: sparse.csr_matrix
+    counts: np.ndarray
+    next_id: int
+    known_hashes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint64))
+    known_rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def centroids(self) -> sparse.csr_matrix:
+        return normalize(self.sums)
+
+    def lookup(self, hashes: np.ndarray) -> np.ndarray:
+        """Model row of each hash, -1 for keywords not seen before."""
+        rows = np.full(hashes.size, -1, dtype=np.int64)
+        if not self.known_hashes.size:
+            return rows
+        pos = np.searchsorted(self.known_hashes, hashes)
+        pos[pos == self.known_hashes.size] = 0
+        found = self.known_hashes[pos] == hashes
+        rows[found] = self.known_rows[pos[found]]
+        return rows
+
+    def remember(self, hashes: np.ndarray, rows: np.ndarray) -> None:
+        all_h = np.concatenate([self.known_hashes, hashes])
+        all_r = np.concatenate([self.known_rows, rows])
+        all_h, first = np.unique(all_h, return_index=True)  # earlier assignment wins
+        self.known_hashes, self.known_rows = all_h, all_r[first]
+
+
+def _model_params() -> Dict[str, Any]:
+    return {"v": MODEL_VERSION, "hashing": HASHING_PARAMS}
+
+
+def load_model(path: Path) -> Optional[ClusterModel]:
+    """
+    Read a model written by `save_model`. The file holds plain arrays only
+    (no pickles), so loading one from a shared checkout runs no code.
+    """
+    if not path.is_file():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            if str(z["params"]) != json.dumps(_model_params(), sort_keys=True):
+                logger.warning("Cluster model %s was built with other parameters; starting a new one.", path)
+                return None
+            return ClusterModel(
+                ids=z["ids"].tolist(),
+                sums=sparse.csr_matrix(
+                    (z["sums_data"], z["sums_indices"], z["sums_indptr"]), shape=tuple(z["sums_shape"])
+                ),
+                counts=z["counts"],
+                next_id=int(z["next_id"]),
+                known_hashes=z["known_hashes"],
+                known_rows=z["known_rows"],
+                params=_model_params(),
+            )
+    except Exception as exc:
+        logger.warning("Ignoring unreadable cluster model %s: %s", path, exc)
+        return None
+
+
+def save_model(path: Path, model: ClusterModel) -> None:
+    """Write `model` as a compressed .npz of plain arrays (atomic replace)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    sums = model.sums.tocsr()
+    try:
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                params=np.array(json.dumps(model.params, sort_keys=True)),
+                ids=np.array(model.ids, dtype=str),
+                sums_data=sums.data,
+                sums_indices=sums.indices,
+                sums_indptr=sums.indptr,
+                sums_shape=np.array(sums.shape, dtype=np.int64),
+                counts=np.asarray(model.counts, dtype=np.int64),
+                next_id=np.array(model.next_id, dtype=np.int64),
+                known_hashes=np.asarray(model.known_hashes, dtype=np.uint64),
+                known_rows=np.asarray(model.known_rows, dtype=np.int64),
+            )
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _group_sums(X: sparse.csr_matrix, rows: np.ndarray, n_groups: int) -> sparse.csr_matrix:
+    n = X.shape[0]
+    indicator = sparse.csr_matrix(
+        (np.ones(n, dtype=np.float64), (rows, np.arange(n))), shape=(n_groups, n)
+    )
+    return (indicator @ X).tocsr()
+
+
+def _spawn(
+    model: ClusterModel,
+    X: sparse.csr_matrix,
+    k: int,
+) -> np.ndarray:
+    """Cluster X into k new model clusters; returns their model rows."""
+    k = max(1, min(k, X.shape[0]))
+    labels = (
+        MiniBatchKMeans(n_clusters=k, **KMEANS_PARAMS).fit_predict(X)
+        if k > 1 else np.zeros(X.shape[0], dtype=np.int64)
+    )
+    # Drop labels k-means left empty so every spawned cluster has members
+    used, labels = np.unique(labels, return_inverse=True)
+    base = len(model.ids)
+    model.ids.extend(f"c{model.next_id + i}" for i in range(used.size))
+    model.next_id += used.size
+    model.sums = sparse.vstack([model.sums, sparse.csr_matrix((used.size, X.shape[1]))]).tocsr()
+    model.counts = np.concatenate([model.counts, np.zeros(used.size, dtype=np.int64)])
+    return base + labels
+
+
+def incremental_cluster(
+    batch: KeywordBatch,
+    model_path: Path,
+    k: Optional[int] = None,
+    k_search: str = "elbow",
+    min_similarity: Optional[float] = None,
+    metrics: Optional[RunMetrics] = None,
+    label_terms: int = 5,
+    label_method: str = "tfidf",
+) -> List[Cluster]:
+    """
+    Cluster `batch` against the persisted model at `model_path`, then save it.
+
+    - keywords seen on an earlier run keep their cluster
+    - new keywords go to the nearest centroid (cosine) when the similarity
+      is at least `min_similarity`
+    - the remaining outliers are clustered among themselves into new
+      clusters with fresh IDs (`c{next_id}`, ...)
+
+    Without a model, every keyword is an outlier and k comes from `k` or
+    `search_k`. Centroids are updated with the new members. Returned
+    clusters only cover keywords in `batch`, in first-seen order.
+    """
+    if min_similarity is None:
+        min_similarity = settings.KRA_INCREMENTAL_MIN_SIMILARITY
+    texts = batch.keyword.tolist()
+    X = HashingVectorizer(**HASHING_PARAMS).transform(texts).tocsr()
+    hashes = pd.util.hash_array(batch.keyword)
+
+    model = load_model(model_path)
+    fresh = model is None
+    if model is None:
+        model = ClusterModel(
+            ids=[], sums=sparse.csr_matrix((0, X.shape[1])),
+            counts=np.empty(0, dtype=np.int64), next_id=0, params=_model_params(),
+        )
+
+    rows = model.lookup(hashes)
+    new = np.flatnonzero(rows < 0)
+    n_known = int(rows.size - new.size)
+
+    if new.size and model.ids:
+        sims = (X[new] @ model.centroids().T).toarray()
+        best = sims.argmax(axis=1)
+        ok = sims[np.arange(new.size), best] >= min_similarity
+        rows[new[ok]] = best[ok]
+        outliers = new[~ok]
+    else:
+        outliers = new
+    n_assigned = int(new.size - outliers.size)
+
+    n_before = len(model.ids)
+    if outliers.size:
+        if fresh:
+            if k:
+                k_new, method = k, "forced"
+            else:
+                found = search_k(
+                    X, method=k_search, volume=batch.values("volume"),
+                    time_budget_s=settings.KRA_K_SEARCH_MAX_SECONDS,
+                    n_jobs=settings.KRA_K_SEARCH_JOBS,
+                )
+                k_new, method = found.k, found.method
+        else:
+            # Match the model's average cluster size
+            avg_size = max(1.0, model.counts.sum() / max(1, len(model.ids)))
+            k_new, method = int(round(outliers.size / avg_size)), "incremental"
+        rows[outliers] = _spawn(model, X[outliers], k_new)
+    else:
+        method = "incremental"
+
+    # Only keywords new to the model move the centroids
+    if new.size:
+        model.sums = model.sums + _group_sums(X[new], rows[new], len(model.ids))
+        model.counts = model.counts + np.bincount(rows[new], minlength=len(model.ids))
+        model.remember(hashes[new], rows[new])
+    save_model(model_path, model)
+
+    spawned = len(model.ids) - n_before
+    if metrics is not None:
+        metrics.set_k_search(len(model.ids), method)
+        metrics.keywords_assigned_existing = n_known + n_assigned
+        metrics.clusters_spawned = spawned
+    logger.info(
+        "Incremental clustering: %d known, %d assigned to existing clusters, "
+        "%d outliers -> %d new clusters (%d total)",
+        n_known, n_assigned, outliers.size, spawned, len(model.ids),
+    )
+
+    # Clusters present in this batch, first-seen order
+    order = np.argsort(rows, kind="stable")
+    uniq, starts = np.unique(rows[order], return_index=True)
+    groups = dict(zip(uniq.tolist(), np.split(order, starts[1:])))
+    first_seen = sorted(groups, key=lambda r: groups[r][0])
+    pos = np.empty(len(model.ids), dtype=np.int64)
+    pos[first_seen] = np.arange(len(first_seen))
+
+    X_label, feature_names = label_matrix(texts)
+    weights = _cluster_term_weights(X_label, pos[rows], len(first_seen), method=label_method)
+
+    clusters: List[Cluster] = []
+    for i, r in enumerate(first_seen):
+        idxs = groups[r]
+        terms = _top_terms(weights, i, feature_names, label_terms)
+        clusters.append(Cluster(
+            cluster_id=model.ids[r],
+            label=terms[0] if terms else batch.keyword[idxs[0]],
+            label_terms=terms,
+            member_idx=idxs,
+            batch=batch,
+            metrics=ClusterMetrics(),
+        ))
+    return clusters
@@ -1,19 +1,33 @@
 from __future__ import annotations
 
+import logging
+import sqlite3
 from typing import List, Optional
 
 # adjust this import to match your actual package path
+from .content_service import query_content_service
 from .directory_search import search_from_directory
+from .index_builder import query_content_index, update_content_index
 
 from ..schemas import ExistingPost
 
+logger = logging.getLogger(__name__)
+
 
 def get_existing_posts(
     product: Optional[str] = None,
     platform: Optional[str] = None,
 ) -> List[ExistingPost]:
     """
-    Thin wrapper around Content Index Service directory search.
+    Existing posts, from the first source that answers:
+
+    1. the content index service (content_service) at
+       BLOG_INDEX_SERVICE_URL, which keeps the index in memory and up to
+       date while it runs
+    2. the persistent content index (index_builder), refreshed first: only
+       index.md files whose mtime/size changed since the last run are
+       re-parsed
+    3. a full directory search, if the index database cannot be used
 
     Both product and platform are optional, to match the CLI:
       python -m src.content_index_service.directory_search --product ... --platform ...
@@ -21,10 +35,17 @@ def get_existing_posts(
     If they are None, we just pass them through as None.
     """
 
-    raw_matches = search_from_directory(
-        product=product,
-        platform=platform,
-    )
+    raw_matches = query_content_service(product=product, platform=platform)
+    try:
+        if raw_matches is None:
+            update_content_index()
+            raw_matches = query_content_index(product=product, platform=platform)
+    except sqlite3.Error as exc:
+        logger.warning("Content index unavailable (%s); scanning the blog directory instead.", exc)
+        raw_matches = search_from_directory(
+            product=product,
+            platform=platform,
+        )
 
     posts: List[ExistingPost] = [
         ExistingPost(
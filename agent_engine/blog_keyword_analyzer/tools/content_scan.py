@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+from ..config import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+SCAN_MODES = ("process", "thread", "serial")
+
+# Below this many files a pool costs more than it saves
+PARALLEL_MIN_FILES = 256
+
+
+def scandir_files(root: Path, name: str = "index.md") -> List[Path]:
+    """
+    Every file called `name` under `root`, via os.scandir (no per-entry
+    stat on most platforms). Directories are walked in sorted order, so the
+    result is the same on every filesystem. Symlinked directories are not
+    followed.
+    """
+    found: List[Path] = []
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name == name and entry.is_file():
+                    found.append(Path(entry.path))
+            except OSError:
+                continue
+        # Reversed so the stack pops them in sorted (depth-first) order
+        stack.extend(reversed(subdirs))
+    return found
+
+
+def _executor(mode: str, workers: int) -> Executor:
+    if mode == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="content-scan")
+
+
+def map_batches(
+    func: Callable[[List[T]], List[R]],
+    items: Sequence[T],
+    mode: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+) -> List[R]:
+    """
+    `func` over `items` in batches, results flattened in input order.
+
+    `mode` (default BLOG_SCAN_MODE):
+      - "process": ProcessPoolExecutor, for CPU-bound YAML parsing on local
+        disks; `func` must be a module-level function
+      - "thread": ThreadPoolExecutor, for I/O-bound network mounts
+      - "serial": in this thread
+
+    Fewer than PARALLEL_MIN_FILES items always run serially.
+    """
+    mode = mode or settings.BLOG_SCAN_MODE
+    if mode not in SCAN_MODES:
+        raise ValueError(f"Unknown scan mode {mode!r}; expected one of {SCAN_MODES}")
+    if not (workers or settings.BLOG_SCAN_WORKERS):
+        cpus = os.cpu_count() or 1
+        # Threads mostly wait on I/O, so they are not bound by the CPU count
+        workers = max(8, cpus) if mode == "thread" else cpus
+    workers = workers or settings.BLOG_SCAN_WORKERS
+
+    if mode == "serial" or len(items) < PARALLEL_MIN_FILES or (mode == "process" and workers <= 1):
+        return func(list(items))
+
+    # At least ~4 batches per worker so a slow batch does not stall the pool
+    batch_size = max(1, min(batch_size, -(-len(items) // (workers * 4))))
+    batches = [list(items[i:i + batch_size]) for i in range(0, len(items), batch_size)]
+    out: List[R] = []
+    with _executor(mode, workers) as pool:
+        for result in pool.map(func, batches):
+            out.extend(result)
+    return out
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from ..config import settings
+from . import index_builder
+from .directory_search import platform_key
+from .index_builder import IndexUpdate, content_index_path, query_content_index, update_content_index
+from .index_search import BlogIndex
+
+logger = logging.getLogger(__name__)
+
+# Clients give up quickly: an unreachable service means "scan locally"
+SERVICE_TIMEOUT = 0.5
+
+
+def _content_root() -> Path:
+    return Path(settings.BLOG_CONTENT_ROOT).expanduser().resolve()
+
+
+class ContentIndexService:
+    """
+    The content index kept hot in memory for a long-lived process.
+
+    A watcher thread polls the content tree every `interval` seconds with
+    update_content_index (a stat pass; only changed index.md files are
+    re-parsed) and swaps in a fresh BlogIndex when posts were added,
+    changed or removed. Queries are dictionary lookups; their JSON bodies
+    are cached until the next swap.
+    """
+
+    def __init__(self, content_root: Optional[Path] = None, db_path: Optional[Path] = None, interval: float = 2.0):
+        self.content_root = (content_root or _content_root()).expanduser().resolve()
+        self.db_path = db_path or content_index_path()
+        self.interval = interval
+        self.generation = 0
+        self.last_update = IndexUpdate()
+        self.updated_at = 0.0
+        self._index = BlogIndex.build([])
+        self._responses: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def refresh(self, force: bool = False) -> IndexUpdate:
+        update = update_content_index(self.content_root, self.db_path)
+        if force or update.parsed or update.removed or update.failed:
+            index = BlogIndex.build(query_content_index(db_path=self.db_path))
+            with self._lock:
+                self._index = index
+                self._responses = {}
+                self.generation += 1
+            logger.info(
+                "Content index service: %d posts (generation %d; %d parsed, %d removed, %d invalid in %.3fs)",
+                len(index.entries), self.generation, update.parsed, update.removed, update.failed, update.seconds,
+            )
+        self.last_update = update
+        self.updated_at = time.time()
+        return update
+
+    def posts(self, product: Optional[str] = None, platform: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Same result as query_content_index(product, platform), from memory."""
+        index = self._index
+        if product:
+            return index.search(product, platform)
+        if platform:
+            key = platform_key(platform)
+            return [e for e in index.entries if key in (platform_key(f) for f in e.get("platforms") or [])]
+        return list(index.entries)
+
+    def posts_json(self, product: Optional[str], platform: Optional[str]) -> bytes:
+        key = (product or "", platform or "")
+        with self._lock:
+            body = self._responses.get(key)
+            generation = self.generation
+        if body is None:
+            body = json.dumps({
+                "root": str(self.content_root),
+                "generation": generation,
+                "posts": self.posts(product, platform),
+            }, ensure_ascii=False, default=str).encode("utf-8")
+            with self._lock:
+                if generation == self.generation:
+                    self._responses[key] = body
+        return body
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.content_root),
+            "posts": len(self._index.entries),
+            "generation": self.generation,
+            "updated_at": self.updated_at,
+            "last_update": asdict(self.last_update),
+        }
+
+    def watch(self) -> None:
+        """Poll until stop(); errors are logged and retried next round."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as exc:  # noqa: BLE001 - keep serving the last good index
+                logger.warning("Content index refresh failed: %s", exc)
+
+    def start_watcher(self) -> threading.Thread:
+        thread = threading.Thread(target=self.watch, name="content-index-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def make_handler(service: ContentIndexService):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            url = urllib.parse.urlsplit(self.path)
+            params = dict(urllib.parse.parse_qsl(url.query))
+            route = url.path.rstrip("/")
+            if route == "/posts":
+                body = service.posts_json(params.get("product") or None, params.get("platform") or None)
+            elif route == "/health":
+                body = json.dumps(service.health()).encode("utf-8")
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return Handler
+
+
+@lru_cache(maxsize=1)
+def _client() -> httpx.Client:
+    # One client per process: building one (SSL context included) costs more than a query
+    return httpx.Client(timeout=SERVICE_TIMEOUT, trust_env=False)
+
+
+def query_content_service(
+    product: Optional[str] = None,
+    platform: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Posts from the content index service at BLOG_INDEX_SERVICE_URL, or None
+    when it is disabled (empty URL), unreachable, or watching a different
+    content root than BLOG_CONTENT_ROOT.
+    """
+    base_url = settings.BLOG_INDEX_SERVICE_URL
+    if not base_url:
+        return None
+    params = {k: v for k, v in (("product", product), ("platform", platform)) if v}
+    try:
+        resp = _client().get(f"{base_url.rstrip('/')}/posts", params=params)
+        resp.raise_for_status()
+        data = resp.json()
+    except (httpx.HTTPError, ValueError) as exc:
+        logger.debug("Content index service not reachable at %s (%s)", base_url, exc)
+        return None
+
+    if not isinstance(data, dict) or not isinstance(data.get("posts", []), list):
+        logger.warning("Content index service at %s sent an unexpected response; ignoring it.", base_url)
+        return None
+    if data.get("root") != str(_content_root()):
+        logger.warning(
+            "Content index service at %s watches %s, not %s; ignoring it.",
+            base_url, data.get("root"), _content_root(),
+        )
+        return None
+    return data.get("posts") or []
+
+
+def main() -> None:
+    """
+    Run the content index service.
+
+    Usage (from project root):
+
+        python -m agent_engine.blog_keyword_analyzer.tools.content_service
+        python -m agent_engine.blog_keyword_analyzer.tools.content_service --port 8766 --interval 5
+
+    GET /posts?product=cells&platform=python -> {"root", "generation", "posts"}
+    GET /health                               -> post count and last update stats
+    """
+    default = urllib.parse.urlsplit(settings.BLOG_INDEX_SERVICE_URL or "http://127.0.0.1:8766")
+    parser = argparse.ArgumentParser(description="Serve the blog content index and keep it up to date.")
+    parser.add_argument("--host", default=default.hostname or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=default.port or 8766)
+    parser.add_argument(
+        "--interval", type=float, default=settings.BLOG_INDEX_WATCH_SECONDS,
+        help="Seconds between content tree polls.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # update_content_index logs every poll; the service logs only changes
+    logging.getLogger(index_builder.__name__).setLevel(logging.WARNING)
+
+    service = ContentIndexService(interval=args.interval)
+    update = service.refresh(force=True)
+    print(f"📂 Watching {service.content_root}: {len(service.posts())} posts ({update.seconds:.3f} s)")
+    service.start_watcher()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🚀 Content index service on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,23 @@ import argparse
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import yaml  # pip install pyyaml
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..config import settings, platform_PATTERNS
-
-
-class FrontMatterError(Exception):
-    """Custom exception for front matter parsing issues."""
-    pass
+from .content_scan import map_batches, scandir_files
+from .front_matter import FrontMatterError, read_front_matter
 
 
 # -------------------------------------------------------------------
 # platform detection
 # -------------------------------------------------------------------
 
+def platform_key(platform: Any) -> str:
+    """Platform name as compared by every search path: lowercase, "c#" / "c-sharp" -> "csharp"."""
+    platform_norm = str(platform).lower().strip()
+    return "csharp" if platform_norm in {"c#", "c-sharp"} else platform_norm
+
+
 def detect_platforms_from_front_matter(fm: Dict[str, Any]) -> List[str]:
     chunks: List[str] = []
 
@@ -92,48 +93,9 @@ def _date_sort_key(value: Any) -> float:
 
 
 # -------------------------------------------------------------------
-# Front matter parsing & metadata from filesystem
+# Metadata from filesystem
 # -------------------------------------------------------------------
 
-def read_front_matter(md_path: Path) -> Dict[str, Any]:
-    text = md_path.read_text(encoding="utf-8")
-
-    if not text.lstrip().startswith("---"):
-        raise FrontMatterError(f"No front matter starting with '---' in {md_path}")
-
-    lines = text.splitlines()
-    if not lines:
-        raise FrontMatterError(f"Empty file: {md_path}")
-
-    start_idx: Optional[int] = None
-    end_idx: Optional[int] = None
-
-    for idx, line in enumerate(lines):
-        if line.strip() == "---":
-            if start_idx is None:
-                start_idx = idx
-            else:
-                end_idx = idx
-                break
-
-    if start_idx is None or end_idx is None or end_idx <= start_idx:
-        raise FrontMatterError(f"Could not find closing '---' for front matter in {md_path}")
-
-    yaml_block = "\n".join(lines[start_idx + 1 : end_idx])
-
-    try:
-        data = yaml.safe_load(yaml_block) or {}
-        if not isinstance(data, dict):
-            raise FrontMatterError(f"Front matter is not a mapping in {md_path}")
-    except yaml.YAMLError as exc:
-        raise FrontMatterError(f"YAML parsing error in {md_path}: {exc}") from exc
-
-    if "date" in data:
-        data["date"] = str(data["date"])
-
-    return data
-
-
 def derive_metadata(md_path: Path, content_root: Path) -> Dict[str, Any]:
     slug = md_path.parent.name
 
@@ -155,6 +117,29 @@ def derive_metadata(md_path: Path, content_root: Path) -> Dict[str, Any]:
     }
 
 
+def _read_entries(batch: List[Tuple[str, str]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Scan worker: (path, content_root) -> (entry, error). Module-level for process pools."""
+    out: List[Tuple[Optional[Dict[str, Any]], Optional[str]]] = []
+    for path, root in batch:
+        md_path = Path(path)
+        try:
+            fm = read_front_matter(md_path)
+        except (FrontMatterError, OSError, UnicodeDecodeError) as exc:
+            out.append((None, str(exc)))
+            continue
+        platforms = detect_platforms_from_front_matter(fm)
+        out.append((
+            {
+                **derive_metadata(md_path, Path(root)),
+                **fm,
+                "platforms": platforms,
+                "primary_platform": platforms[0] if platforms else None,
+            },
+            None,
+        ))
+    return out
+
+
 # -------------------------------------------------------------------
 # Search directly from directory
 # -------------------------------------------------------------------
@@ -172,42 +157,34 @@ def search_from_directory(
     if not content_root.exists():
         raise FileNotFoundError(f"Blog content root does not exist: {content_root}")
 
-    index_files = list(content_root.rglob("index.md"))
+    index_files = scandir_files(content_root)
     if settings.DEBUG:
         print(f"DEBUG: Found {len(index_files)} index.md files under {content_root}")
 
     product_norm = product.lower().strip()
-    platform_norm = platform.lower().strip() if platform else None
+    platform_norm = platform_key(platform) if platform else None
+
+    # Product comes from the path, so other products' posts are never opened
+    candidates = [
+        md_path for md_path in index_files
+        if (derive_metadata(md_path, content_root).get("product") or "").lower().strip() == product_norm
+    ]
+    # Front matter is parsed in parallel (BLOG_SCAN_MODE), results in file order
+    parsed = map_batches(_read_entries, [(str(p), str(content_root)) for p in candidates])
 
     results: List[Dict[str, Any]] = []
 
-    for md_path in index_files:
-        try:
-            fm = read_front_matter(md_path)
-        except FrontMatterError as exc:
+    for md_path, (entry, error) in zip(candidates, parsed):
+        if entry is None:
             if settings.DEBUG:
-                print(f"[WARN] Skipping {md_path}: {exc}")
+                print(f"[WARN] Skipping {md_path}: {error}")
             continue
 
-        meta = derive_metadata(md_path, content_root)
-        entry_product = (meta.get("product") or "").lower().strip()
-        if entry_product != product_norm:
-            continue
-
-        platforms = detect_platforms_from_front_matter(fm)
-        primary_platform: Optional[str] = platforms[0] if platforms else None
-
         if platform_norm:
-            platforms_norm = [f.lower().strip() for f in platforms]
+            platforms_norm = [platform_key(f) for f in entry["platforms"]]
             if platform_norm not in platforms_norm:
                 continue
 
-        entry: Dict[str, Any] = {
-            **meta,
-            **fm,
-            "platforms": platforms,
-            "primary_platform": primary_platform,
-        }
         results.append(entry)
 
     # 🔽 Sort ascending by date (oldest first)
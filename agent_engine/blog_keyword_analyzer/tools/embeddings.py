@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_MODELS: Dict[str, object] = {}
+
+
+def embeddings_available() -> bool:
+    """True when the optional sentence-transformers package is installed."""
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _load_model(name: str):
+    if name not in _MODELS:
+        from sentence_transformers import SentenceTransformer
+
+        _MODELS[name] = SentenceTransformer(name, device="cpu")
+    return _MODELS[name]
+
+
+def _model_dir(cache_dir: Path, model: str) -> Path:
+    return cache_dir / hashlib.sha1(model.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_cached(model_dir: Path) -> Dict[str, np.ndarray]:
+    """All cached vectors for one model, keyword -> vector."""
+    cached: Dict[str, np.ndarray] = {}
+    if not model_dir.is_dir():
+        return cached
+    for path in sorted(model_dir.glob("*.npz")):
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                cached.update(zip(z["keywords"].tolist(), z["vectors"]))
+        except Exception as exc:
+            logger.warning("Ignoring unreadable embedding shard %s: %s", path, exc)
+    return cached
+
+
+def _store_shard(model_dir: Path, keywords: List[str], vectors: np.ndarray) -> Path:
+    model_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=model_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, keywords=np.asarray(keywords, dtype=str), vectors=vectors.astype(np.float32))
+        shard = model_dir / f"{int(time.time() * 1000)}_{os.getpid()}.npz"
+        os.replace(tmp, shard)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return shard
+
+
+def _shards_oldest_first(cache_dir: Path) -> List[Tuple[float, int, Path]]:
+    """(mtime, size, path) of every shard of every model under cache_dir."""
+    out = []
+    for path in cache_dir.glob("*/*.npz"):
+        try:
+            st = path.stat()
+        except OSError:  # removed by a concurrent run
+            continue
+        out.append((st.st_mtime, st.st_size, path))
+    return sorted(out)
+
+
+def _enforce_cache_cap(
+    cache_dir: Path,
+    model_dir: Path,
+    keywords: Sequence[str],
+    cached: Dict[str, np.ndarray],
+    max_bytes: int,
+) -> None:
+    """
+    Keep the cache under `max_bytes`: this model's shards are compacted into
+    one shard holding only the current keywords, then the oldest shards (of
+    any model) are removed until the cache fits. The newest shard is always
+    kept.
+    """
+    shards = _shards_oldest_first(cache_dir)
+    if max_bytes <= 0 or sum(size for _, size, _ in shards) <= max_bytes:
+        return
+    used = list(dict.fromkeys(keywords))
+    kept = _store_shard(model_dir, used, np.vstack([cached[kw] for kw in used]))
+    for _, _, path in shards:
+        if path.parent == model_dir:
+            path.unlink(missing_ok=True)
+
+    shards = [s for s in _shards_oldest_first(cache_dir) if s[2] != kept]
+    total = sum(size for _, size, _ in shards) + kept.stat().st_size
+    removed = 0
+    for _, size, path in shards:
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    logger.info(
+        "Embedding cache over %d MB: compacted %s to %d keywords, removed %d old shards",
+        max_bytes // (1024 * 1024), model_dir.name, len(used), removed,
+    )
+
+
+def embed_keywords(
+    keywords: Sequence[str],
+    model: Optional[str] = None,
+    cache_dir: Optional[Path] = None,
+    batch_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    L2-normalized sentence embeddings, one row per keyword.
+
+    With `cache_dir`, vectors are cached per keyword and model: each run
+    writes one shard holding only the keywords it had to embed, so re-runs
+    only embed keywords not seen before. Once the cache exceeds
+    KRA_EMBEDDING_CACHE_MAX_MB it is cut back to the keywords of the current
+    call plus the newest shards that fit.
+    """
+    model = model or settings.KRA_EMBEDDING_MODEL
+    batch_size = batch_size or settings.KRA_EMBEDDING_BATCH_SIZE
+
+    model_dir = _model_dir(cache_dir, model) if cache_dir is not None else None
+    cached = _load_cached(model_dir) if model_dir is not None else {}
+    missing = list(dict.fromkeys(kw for kw in keywords if kw not in cached))
+
+    if missing:
+        encoder = _load_model(model)
+        t0 = time.perf_counter()
+        vectors = np.asarray(
+            encoder.encode(missing, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False),
+            dtype=np.float32,
+        )
+        logger.info(
+            "Embedded %d new keywords (%d cached) with %s in %.2fs",
+            len(missing), len(keywords) - len(missing), model, time.perf_counter() - t0,
+        )
+        cached.update(zip(missing, vectors))
+        if model_dir is not None:
+            _store_shard(model_dir, missing, vectors)
+            _enforce_cache_cap(
+                cache_dir, model_dir, keywords, cached, settings.KRA_EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+            )
+
+    if not keywords:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.vstack([cached[kw] for kw in keywords])
@@ -1,9 +1,12 @@
 # src/agents/kra/tools/file_import.py
 from __future__ import annotations
 import os, re
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 from ..schemas import RunRequest, KeywordRecord
+from .keyword_batch import KeywordBatch
 from ..config import settings
 from pathlib import Path
 
@@ -40,13 +43,9 @@ def _clean_number(val) -> Optional[float]:
         return None
 
 # --- add these helpers above import_file() ---
-def _read_table_resilient(path: str) -> pd.DataFrame:
+def _sniff_table(path: str) -> tuple[bool, List[str]]:
     """
-    Robustly read keyword table from path that might be:
-    - XLSX (zip magic "PK\x03\x04")
-    - XLS (OLE CF "D0 CF 11 E0")
-    - CSV with various encodings (utf-8, utf-16, etc.)
-    - CSV saved with wrong extension (.xlsx renamed to .csv)
+    Return (is_excel, CSV encodings to try in order) for `path`.
     """
     p = Path(path)
     # Read a few bytes to sniff magic / BOM
@@ -60,18 +59,32 @@ def _read_table_resilient(path: str) -> pd.DataFrame:
     bom_utf16_be = head.startswith(b"\xfe\xff")
 
     # If magic says Excel, use read_excel regardless of extension
-    if is_xlsx or is_xls or p.suffix.lower() in {".xlsx", ".xls"}:
-        return pd.read_excel(p)  # engine auto-detected
+    is_excel = is_xlsx or is_xls or p.suffix.lower() in {".xlsx", ".xls"}
 
     # Otherwise treat as text/CSV; try encodings
-    # sep=None + engine='python' lets pandas sniff delimiter (, ; \t)
     encodings = ["utf-8", "utf-8-sig", "utf-16", "utf-16le", "utf-16be", "latin1"]
     # Prioritize utf-16 if BOM says so
     if bom_utf16_le:
         encodings = ["utf-16", "utf-16le", "utf-16be", "utf-8", "utf-8-sig", "latin1"]
     if bom_utf16_be:
         encodings = ["utf-16", "utf-16be", "utf-16le", "utf-8", "utf-8-sig", "latin1"]
+    return is_excel, encodings
+
 
+def _read_table_resilient(path: str) -> pd.DataFrame:
+    """
+    Robustly read keyword table from path that might be:
+    - XLSX (zip magic "PK\x03\x04")
+    - XLS (OLE CF "D0 CF 11 E0")
+    - CSV with various encodings (utf-8, utf-16, etc.)
+    - CSV saved with wrong extension (.xlsx renamed to .csv)
+    """
+    p = Path(path)
+    is_excel, encodings = _sniff_table(path)
+    if is_excel:
+        return pd.read_excel(p)  # engine auto-detected
+
+    # sep=None + engine='python' lets pandas sniff delimiter (, ; \t)
     last_err = None
     for enc in encodings:
         try:
@@ -90,11 +103,47 @@ def _read_table_resilient(path: str) -> pd.DataFrame:
     # If we reach here, all attempts failed
     raise ValueError(f"Could not read file as CSV with common encodings; last error: {last_err}")
 
+
 # --- inside import_file(), replace the current load block with this ---
     # --- load (robust) ---
     df = _read_table_resilient(path)
     df.columns = [c.strip().lower() for c in df.columns]
 
+
+def _read_table_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Chunked variant of `_read_table_resilient`.
+
+    CSV files are streamed with `pd.read_csv(chunksize=...)`; the encoding is
+    chosen by the first chunk that parses. Excel files cannot be streamed and
+    are read whole, then sliced.
+    """
+    p = Path(path)
+    is_excel, encodings = _sniff_table(path)
+    if is_excel:
+        df = pd.read_excel(p)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+        return
+
+    last_err = None
+    for enc in encodings:
+        try:
+            reader = pd.read_csv(
+                p, skiprows=2, encoding=enc, sep=None, engine="python", chunksize=chunk_size
+            )
+            first = next(reader)
+        except StopIteration:
+            return
+        except Exception as e:
+            last_err = e
+            continue
+        yield first
+        yield from reader
+        return
+    raise ValueError(f"Could not read file as CSV with common encodings; last error: {last_err}")
+
+
 COMP_MAP = {
     "low": 0.2,
     "medium": 0.6,
@@ -126,8 +175,40 @@ def _parse_competition(value) -> tuple[Optional[float], Optional[str]]:
     return float(num), None               # already 0..1
 
 
-def import_file(req: RunRequest) -> List[KeywordRecord]:
-    # --- resolve path (use your existing robust search or pass absolute) ---
+# --- header mapping: broaden aliases ---
+HEADER_ALIASES: Dict[str, set[str]] = {
+    "keyword": {"keyword", "query", "search term", "term"},
+    "volume": {
+        "volume", "search_volume", "avg_monthly_searches", "search volume",
+        "search volume (avg)", "avg. monthly searches"
+    },
+    "cpc": {"cpc", "avg_cpc", "cost_per_click", "cpc (usd)", "avg. cpc"},
+    "kd": {
+        "kd", "difficulty", "keyword_difficulty", "keyword difficulty",
+        "difficulty (%)", "kd (%)"
+    },
+    "clicks": {"clicks", "est_clicks", "estimated clicks"},
+    "url": {"url", "target_url", "landing_page", "top url"},
+    "competition": {
+        "competition", "comp", "ad_competition", "competition_index",
+        "competition (gkp)", "comp. index", "competitive density"
+    },
+    "competition_text": {
+        "competition level", "comp level", "ad competition", "comp_text",
+        "competition_text"
+    },
+}
+
+NA_TOKENS = {"na", "n/a", "-", "none"}
+
+# Column layout produced by the vectorized importer (one row per keyword).
+FRAME_COLUMNS = [
+    "keyword", "volume", "cpc", "kd", "clicks", "url",
+    "competition", "competition_label",
+]
+
+
+def _resolve_input_path(req: RunRequest) -> str:
     path = req.file_path
     if not path or not os.path.exists(path):
         for p in (
@@ -141,38 +222,14 @@ def import_file(req: RunRequest) -> List[KeywordRecord]:
                 break
     if not path or not os.path.exists(path):
         raise FileNotFoundError(f"Input file not found: {req.file_path}")
+    return path
 
-    # --- load ---
-    # df = pd.read_excel(path) if path.lower().endswith(".xlsx") else pd.read_csv(path)
-    # df.columns = [c.strip().lower() for c in df.columns]
-
-    df = _read_table_resilient(path)
-    df.columns = [c.strip().lower() for c in df.columns]
-
-    # --- header mapping: broaden aliases ---
-    aliases = {
-        "keyword": {"keyword", "query", "search term", "term"},
-        "volume": {
-            "volume", "search_volume", "avg_monthly_searches", "search volume",
-            "search volume (avg)", "avg. monthly searches"
-        },
-        "cpc": {"cpc", "avg_cpc", "cost_per_click", "cpc (usd)", "avg. cpc"},
-        "kd": {
-            "kd", "difficulty", "keyword_difficulty", "keyword difficulty",
-            "difficulty (%)", "kd (%)"
-        },
-        "clicks": {"clicks", "est_clicks", "estimated clicks"},
-        "url": {"url", "target_url", "landing_page", "top url"},
-        "competition": {
-            "competition", "comp", "ad_competition", "competition_index",
-            "competition (gkp)", "comp. index", "competitive density"
-        },
-        "competition_text": {
-            "competition level", "comp level", "ad competition", "comp_text",
-            "competition_text"
-        },
-    }
 
+def _map_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """
+    Resolve our canonical field names to the actual (lowercased) headers in df.
+    Raises ValueError when no keyword column is present.
+    """
     def find_col(cands: set[str]) -> Optional[str]:
         for name in df.columns:
             if name in cands:
@@ -180,19 +237,170 @@ def import_file(req: RunRequest) -> List[KeywordRecord]:
         return None
 
     col_map: Dict[str, Optional[str]] = {
-        k: find_col(v) for k, v in aliases.items()
+        k: find_col(v) for k, v in HEADER_ALIASES.items()
     }
-    # allow either numeric competition OR text competition source
-    comp_col = col_map.get("competition")
-    comp_txt_col = col_map.get("competition_text")
-
     if not col_map["keyword"]:
         raise ValueError(
             "No 'keyword' column found. "
             f"Seen headers: {', '.join(df.columns[:20])}"
         )
+    return col_map
 
-    df = df.iloc[: req.max_rows].copy()
+
+# -------------------------------------------------------------------
+# Vectorized (whole-column) cleaning
+# -------------------------------------------------------------------
+
+def _clean_number_column(col: pd.Series) -> pd.Series:
+    """
+    Column-wise equivalent of `_clean_number`.
+
+    Returns a float64 Series where NaN marks values `_clean_number` maps to None.
+    """
+    if is_bool_dtype(col) or is_numeric_dtype(col):
+        return col.astype("float64")
+
+    # Real numbers stored in an object column keep the float(val) path;
+    # everything else goes through str(val) like the scalar helper.
+    is_num = col.map(lambda v: v is None or isinstance(v, (int, float)))
+    out = pd.to_numeric(col.where(is_num), errors="coerce").astype("float64")
+
+    text_mask = ~is_num
+    if not text_mask.any():
+        return out
+
+    text = col[text_mask].astype(str).str.strip()
+    text = text.mask((text == "") | text.str.lower().isin(NA_TOKENS))
+
+    token = text.str.extract(f"({NUM_RX.pattern})", expand=False)
+    has_comma = token.str.contains(",", regex=False, na=False)
+    has_dot = token.str.contains(".", regex=False, na=False)
+    european = has_comma & has_dot & (token.str.rfind(",") > token.str.rfind("."))
+
+    token = token.where(
+        ~european,
+        token.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+    token = token.where(european, token.str.replace(",", "", regex=False))
+
+    # float() rejects tokens like "1.2.3"; mirror that instead of raising
+    token = token.where(token.str.count(r"\.") <= 1)
+    out.loc[text_mask] = token.astype(object).astype("float64")
+    return out
+
+
+def _parse_competition_column(col: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Column-wise equivalent of `_parse_competition`.
+
+    Returns (competition float64 with NaN for None, label object Series with None).
+    """
+    label = pd.Series(None, index=col.index, dtype=object)
+    if is_bool_dtype(col) or is_numeric_dtype(col):
+        return col.astype("float64"), label
+
+    missing = col.map(lambda v: v is None or (isinstance(v, float) and pd.isna(v)))
+    text = col.astype(str).str.strip().str.lower()
+    is_label = text.isin(COMP_MAP) & ~missing
+
+    value = _clean_number_column(col)
+    value = value.where(~is_label, text.map(COMP_MAP).astype("float64"))
+    value = value.where(~missing)
+    label.loc[is_label] = text[is_label]
+    return value, label
+
+
+def _import_columns(
+    df: pd.DataFrame,
+    col_map: Dict[str, Optional[str]],
+) -> pd.DataFrame:
+    """
+    Clean a raw keyword table into FRAME_COLUMNS using whole-column operations.
+
+    Keywords are normalized and deduplicated (first occurrence wins); numeric
+    columns are float64 with NaN for missing values.
+    """
+    n = len(df)
+    nan = pd.Series(np.nan, index=df.index, dtype="float64")
+
+    keyword = df[col_map["keyword"]].astype(str).str.strip().str.lower()
+
+    def numeric(field: str) -> pd.Series:
+        name = col_map[field]
+        return _clean_number_column(df[name]) if name else nan
+
+    url = pd.Series(None, index=df.index, dtype=object)
+    if col_map["url"]:
+        raw = df[col_map["url"]]
+        present = raw.notna()
+        url_txt = raw[present].astype(str).str.strip()
+        url.loc[present] = url_txt.where(url_txt != "", None)
+
+    comp_src = col_map.get("competition_text") or col_map.get("competition")
+    if comp_src:
+        competition, comp_label = _parse_competition_column(df[comp_src])
+    else:
+        competition, comp_label = nan, pd.Series(None, index=df.index, dtype=object)
+
+    frame = pd.DataFrame(
+        {
+            "keyword": keyword,
+            # volume is stored as an integer in KeywordRecord (int() truncates)
+            "volume": np.trunc(numeric("volume")) if n else nan,
+            "cpc": numeric("cpc"),
+            "kd": numeric("kd"),
+            "clicks": numeric("clicks"),
+            "url": url,
+            "competition": competition,
+            "competition_label": comp_label,
+        },
+        columns=FRAME_COLUMNS,
+    )
+    frame = frame[frame["keyword"] != ""]
+    frame = frame.drop_duplicates(subset="keyword", keep="first")
+    return frame.reset_index(drop=True)
+
+
+def _records_from_frame(frame: pd.DataFrame, req: RunRequest) -> List[KeywordRecord]:
+    """
+    Materialize KeywordRecord objects from a cleaned frame (see `_import_columns`).
+    """
+    def opt_float(v) -> Optional[float]:
+        return None if pd.isna(v) else float(v)
+
+    def opt_str(v) -> Optional[str]:
+        return v if isinstance(v, str) and v else None
+
+    out: List[KeywordRecord] = []
+    for kw, vol, cpc, kd, clicks, url, comp, comp_label in zip(
+        *(frame[c].tolist() for c in FRAME_COLUMNS)
+    ):
+        out.append(KeywordRecord(
+            keyword=kw,
+            source="upload",
+            locale=req.locale,
+            volume=None if pd.isna(vol) else int(vol),
+            cpc=opt_float(cpc),
+            kd=opt_float(kd),
+            clicks=opt_float(clicks),
+            url=opt_str(url),
+            competition=opt_float(comp),
+            competition_label=opt_str(comp_label),
+        ))
+    return out
+
+
+def _import_rows(
+    df: pd.DataFrame,
+    col_map: Dict[str, Optional[str]],
+    req: RunRequest,
+) -> List[KeywordRecord]:
+    """
+    Original per-row importer (kept as `import_mode="rows"` for comparison).
+    """
+    # allow either numeric competition OR text competition source
+    comp_col = col_map.get("competition")
+    comp_txt_col = col_map.get("competition_text")
 
     out: List[KeywordRecord] = []
     for _, row in df.iterrows():
@@ -232,3 +440,76 @@ def import_file(req: RunRequest) -> List[KeywordRecord]:
             seen.add(r.keyword)
             dedup.append(r)
     return dedup
+
+
+def load_keyword_table(req: RunRequest) -> tuple[pd.DataFrame, Dict[str, Optional[str]]]:
+    """
+    Resolve, read and header-map the keyword file, truncated to `req.max_rows`.
+    """
+    path = _resolve_input_path(req)
+
+    df = _read_table_resilient(path)
+    df.columns = [c.strip().lower() for c in df.columns]
+    col_map = _map_columns(df)
+
+    df = df.iloc[: req.max_rows].copy()
+    return df, col_map
+
+
+def import_file(req: RunRequest) -> List[KeywordRecord]:
+    """
+    Import a keyword file into KeywordRecord objects.
+
+    `req.import_mode` selects the implementation:
+      - "vectorized" (default): whole-column pandas cleaning, records built at the end
+      - "rows": original per-row iterrows() path
+    Both produce identical records.
+    """
+    df, col_map = load_keyword_table(req)
+
+    if req.import_mode == "rows":
+        return _import_rows(df, col_map, req)
+    return _records_from_frame(_import_columns(df, col_map), req)
+
+
+def import_batch(req: RunRequest) -> KeywordBatch:
+    """
+    Import a keyword file straight into a columnar KeywordBatch.
+
+    The vectorized path never builds KeywordRecord objects.
+    """
+    df, col_map = load_keyword_table(req)
+
+    if req.import_mode == "rows":
+        return KeywordBatch.from_records(_import_rows(df, col_map, req))
+    return KeywordBatch.from_frame(_import_columns(df, col_map), source="upload", locale=req.locale)
+
+
+def iter_keyword_batches(req: RunRequest, chunk_size: int) -> Iterator[KeywordBatch]:
+    """
+    Stream a keyword file as cleaned KeywordBatch chunks of up to `chunk_size` rows.
+
+    Headers are mapped on the first chunk. Keywords are deduplicated across
+    chunks (first occurrence wins) by keeping a sorted array of 64-bit keyword
+    hashes, 8 bytes per distinct keyword. `req.max_rows` is not applied.
+    """
+    path = _resolve_input_path(req)
+    col_map: Optional[Dict[str, Optional[str]]] = None
+    seen = np.empty(0, dtype=np.uint64)
+
+    for chunk in _read_table_chunks(path, chunk_size):
+        chunk.columns = [c.strip().lower() for c in chunk.columns]
+        if col_map is None:
+            col_map = _map_columns(chunk)
+        frame = _import_columns(chunk, col_map)
+        if frame.empty:
+            continue
+
+        hashes = pd.util.hash_array(frame["keyword"].to_numpy(dtype=object))
+        new = ~np.isin(hashes, seen, assume_unique=True)
+        if not new.all():
+            frame = frame[new].reset_index(drop=True)
+            hashes = hashes[new]
+        seen = np.union1d(seen, hashes)
+        if not frame.empty:
+            yield KeywordBatch.from_frame(frame, source="upload", locale=req.locale)
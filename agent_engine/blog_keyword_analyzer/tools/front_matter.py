@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+import yaml  # pip install pyyaml
+
+# libyaml's C loader when PyYAML was built with it, ~10x faster
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class FrontMatterError(Exception):
+    """Custom exception for front matter parsing issues."""
+    pass
+
+
+def _front_matter_lines(lines: Iterable[str], md_path: Path) -> str:
+    """
+    The YAML between the first two `---` lines, consuming `lines` only up
+    to the closing delimiter. Leading blank lines are allowed.
+    """
+    block = []
+    opened = False
+    started = False
+    for line in lines:
+        stripped = line.strip()
+        if not opened:
+            if not started:
+                if not stripped:
+                    continue
+                if not line.lstrip().startswith("---"):
+                    break
+                started = True
+            opened = stripped == "---"
+            continue
+        if stripped == "---":
+            return "".join(block)
+        block.append(line)
+
+    if not started:
+        raise FrontMatterError(f"No front matter starting with '---' in {md_path}")
+    raise FrontMatterError(f"Could not find closing '---' for front matter in {md_path}")
+
+
+def read_front_matter_block(md_path: Path) -> str:
+    """Raw front matter YAML of `md_path`; the post body is never read."""
+    with md_path.open("r", encoding="utf-8") as f:
+        return _front_matter_lines(f, md_path)
+
+
+def parse_front_matter_block(block: str, md_path: Path) -> Dict[str, Any]:
+    """YAML front matter block -> dict, with `date` as a string."""
+    try:
+        data = yaml.load(block, Loader=SafeLoader) or {}
+        if not isinstance(data, dict):
+            raise FrontMatterError(f"Front matter is not a mapping in {md_path}")
+    except yaml.YAMLError as exc:
+        raise FrontMatterError(f"YAML parsing error in {md_path}: {exc}") from exc
+
+    # Make sure date is JSON-friendly
+    if "date" in data:
+        data["date"] = str(data["date"])
+
+    return data
+
+
+def read_front_matter(md_path: Path) -> Dict[str, Any]:
+    """
+    Extract YAML front matter from an index.md file.
+
+    Expected structure:
+
+    ---
+    key: value
+    ...
+    ---
+    <markdown content>
+
+    The file is read line by line and closed at the closing `---`, so long
+    post bodies cost nothing.
+    """
+    return parse_front_matter_block(read_front_matter_block(md_path), md_path)
@@ -1,19 +1,29 @@
 # src/agent_engine/kra/blog_index_builder.py
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
-import re
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import yaml  # pip install pyyaml
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..config import settings, platform_PATTERNS
+from .content_scan import map_batches, scandir_files
+from .directory_search import _date_sort_key, platform_key
+from .front_matter import (
+    FrontMatterError,
+    parse_front_matter_block,
+    read_front_matter_block,
+)
+from .index_columns import COLUMN_SUFFIX, write_column_file
 
-
-class FrontMatterError(Exception):
-    """Custom exception for front matter parsing issues."""
-    pass
+logger = logging.getLogger(__name__)
 
 
 # -------------------------------------------------------------------
@@ -67,59 +77,8 @@ def detect_platforms_from_front_matter(fm: Dict[str, Any]) -> List[str]:
     return unique
 
 # -------------------------------------------------------------------
-# Front matter parsing & metadata
+# Metadata
 # -------------------------------------------------------------------
-def _read_front_matter(md_path: Path) -> Dict[str, Any]:
-    """
-    Extract YAML front matter from an index.md file.
-
-    Expected structure:
-
-    ---
-    key: value
-    ...
-    ---
-    <markdown content>
-    """
-    text = md_path.read_text(encoding="utf-8")
-
-    if not text.lstrip().startswith("---"):
-        raise FrontMatterError(f"No front matter starting with '---' in {md_path}")
-
-    lines = text.splitlines()
-    if not lines:
-        raise FrontMatterError(f"Empty file: {md_path}")
-
-    start_idx: Optional[int] = None
-    end_idx: Optional[int] = None
-
-    for idx, line in enumerate(lines):
-        if line.strip() == "---":
-            if start_idx is None:
-                start_idx = idx
-            else:
-                end_idx = idx
-                break
-
-    if start_idx is None or end_idx is None or end_idx <= start_idx:
-        raise FrontMatterError(f"Could not find closing '---' for front matter in {md_path}")
-
-    yaml_block = "\n".join(lines[start_idx + 1 : end_idx])
-
-    try:
-        data = yaml.safe_load(yaml_block) or {}
-        if not isinstance(data, dict):
-            raise FrontMatterError(f"Front matter is not a mapping in {md_path}")
-    except yaml.YAMLError as exc:
-        raise FrontMatterError(f"YAML parsing error in {md_path}: {exc}") from exc
-
-    # Make sure date is JSON-friendly
-    if "date" in data:
-        data["date"] = str(data["date"])
-
-    return data
-
-
 def _derive_metadata(md_path: Path, content_root: Path) -> Dict[str, Any]:
     """
     Derive additional metadata from the file path:
@@ -186,43 +145,33 @@ def build_blog_index() -> List[Dict[str, Any]]:
     if not content_root.exists():
         raise FileNotFoundError(f"Blog content root does not exist: {content_root}")
 
-    index_files = list(content_root.rglob("index.md"))
+    index_files = scandir_files(content_root)
     if settings.DEBUG:
         print(f"DEBUG: Found {len(index_files)} index.md files under {content_root}")
 
-    blog_entries: List[Dict[str, Any]] = []
+    # Front matter is parsed in parallel (BLOG_SCAN_MODE), results in file order
+    parsed = map_batches(_parse_posts, [(str(p), str(content_root), None) for p in index_files])
 
-    for md_path in index_files:
-        try:
-            fm = _read_front_matter(md_path)
-        except FrontMatterError as exc:
+    blog_entries: List[Dict[str, Any]] = []
+    for md_path, post in zip(index_files, parsed):
+        if post.error is not None:
             if settings.DEBUG:
-                print(f"[WARN] Skipping {md_path}: {exc}")
+                print(f"[WARN] Skipping {md_path}: {post.error}")
             continue
-
-        derived = _derive_metadata(md_path, content_root)
-
-        # 🔍 Detect platforms using front-matter
-        platforms = detect_platforms_from_front_matter(fm)
-        primary_platform: Optional[str] = platforms[0] if platforms else None
-
-        entry: Dict[str, Any] = {
-            **derived,
-            **fm,
-            "platforms": platforms,
-            "primary_platform": primary_platform,
-        }
-
-        blog_entries.append(entry)
+        if post.entry is not None:
+            blog_entries.append(post.entry)
 
     return blog_entries
 
 
 def save_blog_index(entries: List[Dict[str, Any]]) -> Path:
     """
-    Save the blog index as JSON to BLOG_INDEX_JSON.
+    Save the blog index to BLOG_INDEX_JSON: pretty JSON, or the compact
+    memory-mapped column file when the path ends in `.kbi`.
     """
     out_path = Path(settings.BLOG_INDEX_JSON).expanduser().resolve()
+    if out_path.suffix == COLUMN_SUFFIX:
+        return write_column_file(entries, out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     with out_path.open("w", encoding="utf-8") as f:
@@ -231,6 +180,229 @@ def save_blog_index(entries: List[Dict[str, Any]]) -> Path:
     return out_path
 
 
+# -------------------------------------------------------------------
+# Persistent content index (SQLite, incremental rescans)
+# -------------------------------------------------------------------
+
+INDEX_VERSION = 4  # 2: sha1 is of the front matter block; 3: product column from the path; 4: platform_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS posts (
+    rel_path  TEXT PRIMARY KEY,
+    mtime_ns  INTEGER NOT NULL,
+    size      INTEGER NOT NULL,
+    sha1      TEXT    NOT NULL, -- of the front matter block
+    product   TEXT,             -- lowercased, for lookups
+    platforms TEXT    NOT NULL, -- ",python,java," for substring filters
+    date_key  REAL    NOT NULL,
+    entry     TEXT              -- JSON; NULL when the front matter is invalid
+);
+CREATE INDEX IF NOT EXISTS posts_product ON posts (product, date_key);
+"""
+
+
+@dataclass
+class IndexUpdate:
+    """What one `update_content_index` call did."""
+
+    files: int = 0
+    parsed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+def content_index_path() -> Path:
+    return Path(settings.BLOG_INDEX_DB).expanduser().resolve()
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _build_entry(md_path: Path, content_root: Path, block: str) -> Dict[str, Any]:
+    fm = parse_front_matter_block(block, md_path)
+    platforms = detect_platforms_from_front_matter(fm)
+    return {
+        **_derive_metadata(md_path, content_root),
+        **fm,
+        "platforms": platforms,
+        "primary_platform": platforms[0] if platforms else None,
+    }
+
+
+@dataclass
+class ParsedPost:
+    """Result of parsing one index.md in a scan worker."""
+
+    sha1: str = ""
+    entry: Optional[Dict[str, Any]] = None
+    unchanged: bool = False     # front matter hash equals the known one
+    error: Optional[str] = None  # invalid front matter
+    missing: bool = False        # vanished or unreadable
+
+
+def _parse_posts(batch: List[Tuple[str, str, Optional[str]]]) -> List[ParsedPost]:
+    """
+    Scan worker: (path, content_root, known front matter sha1) -> ParsedPost.
+    Module-level so a process pool can pickle it.
+    """
+    out: List[ParsedPost] = []
+    for path, root, known_sha1 in batch:
+        md_path = Path(path)
+        try:
+            block = read_front_matter_block(md_path)
+            sha1 = hashlib.sha1(block.encode("utf-8")).hexdigest()
+            if sha1 == known_sha1:
+                out.append(ParsedPost(sha1=sha1, unchanged=True))
+                continue
+            out.append(ParsedPost(sha1=sha1, entry=_build_entry(md_path, Path(root), block)))
+        except OSError:
+            out.append(ParsedPost(missing=True))
+        except (FrontMatterError, UnicodeDecodeError) as exc:
+            out.append(ParsedPost(error=str(exc)))
+    return out
+
+
+def update_content_index(
+    content_root: Optional[Path] = None,
+    db_path: Optional[Path] = None,
+    rebuild: bool = False,
+) -> IndexUpdate:
+    """
+    Bring the content index at `db_path` (default BLOG_INDEX_DB) in line with
+    the index.md files under `content_root` (default BLOG_CONTENT_ROOT).
+
+    Only files whose mtime or size changed are read, and only up to the end
+    of their front matter; of those, only files whose front matter hash
+    changed are YAML-parsed again (in parallel, see content_scan.map_batches).
+    Rows of vanished files
+    are deleted. Files with invalid front matter are remembered (entry NULL)
+    so they are not re-parsed until they change. A different content root,
+    an index version bump or `rebuild=True` start from scratch.
+    """
+    t0 = time.perf_counter()
+    content_root = (content_root or Path(settings.BLOG_CONTENT_ROOT)).expanduser().resolve()
+    if not content_root.exists():
+        raise FileNotFoundError(f"Blog content root does not exist: {content_root}")
+    db_path = db_path or content_index_path()
+    stats = IndexUpdate()
+
+    with closing(_connect(db_path)) as conn, conn:
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        if rebuild or meta.get("content_root") != str(content_root) or meta.get("version") != str(INDEX_VERSION):
+            conn.execute("DELETE FROM posts")
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [("content_root", str(content_root)), ("version", str(INDEX_VERSION))],
+            )
+
+        known = {
+            rel: (mtime_ns, size, sha1)
+            for rel, mtime_ns, size, sha1 in conn.execute("SELECT rel_path, mtime_ns, size, sha1 FROM posts")
+        }
+        seen: set[str] = set()
+        upserts: List[tuple] = []
+        touched: List[tuple] = []
+        changed: List[Tuple[Path, str, os.stat_result]] = []
+
+        for md_path in scandir_files(content_root):
+            rel = str(md_path.relative_to(content_root))
+            try:
+                st = md_path.stat()
+            except OSError:
+                continue
+            seen.add(rel)
+            stats.files += 1
+
+            old = known.get(rel)
+            if old is not None and old[0] == st.st_mtime_ns and old[1] == st.st_size:
+                stats.unchanged += 1
+                continue
+            changed.append((md_path, rel, st))
+
+        parsed = map_batches(
+            _parse_posts,
+            [(str(p), str(content_root), (known.get(rel) or (None, None, None))[2]) for p, rel, _ in changed],
+        )
+
+        for (md_path, rel, st), post in zip(changed, parsed):
+            if post.missing:
+                seen.discard(rel)
+                continue
+            if post.unchanged:
+                # Body edited or file touched, front matter unchanged
+                touched.append((st.st_mtime_ns, st.st_size, rel))
+                stats.unchanged += 1
+                continue
+            if post.error is not None:
+                if settings.DEBUG:
+                    print(f"[WARN] Skipping {md_path}: {post.error}")
+                stats.failed += 1
+            else:
+                stats.parsed += 1
+            entry = post.entry
+            sha1 = post.sha1
+
+            platforms = (entry or {}).get("platforms") or []
+            # Filter on the product folder like search_from_directory; a
+            # front matter `product` only shows up in the entry itself
+            product = _derive_metadata(md_path, content_root).get("product")
+            upserts.append((
+                rel,
+                st.st_mtime_ns,
+                st.st_size,
+                sha1,
+                (product.lower().strip() or None) if isinstance(product, str) else None,
+                "," + ",".join(platform_key(p) for p in platforms) + ",",
+                _date_sort_key((entry or {}).get("date")),
+                json.dumps(entry, ensure_ascii=False, default=str) if entry is not None else None,
+            ))
+
+        conn.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+        conn.executemany("UPDATE posts SET mtime_ns=?, size=? WHERE rel_path=?", touched)
+        gone = [(rel,) for rel in known.keys() - seen]
+        conn.executemany("DELETE FROM posts WHERE rel_path=?", gone)
+        stats.removed = len(gone)
+
+    stats.seconds = time.perf_counter() - t0
+    logger.info(
+        "Content index: %d files, %d parsed, %d unchanged, %d removed, %d invalid in %.3fs",
+        stats.files, stats.parsed, stats.unchanged, stats.removed, stats.failed, stats.seconds,
+    )
+    return stats
+
+
+def query_content_index(
+    product: Optional[str] = None,
+    platform: Optional[str] = None,
+    db_path: Optional[Path] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Indexed posts for `product` (all products when None), optionally only
+    those detected for `platform`, oldest first. Same entries as
+    directory_search.search_from_directory, without touching the blog files.
+    """
+    sql = "SELECT entry FROM posts WHERE entry IS NOT NULL"
+    args: List[Any] = []
+    if product:
+        sql += " AND product = ?"
+        args.append(product.lower().strip())
+    if platform:
+        sql += " AND instr(platforms, ?) > 0"
+        args.append(f",{platform_key(platform)},")
+    sql += " ORDER BY date_key, rel_path"
+
+    with closing(_connect(db_path or content_index_path())) as conn:
+        return [json.loads(row[0]) for row in conn.execute(sql, args)]
+
+
 def main() -> None:
     """
     Standalone entrypoint.
@@ -238,9 +410,23 @@ def main() -> None:
     Usage (from project root):
 
         python -m agents.kra.blog_index_builder
+        python -m agents.kra.blog_index_builder --rebuild
+
+    Updates the persistent content index (BLOG_INDEX_DB), re-parsing only
+    changed files, then exports it to BLOG_INDEX_JSON (JSON, or a column
+    file for a `.kbi` path).
     """
+    parser = argparse.ArgumentParser(description="Build/update the blog content index.")
+    parser.add_argument("--rebuild", action="store_true", help="Re-parse every post instead of only changed ones.")
+    args = parser.parse_args()
+
     print(f"📂 Scanning blog content root: {settings.BLOG_CONTENT_ROOT}")
-    entries = build_blog_index()
+    update = update_content_index(rebuild=args.rebuild)
+    print(
+        f"🔄 {update.files} files: {update.parsed} parsed, {update.unchanged} unchanged, "
+        f"{update.removed} removed, {update.failed} invalid ({update.seconds:.3f} s)"
+    )
+    entries = query_content_index()
     print(f"✅ Found {len(entries)} posts with valid front matter")
 
     out_path = save_blog_index(entries)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .directory_search import _date_sort_key
+
+MAGIC = b"KRABIDX\0"
+FORMAT_VERSION = 1
+COLUMN_SUFFIX = ".kbi"
+
+# Fields the runtime reads (topic prompt, content index, search); everything
+# else in the front matter is stored as per-row JSON and decoded on access.
+STRING_FIELDS: Tuple[str, ...] = ("title", "url", "slug", "rel_path", "date", "primary_platform")
+PROJECTED_FIELDS: Tuple[str, ...] = (*STRING_FIELDS, "product", "platforms")
+
+# Per-row state of each projected field, so absent keys and None round-trip
+PRESENT, NULL, MISSING = 0, 1, 2
+
+_ALIGN = 8
+
+
+def is_column_file(path: Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _encode_strings(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 blob + int64 offsets (n+1); None is stored as ""."""
+    raw = [v.encode("utf-8") if v is not None else b"" for v in values]
+    offsets = np.zeros(len(raw) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in raw], out=offsets[1:])
+    return np.frombuffer(b"".join(raw), dtype=np.uint8), offsets
+
+
+def _states(entries: Sequence[Dict[str, Any]], name: str) -> np.ndarray:
+    return np.fromiter(
+        (MISSING if name not in e else NULL if e[name] is None else PRESENT for e in entries),
+        dtype=np.uint8, count=len(entries),
+    )
+
+
+def _codes(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """Dictionary encoding; None -> -1."""
+    vocab: Dict[str, int] = {}
+    codes = np.fromiter(
+        (-1 if v is None else vocab.setdefault(v, len(vocab)) for v in values),
+        dtype=np.int32, count=len(values),
+    )
+    return codes, list(vocab)
+
+
+def _str_or_none(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def write_column_file(entries: Sequence[Dict[str, Any]], path: Path) -> Path:
+    """
+    Write blog index entries as a column file:
+
+        MAGIC | u32 version | u64 header length | JSON header | arrays
+
+    The header lists every array (dtype, offset, length) and the product /
+    platform dictionaries. Arrays are 8-byte aligned so the reader can view
+    them straight out of a memory map.
+    """
+    n = len(entries)
+    arrays: Dict[str, np.ndarray] = {}
+
+    for name in PROJECTED_FIELDS:
+        arrays[f"{name}.state"] = _states(entries, name)
+    for name in STRING_FIELDS:
+        arrays[f"{name}.data"], arrays[f"{name}.offsets"] = _encode_strings([_str_or_none(e.get(name)) for e in entries])
+
+    arrays["product.codes"], product_vocab = _codes([_str_or_none(e.get("product")) for e in entries])
+
+    platform_lists = [[str(p) for p in (e.get("platforms") or [])] for e in entries]
+    plat_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(p) for p in platform_lists], out=plat_offsets[1:])
+    plat_codes, platform_vocab = _codes([p for ps in platform_lists for p in ps])
+    arrays["platforms.offsets"], arrays["platforms.codes"] = plat_offsets, plat_codes
+
+    arrays["date_key"] = np.array([_date_sort_key(e.get("date")) for e in entries], dtype=np.float64)
+
+    extra = [
+        json.dumps({k: v for k, v in e.items() if k not in PROJECTED_FIELDS}, ensure_ascii=False, default=str)
+        for e in entries
+    ]
+    arrays["extra.data"], arrays["extra.offsets"] = _encode_strings(extra)
+
+    layout: Dict[str, Dict[str, Any]] = {}
+    pos = 0
+    for name, arr in arrays.items():
+        layout[name] = {"dtype": arr.dtype.str, "offset": pos, "count": int(arr.size)}
+        pos += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        "n": n,
+        "arrays": layout,
+        "vocab": {"product": product_vocab, "platform": platform_vocab},
+    }).encode("utf-8")
+    preamble = MAGIC + struct.pack("<IQ", FORMAT_VERSION, len(header)) + header
+    base = -(-len(preamble) // _ALIGN) * _ALIGN
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(preamble.ljust(base, b"\0"))
+            for name, arr in arrays.items():
+                buf = arr.tobytes()
+                f.write(buf.ljust(-(-len(buf) // _ALIGN) * _ALIGN, b"\0"))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+class ColumnFile:
+    """
+    Read-only, memory-mapped view of a column file. Nothing is decoded up
+    front: strings are sliced out of the map per row, the full front matter
+    of a row only when a non-projected field is asked for.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a blog index column file: {self.path}")
+            version, header_len = struct.unpack("<IQ", f.read(12))
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported blog index column file version {version}: {self.path}")
+            header = json.loads(f.read(header_len))
+        base = -(-(len(MAGIC) + 12 + header_len) // _ALIGN) * _ALIGN
+
+        self.n: int = header["n"]
+        self.product_vocab: List[str] = header["vocab"]["product"]
+        self.platform_vocab: List[str] = header["vocab"]["platform"]
+        mm = np.memmap(self.path, dtype=np.uint8, mode="r")
+        self._arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = base + spec["offset"]
+            self._arrays[name] = mm[start:start + spec["count"] * dtype.itemsize].view(dtype)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def array(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def string(self, field: str, i: int) -> Optional[str]:
+        off = self._arrays[f"{field}.offsets"]
+        return self._arrays[f"{field}.data"][off[i]:off[i + 1]].tobytes().decode("utf-8")
+
+    def product(self, i: int) -> Optional[str]:
+        code = int(self._arrays["product.codes"][i])
+        return self.product_vocab[code] if code >= 0 else None
+
+    def platforms(self, i: int) -> List[str]:
+        off = self._arrays["platforms.offsets"]
+        return [self.platform_vocab[c] for c in self._arrays["platforms.codes"][off[i]:off[i + 1]].tolist()]
+
+    def projected(self, i: int) -> Dict[str, Any]:
+        """The projected fields of row `i`, absent keys left out."""
+        out: Dict[str, Any] = {}
+        for name in PROJECTED_FIELDS:
+            state = self._arrays[f"{name}.state"][i]
+            if state == NULL:
+                out[name] = None
+            elif state == PRESENT:
+                if name == "product":
+                    out[name] = self.product(i)
+                elif name == "platforms":
+                    out[name] = self.platforms(i)
+                else:
+                    out[name] = self.string(name, i)
+        return out
+
+    def extra(self, i: int) -> Dict[str, Any]:
+        off = self._arrays["extra.offsets"]
+        return json.loads(self._arrays["extra.data"][off[i]:off[i + 1]].tobytes())
+
+
+class LazyPost(Mapping):
+    """
+    One blog index entry backed by a ColumnFile. Projected fields are read
+    on creation; the rest of the front matter is decoded on first access
+    (`post["tags"]`, iteration, `dict(post)`).
+    """
+
+    __slots__ = ("_file", "_row", "_data", "_full")
+
+    def __init__(self, file: ColumnFile, row: int) -> None:
+        self._file = file
+        self._row = row
+        self._data = file.projected(row)
+        self._full = False
+
+    def _load_full(self) -> None:
+        if not self._full:
+            self._data = {**self._file.extra(self._row), **self._data}
+            self._full = True
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._data:
+            return self._data[key]
+        if key in PROJECTED_FIELDS:
+            raise KeyError(key)
+        self._load_full()
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        self._load_full()
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        self._load_full()
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"LazyPost({self._data!r})"
+
+
+class LazyPosts(Sequence):
+    """Sequence of LazyPost over a ColumnFile, each built on first access."""
+
+    def __init__(self, file: ColumnFile) -> None:
+        self._file = file
+        self._cache: Dict[int, LazyPost] = {}
+
+    def __len__(self) -> int:
+        return len(self._file)
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        post = self._cache.get(i)
+        if post is None:
+            post = self._cache[i] = LazyPost(self._file, i)
+        return post
@@ -2,10 +2,18 @@ from __future__ import annotations
 
 import argparse
 import json
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from ..config import settings, platform_PATTERNS
+from .directory_search import _date_sort_key, platform_key
+from .index_columns import ColumnFile, LazyPosts, is_column_file
 
 def _get_index_path() -> Path:
     """
@@ -28,25 +36,184 @@ def _get_index_path() -> Path:
     return path.expanduser().resolve()
 
 
-def load_blog_index() -> List[Dict[str, Any]]:
+# Shared with the SQLite index and the directory scan, so all paths agree
+_platform_key = platform_key
+
+
+def _timestamp(value: Union[str, datetime, float, None]) -> float:
+    """Date bound -> timestamp; strings are parsed like front matter dates."""
+    if value is None:
+        return float("inf")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    return _date_sort_key(value)
+
+
+def _groups(keys: np.ndarray, ids: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+    """Runs of equal `keys` (already sorted) -> (key, ids of the run)."""
+    if not len(keys):
+        return
+    bounds = np.flatnonzero(np.diff(keys)) + 1
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(keys)]):
+        yield int(keys[start]), ids[start:end]
+
+
+@dataclass
+class BlogIndex:
     """
-    Load the blog index JSON into memory.
+    The blog index plus secondary indexes built once per load.
 
-    Returns:
-        List of blog entries (dicts).
+    Posting lists hold positions in `entries`, sorted by date ascending
+    (undated posts last, ties in file order), with the matching timestamps
+    alongside for bisecting:
+
+    - `by_product[product]`
+    - `by_product_platform[(product, platform)]`
+    """
+
+    entries: Sequence[Dict[str, Any]]
+    by_product: Dict[str, List[int]] = field(default_factory=dict)
+    by_product_platform: Dict[Tuple[str, str], List[int]] = field(default_factory=dict)
+    dates: List[float] = field(default_factory=list)
+    _date_lists: Dict[Any, List[float]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, entries: List[Dict[str, Any]]) -> "BlogIndex":
+        index = cls(entries=entries, dates=[_date_sort_key(e.get("date")) for e in entries])
+        for i in sorted(range(len(entries)), key=index.dates.__getitem__):
+            entry = entries[i]
+            product = str(entry.get("product") or "").lower().strip()
+            index.by_product.setdefault(product, []).append(i)
+            for platform in dict.fromkeys(_platform_key(f) for f in entry.get("platforms") or []):
+                index.by_product_platform.setdefault((product, platform), []).append(i)
+        for key, ids in [*index.by_product.items(), *index.by_product_platform.items()]:
+            index._date_lists[key] = [index.dates[i] for i in ids]
+        return index
+
+    @classmethod
+    def from_columns(cls, file: ColumnFile) -> "BlogIndex":
+        """
+        Same indexes as `build`, grouped with numpy over the column file's
+        codes; entries are LazyPost rows, decoded only when returned.
+        """
+        dates = np.asarray(file.array("date_key"))
+        index = cls(entries=LazyPosts(file), dates=dates.tolist())
+        rows = np.arange(len(file))
+
+        # Normalized product per row; code -1 (no product) -> ""
+        names = sorted({str(p).lower().strip() for p in file.product_vocab} | {""})
+        norm = {name: i for i, name in enumerate(names)}
+        remap = np.array([norm[str(p).lower().strip()] for p in file.product_vocab] + [norm[""]], dtype=np.int64)
+        product = remap[file.array("product.codes")]
+
+        order = np.lexsort((rows, dates, product))
+        for key, ids in _groups(product[order], order):
+            index.by_product[names[key]] = ids.tolist()
+
+        # One (product, platform, row) per platform occurrence, duplicates dropped
+        offsets = file.array("platforms.offsets")
+        plat_names = sorted({_platform_key(f) for f in file.platform_vocab})
+        plat_norm = {name: i for i, name in enumerate(plat_names)}
+        plat_remap = np.array([plat_norm[_platform_key(f)] for f in file.platform_vocab], dtype=np.int64)
+        occ_rows = np.repeat(rows, np.diff(offsets))
+        occ_plat = plat_remap[file.array("platforms.codes")]
+        pair = product[occ_rows] * max(1, len(plat_names)) + occ_plat
+        order = np.lexsort((occ_rows, dates[occ_rows], pair))
+        pair, occ_rows = pair[order], occ_rows[order]
+        first = np.r_[True, (pair[1:] != pair[:-1]) | (occ_rows[1:] != occ_rows[:-1])] if len(pair) else pair.astype(bool)
+        for key, ids in _groups(pair[first], occ_rows[first]):
+            p, f = divmod(key, max(1, len(plat_names)))
+            index.by_product_platform[(names[p], plat_names[f])] = ids.tolist()
+
+        for key, ids in [*index.by_product.items(), *index.by_product_platform.items()]:
+            index._date_lists[key] = dates[ids].tolist()
+        return index
+
+    def _key(self, product: str, platform: Optional[str]) -> Any:
+        product_norm = product.lower().strip()
+        return (product_norm, _platform_key(platform)) if platform else product_norm
+
+    def _ids(self, key: Any) -> List[int]:
+        if isinstance(key, tuple):
+            return self.by_product_platform.get(key, [])
+        return self.by_product.get(key, [])
+
+    def search(self, product: str, platform: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Posts of `product` (and `platform`), oldest first."""
+        return [self.entries[i] for i in self._ids(self._key(product, platform))]
+
+    def between(
+        self,
+        product: str,
+        platform: Optional[str] = None,
+        since: Union[str, datetime, float, None] = None,
+        until: Union[str, datetime, float, None] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Posts dated in [since, until] (either bound optional), oldest first.
+        A date-only `until` ("2025-03-31") includes that whole day. Undated
+        posts are never included.
+        """
+        key = self._key(product, platform)
+        ids, dates = self._ids(key), self._date_lists.get(key, [])
+        lo = bisect_left(dates, _timestamp(since)) if since is not None else 0
+        if until is None:
+            hi = bisect_left(dates, float("inf"))  # undated posts sort last
+        elif isinstance(until, str) and len(until.strip()) == 10:
+            hi = bisect_left(dates, _timestamp(until) + 86400)
+        else:
+            hi = bisect_right(dates, _timestamp(until))
+        return [self.entries[i] for i in ids[lo:hi]]
+
+    def most_recent(self, product: str, platform: Optional[str] = None, n: int = 20) -> List[Dict[str, Any]]:
+        """The `n` newest dated posts, newest first (e.g. for the topic prompt)."""
+        key = self._key(product, platform)
+        ids, dates = self._ids(key), self._date_lists.get(key, [])
+        dated = bisect_left(dates, float("inf"))
+        return [self.entries[i] for i in reversed(ids[max(0, dated - n):dated])]
+
+
+@lru_cache(maxsize=4)
+def _load(path: str, mtime_ns: int, size: int) -> BlogIndex:
+    if is_column_file(Path(path)):
+        return BlogIndex.from_columns(ColumnFile(Path(path)))
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a list in blog index JSON, got: {type(data)}")
+
+    return BlogIndex.build(data)
+
+
+def get_blog_index() -> BlogIndex:
+    """
+    The blog index, parsed and indexed once per process and reloaded only
+    when the file's mtime or size changes. BLOG_INDEX_JSON may be a JSON
+    export or a column file (see index_columns), told apart by its header.
     """
     index_path = _get_index_path()
 
     if not index_path.is_file():
         raise FileNotFoundError(f"Blog index JSON not found at: {index_path}")
 
-    with index_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    st = index_path.stat()
+    return _load(str(index_path), st.st_mtime_ns, st.st_size)
 
-    if not isinstance(data, list):
-        raise ValueError(f"Expected a list in blog index JSON, got: {type(data)}")
 
-    return data
+def load_blog_index() -> List[Dict[str, Any]]:
+    """
+    Load the blog index JSON into memory.
+
+    Returns:
+        List of blog entries (dicts, or read-only LazyPost mappings for a
+        column file). The list is a copy, the entries are shared with the
+        cached index and should not be modified.
+    """
+    return list(get_blog_index().entries)
 
 
 def search_blog_index(
@@ -62,36 +229,10 @@ def search_blog_index(
                    If None, no platform filtering is applied.
 
     Returns:
-        List of matching blog entries (dicts).
+        List of matching blog entries (dicts), oldest first. A dictionary
+        lookup in the cached BlogIndex, no scan.
     """
-    entries = load_blog_index()
-
-    product_norm = product.lower().strip()
-    platform_norm = platform.lower().strip() if platform else None
-
-    results: List[Dict[str, Any]] = []
-
-    for entry in entries:
-        entry_product = str(entry.get("product") or "").lower().strip()
-        if entry_product != product_norm:
-            continue
-
-        if platform_norm:
-            platforms = entry.get("platforms") or []
-            platforms_norm = [str(f).lower().strip() for f in platforms]
-
-            # Very small safety: allow "c#" / "csharp" mismatch by normalizing
-            if platform_norm in {"c#", "c-sharp"}:
-                platform_norm_cmp = "csharp"
-            else:
-                platform_norm_cmp = platform_norm
-
-            if platform_norm_cmp not in platforms_norm:
-                continue
-
-        results.append(entry)
-
-    return results
+    return get_blog_index().search(product, platform)
 
 
 def main() -> None:
@@ -108,6 +249,10 @@ def main() -> None:
 
         # Only 'cells' + 'java'
         python -m agent_engine.kra.blog_index_search --product cells --platform java
+
+        # 'cells' posts from 2025, or the 10 newest
+        python -m agent_engine.kra.blog_index_search --product cells --since 2025-01-01 --until 2025-12-31
+        python -m agent_engine.kra.blog_index_search --product cells --recent 10
     """
     parser = argparse.ArgumentParser(
         description="Test blog index search by product and optional platform."
@@ -122,10 +267,18 @@ def main() -> None:
         required=False,
         help="Optional platform filter, e.g. python, java, csharp"
     )
+    parser.add_argument("--since", help="Only posts dated on/after this date, e.g. 2025-01-01")
+    parser.add_argument("--until", help="Only posts dated on/before this date")
+    parser.add_argument("--recent", type=int, default=0, help="Only the N newest posts (newest first)")
 
     args = parser.parse_args()
 
-    matches = search_blog_index(args.product, args.platform)
+    if args.recent:
+        matches = get_blog_index().most_recent(args.product, args.platform, args.recent)
+    elif args.since or args.until:
+        matches = get_blog_index().between(args.product, args.platform, args.since, args.until)
+    else:
+        matches = search_blog_index(args.product, args.platform)
 
     fw_display = args.platform or "ANY"
     print(f"🔎 Found {len(matches)} posts for product='{args.product}' platform='{fw_display}'\n")
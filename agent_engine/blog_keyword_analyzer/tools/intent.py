@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import BRAND_INTENT_LEXICONS, INTENT_LEXICONS
+
+# Intent codes, in priority order: a keyword matching several lexicons gets
+# the first one listed here. Keywords matching none are informational.
+INTENTS: Tuple[str, ...] = ("transactional", "commercial", "navigational", "informational")
+DEFAULT_INTENT = INTENTS.index("informational")
+
+
+def _brand_key(brand: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]", "", (brand or "").lower())
+
+
+def intent_lexicons(brand: Optional[str] = None) -> Dict[str, List[str]]:
+    """INTENT_LEXICONS plus the brand's BRAND_INTENT_LEXICONS entries."""
+    extra = BRAND_INTENT_LEXICONS.get(_brand_key(brand), {})
+    return {
+        intent: list(dict.fromkeys([*INTENT_LEXICONS.get(intent, []), *extra.get(intent, [])]))
+        for intent in INTENTS
+    }
+
+
+@lru_cache(maxsize=32)
+def _compile(lexicons: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> re.Pattern:
+    """
+    One alternation with a named group per intent. Longer phrases come first
+    so "how to" wins over a shorter overlapping entry.
+    """
+    groups = []
+    for code, (_, phrases) in enumerate(lexicons):
+        if not phrases:
+            continue
+        alts = "|".join(re.escape(p) for p in sorted(set(phrases), key=len, reverse=True))
+        groups.append(f"(?P<i{code}>{alts})")
+    if not groups:
+        return re.compile(r"(?!)")
+    return re.compile(r"(?<!\w)(?:" + "|".join(groups) + r")(?!\w)")
+
+
+def compile_intents(lexicons: Dict[str, Sequence[str]]) -> re.Pattern:
+    """Compiled (and cached) matcher for `lexicons`, keyed by intent name."""
+    key = tuple((intent, tuple(p.lower() for p in lexicons.get(intent, ()))) for intent in INTENTS)
+    return _compile(key)
+
+
+def classify_intents(keywords: Sequence[str], lexicons: Dict[str, Sequence[str]]) -> np.ndarray:
+    """
+    Intent code (index into INTENTS) for every keyword.
+
+    All keywords are joined into one newline-separated string and scanned
+    once; each match is mapped back to its keyword by offset, so the cost is
+    O(total characters) whatever the number of keywords or clusters.
+    """
+    n = len(keywords)
+    codes = np.full(n, DEFAULT_INTENT, dtype=np.int8)
+    if not n:
+        return codes
+
+    pattern = compile_intents(lexicons)
+    lengths = np.fromiter((len(k) + 1 for k in keywords), dtype=np.int64, count=n)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    text = "\n".join(keywords)
+    pos: List[int] = []
+    hit: List[int] = []
+    for m in pattern.finditer(text):
+        pos.append(m.start())
+        hit.append(int(m.lastgroup[1:]))
+    if pos:
+        rows = np.searchsorted(starts, np.asarray(pos), side="right") - 1
+        np.minimum.at(codes, rows, np.asarray(hit, dtype=np.int8))
+    return codes
+
+
+def intent_distribution(
+    codes: np.ndarray,
+    labels: np.ndarray,
+    weights: np.ndarray,
+    n_clusters: int,
+) -> np.ndarray:
+    """
+    Per-cluster intent shares, shape (n_clusters, len(INTENTS)); rows sum to 1
+    for non-empty clusters. `labels` is each member's cluster row.
+    """
+    k = len(INTENTS)
+    totals = np.bincount(
+        labels * k + codes.astype(np.int64), weights=weights, minlength=n_clusters * k
+    ).reshape(n_clusters, k)
+    row_sum = totals.sum(axis=1, keepdims=True)
+    return np.divide(totals, row_sum, out=np.zeros_like(totals), where=row_sum > 0)
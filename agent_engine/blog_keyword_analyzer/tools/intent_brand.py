@@ -1,30 +1,55 @@
 from __future__ import annotations
-import re
-from typing import List
+from typing import List, Optional
+import numpy as np
 from ..schemas import Cluster
+from .intent import INTENTS, classify_intents, intent_distribution, intent_lexicons
+from .brand_index import keyword_brand_fit, load_brand_index
+from .keyword_batch import batch_groups
 
-def annotate_intent_brand(clusters: List[Cluster], product: str) -> List[Cluster]:
-    info_pat = re.compile(r"\b(how to|guide|tutorial|what is|examples?)\b")
-    comm_pat = re.compile(r"\b(best|top|tools?|software|alternatives?|compare|vs\.? )\b")
-    trans_pat = re.compile(r"\b(buy|price|pricing|download|license|trial)\b")
-    nav_pat  = re.compile(r"\b(aspose|docs|reference|api|login|account)\b")
-    p_ns = product.strip().lower()
+def annotate_intent_brand(
+    clusters: List[Cluster],
+    product: str,
+    brand: Optional[str] = None,
+) -> List[Cluster]:
+    """
+    Classify every keyword's intent once, then fill per-cluster metrics:
 
-    for cl in clusters:
-        corpus = " ".join([m.keyword for m in cl.members])
-        intent = "informational"
-        if trans_pat.search(corpus):
-            intent = "transactional"
-        elif comm_pat.search(corpus):
-            intent = "commercial"
-        elif nav_pat.search(corpus):
-            intent = "navigational"
-        elif info_pat.search(corpus):
-            intent = "informational"
+    - `intent_distribution`: volume-weighted share of each intent
+      (weight = volume + 1, so keywords without volume still count)
+    - `intent`: the dominant intent (ties go to the higher-priority intent)
+    - `brand_fit`: volume-weighted keyword brand fit from the brand's
+      productsData token index (1 = this product family, e.g. "xlsx" or
+      "cells" for Aspose.Cells; 0.5 = brand name; 0.25 = another product)
 
-        hits = sum(1 for m in cl.members if p_ns in m.keyword)
-        brand_fit = hits / max(1, len(cl.members))
+    Per-keyword intents are stored on each cluster's batch (`batch.intent`);
+    clusters built from separate batches are classified batch by batch.
+    """
+    groups = batch_groups(clusters)
+    if not groups:
+        return clusters
+    token_fit = load_brand_index(brand or product.split(".")[0]).token_fit(product)
+    lexicons = intent_lexicons(brand)
 
-        cl.metrics.intent = intent  # type: ignore
-        cl.metrics.brand_fit = round(float(brand_fit), 3)
+    nc = len(clusters)
+    sizes = np.array([len(cl.member_idx) for cl in clusters], dtype=np.int64)
+    codes, labels, weights, kw_fit = [], [], [], []
+    for batch, idx, rows in groups:
+        batch.intent = classify_intents(batch.keyword.tolist(), lexicons)
+        codes.append(batch.intent[idx])
+        labels.append(rows)
+        weights.append(np.where(batch.present["volume"], batch.volume, 0).astype(np.float64)[idx] + 1.0)
+        kw_fit.append(keyword_brand_fit(batch.keyword.tolist(), token_fit)[idx])
+    labels = np.concatenate(labels)
+    weights = np.concatenate(weights)
+
+    dist = intent_distribution(np.concatenate(codes), labels, weights, nc)
+    fit = np.bincount(labels, weights=np.concatenate(kw_fit) * weights, minlength=nc)
+    fit_w = np.bincount(labels, weights=weights, minlength=nc)
+
+    for i, cl in enumerate(clusters):
+        cl.metrics.intent_distribution = {
+            intent: round(float(share), 4) for intent, share in zip(INTENTS, dist[i])
+        }
+        cl.metrics.intent = INTENTS[int(np.argmax(dist[i]))] if sizes[i] else "informational"  # type: ignore
+        cl.metrics.brand_fit = round(float(fit[i] / fit_w[i]), 3) if fit_w[i] > 0 else 0.0
     return clusters
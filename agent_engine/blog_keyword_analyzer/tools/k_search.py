@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+logger = logging.getLogger(__name__)
+
+K_SEARCH_METHODS = ("heuristic", "silhouette", "elbow")
+
+# Silhouettes this close to the best count as tied; the smallest such k wins
+SILHOUETTE_TOLERANCE = 0.01
+
+
+@dataclass
+class KSearchResult:
+    """Chosen k plus the evaluated curve (one dict per candidate k)."""
+
+    k: int
+    method: str
+    curve: List[Dict[str, Any]] = field(default_factory=list)
+    seconds: float = 0.0
+    timed_out: bool = False
+
+
+def heuristic_k(n_samples: int) -> int:
+    """Row-count buckets used before the k search existed."""
+    if n_samples < 500: return 10
+    if n_samples < 2000: return 15
+    return 20
+
+
+def stratified_sample(
+    n: int,
+    size: int,
+    volume: Optional[np.ndarray] = None,
+    bins: int = 10,
+    seed: int = 42,
+) -> np.ndarray:
+    """
+    Sorted row indexes of a sample of `size` rows, stratified by volume.
+
+    Rows are bucketed into log-volume quantile bins (missing volume is its own
+    bucket) and each bucket contributes proportionally, so head and long-tail
+    keywords are both represented. Without volumes this is a uniform sample.
+    """
+    if size >= n:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    if volume is None or np.all(np.isnan(volume)):
+        return np.sort(rng.choice(n, size=size, replace=False))
+
+    strata = np.full(n, bins, dtype=np.int64)  # bucket `bins` = missing volume
+    ok = ~np.isnan(volume)
+    logv = np.log1p(np.maximum(volume[ok], 0.0))
+    edges = np.unique(np.quantile(logv, np.linspace(0, 1, bins + 1)[1:-1]))
+    strata[ok] = np.searchsorted(edges, logv, side="right")
+
+    # Proportional allocation rounded by largest remainder, so the quotas sum
+    # to exactly `size` and never exceed a bucket
+    counts = np.bincount(strata, minlength=bins + 1)
+    quota = size * counts / n
+    take = np.floor(quota).astype(np.int64)
+    take[np.argsort(take - quota, kind="stable")[: size - int(take.sum())]] += 1
+
+    picked = [
+        rng.choice(np.flatnonzero(strata == s), size=int(take[s]), replace=False)
+        for s in np.flatnonzero(take)
+    ]
+    return np.sort(np.concatenate(picked))
+
+
+def _evaluate(X, k: int, with_silhouette: bool) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    km = MiniBatchKMeans(n_clusters=k, random_state=42, n_init="auto", batch_size=2048)
+    labels = km.fit_predict(X)
+    point: Dict[str, Any] = {"k": k, "inertia": float(km.inertia_)}
+    if with_silhouette:
+        if len(np.unique(labels)) > 1:
+            point["silhouette"] = float(
+                silhouette_score(X, labels, metric="cosine", sample_size=min(X.shape[0], 2000), random_state=42)
+            )
+        else:
+            point["silhouette"] = -1.0
+    point["seconds"] = round(time.perf_counter() - t0, 4)
+    return point
+
+
+def _predicted_seconds(curve: List[Dict[str, Any]], k: int) -> float:
+    """Fit time for k extrapolated from the evaluated points (k-means cost grows ~linearly in k)."""
+    return max((p["seconds"] * k / p["k"] for p in curve), default=0.0)
+
+
+def _elbow(curve: List[Dict[str, Any]]) -> int:
+    """
+    Kneedle-style elbow: the k whose (normalized) inertia lies farthest below
+    the straight line joining the first and last evaluated points.
+    """
+    ks = np.array([p["k"] for p in curve], dtype=np.float64)
+    inertia = np.array([p["inertia"] for p in curve], dtype=np.float64)
+    if ks.size < 3:
+        return int(ks[int(np.argmin(inertia))])
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    span = inertia[0] - inertia[-1]
+    y = (inertia - inertia[-1]) / span if span > 0 else np.zeros_like(inertia)
+    # line from (0, 1) to (1, 0): distance below it is 1 - x - y
+    return int(ks[int(np.argmax(1.0 - x - y))])
+
+
+def _best_silhouette(curve: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Smallest k whose silhouette is within SILHOUETTE_TOLERANCE of the best,
+    or None when that is the largest evaluated k: on sparse TF-IDF vectors
+    the sampled silhouette tends to keep rising with k, and a maximum on the
+    boundary says nothing about where the clusters are.
+    """
+    top = max(p["silhouette"] for p in curve)
+    best = min(p["k"] for p in curve if p["silhouette"] >= top - SILHOUETTE_TOLERANCE)
+    if len(curve) > 1 and best == max(p["k"] for p in curve):
+        return None
+    return best
+
+
+def search_k(
+    X,
+    method: str = "elbow",
+    volume: Optional[np.ndarray] = None,
+    k_min: int = 5,
+    k_max: int = 60,
+    n_candidates: int = 12,
+    sample_size: int = 5000,
+    time_budget_s: float = 20.0,
+    n_jobs: int = -1,
+) -> KSearchResult:
+    """
+    Pick the number of clusters for X.
+
+    Candidate k values are fitted on a volume-stratified sample, `n_jobs`
+    at a time via joblib; the smallest k runs alone first to time a fit.
+    Before each candidate the budget is checked: a k whose predicted fit
+    time (extrapolated from the fits so far) would end past `time_budget_s`
+    stops the search (the best k seen so far wins; with no finished
+    candidate the row-count heuristic is used).
+
+    - "elbow": knee of the inertia curve
+    - "silhouette": smallest k within SILHOUETTE_TOLERANCE of the highest
+      sampled cosine silhouette; when that is the largest candidate (the
+      curve is still rising) the inertia elbow is used instead
+    - "heuristic": row-count buckets, no search
+    """
+    if method not in K_SEARCH_METHODS:
+        raise ValueError(f"Unknown k search method '{method}'; expected one of {K_SEARCH_METHODS}")
+
+    n = X.shape[0]
+    fallback = heuristic_k(n)
+    if method == "heuristic":
+        return KSearchResult(k=fallback, method="heuristic")
+
+    idx = stratified_sample(n, sample_size, volume)
+    Xs = X[idx]
+    k_hi = min(k_max, max(2, Xs.shape[0] // 5))
+    if k_hi <= k_min:
+        return KSearchResult(k=min(fallback, max(1, n)), method="heuristic")
+    candidates = sorted(set(np.linspace(k_min, k_hi, num=n_candidates).astype(int).tolist()))
+
+    t0 = time.perf_counter()
+    curve: List[Dict[str, Any]] = []
+    timed_out = False
+    wave = max(1, effective_n_jobs(n_jobs))
+    pending = list(candidates)
+    with Parallel(n_jobs=n_jobs, prefer="processes") as parallel:
+        while pending and not timed_out:
+            batch: List[int] = []
+            for k in pending[: wave if curve else 1]:
+                if time.perf_counter() - t0 + _predicted_seconds(curve, k) > time_budget_s:
+                    timed_out = True
+                    break
+                batch.append(k)
+            if not batch:
+                break
+            del pending[: len(batch)]
+            curve.extend(parallel(delayed(_evaluate)(Xs, k, method == "silhouette") for k in batch))
+    seconds = time.perf_counter() - t0
+
+    if not curve:
+        return KSearchResult(k=fallback, method="heuristic", seconds=seconds, timed_out=True)
+    best = _best_silhouette(curve) if method == "silhouette" else None
+    if best is None:
+        if method == "silhouette":
+            logger.info("k search: silhouette peaks at the largest candidate k; using the inertia elbow.")
+        best = _elbow(curve)
+
+    logger.info(
+        "k search (%s) on %d/%d rows: k=%d after %d candidates in %.2fs%s",
+        method, Xs.shape[0], n, best, len(curve), seconds, " (time budget hit)" if timed_out else "",
+    )
+    return KSearchResult(k=int(best), method=method, curve=curve, seconds=seconds, timed_out=timed_out)
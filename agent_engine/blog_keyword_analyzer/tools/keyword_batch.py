@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..schemas import KeywordRecord
+from .intent import INTENTS
+
+# Numeric columns carried by a batch. `volume` is int64, the rest float64.
+NUMERIC_COLUMNS = ("volume", "cpc", "kd", "clicks", "competition")
+
+
+def _object_array(values: Iterable) -> np.ndarray:
+    """Build a 1-D object array without NumPy trying to nest sequences."""
+    values = list(values)
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+@dataclass
+class KeywordBatch:
+    """
+    Array-backed collection of keywords shared by the clustering pipeline.
+
+    One row per keyword. String columns are object arrays; numeric columns are
+    NumPy arrays with a matching boolean mask in `present` (True = value set,
+    False = None in the equivalent KeywordRecord). Values under a False mask
+    are 0 (volume) or NaN (float columns) and must not be relied on.
+
+    KeywordRecord objects are only built on demand via `to_records()`.
+
+    `intent` holds per-keyword intent codes (index into `intent.INTENTS`)
+    once `annotate_intent_brand` has run, else None.
+    """
+
+    keyword: np.ndarray
+    volume: np.ndarray
+    cpc: np.ndarray
+    kd: np.ndarray
+    clicks: np.ndarray
+    competition: np.ndarray
+    present: Dict[str, np.ndarray]
+    url: np.ndarray
+    competition_label: np.ndarray
+    source: np.ndarray
+    locale: np.ndarray
+    intent: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.keyword.shape[0])
+
+    # -----------------------------------------------------------------
+    # Construction
+    # -----------------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: Sequence[KeywordRecord]) -> "KeywordBatch":
+        n = len(records)
+        numeric: Dict[str, np.ndarray] = {}
+        present: Dict[str, np.ndarray] = {}
+        for name in NUMERIC_COLUMNS:
+            raw = [getattr(r, name) for r in records]
+            mask = np.fromiter((v is not None for v in raw), dtype=bool, count=n)
+            if name == "volume":
+                vals = np.fromiter((v or 0 for v in raw), dtype=np.int64, count=n)
+            else:
+                vals = np.fromiter(
+                    (np.nan if v is None else v for v in raw), dtype=np.float64, count=n
+                )
+            numeric[name] = vals
+            present[name] = mask
+
+        return cls(
+            keyword=_object_array(r.keyword for r in records),
+            present=present,
+            url=_object_array(r.url for r in records),
+            competition_label=_object_array(r.competition_label for r in records),
+            source=_object_array(r.source for r in records),
+            locale=_object_array(r.locale for r in records),
+            **numeric,
+        )
+
+    @classmethod
+    def from_frame(cls, frame, source: str, locale: str) -> "KeywordBatch":
+        """
+        Build a batch from the cleaned frame produced by
+        `file_import._import_columns` (float64 columns, NaN = missing).
+        """
+        n = len(frame)
+        numeric: Dict[str, np.ndarray] = {}
+        present: Dict[str, np.ndarray] = {}
+        for name in NUMERIC_COLUMNS:
+            vals = frame[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            mask = ~np.isnan(vals)
+            if name == "volume":
+                vals = np.where(mask, vals, 0).astype(np.int64)
+            numeric[name] = vals
+            present[name] = mask
+
+        def text(col: str) -> np.ndarray:
+            return _object_array(
+                v if isinstance(v, str) and v else None for v in frame[col].tolist()
+            )
+
+        return cls(
+            keyword=_object_array(frame["keyword"].tolist()),
+            present=present,
+            url=text("url"),
+            competition_label=text("competition_label"),
+            source=np.full(n, source, dtype=object),
+            locale=np.full(n, locale, dtype=object),
+            **numeric,
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["KeywordBatch"]) -> "KeywordBatch":
+        """Row-wise concatenation of batches (at least one)."""
+        first = batches[0]
+        with_intent = all(b.intent is not None for b in batches)
+        return cls(
+            intent=np.concatenate([b.intent for b in batches]) if with_intent else None,
+            present={k: np.concatenate([b.present[k] for b in batches]) for k in first.present},
+            **{
+                name: np.concatenate([getattr(b, name) for b in batches])
+                for name in (
+                    "keyword", *NUMERIC_COLUMNS, "url", "competition_label", "source", "locale",
+                )
+            },
+        )
+
+    @classmethod
+    def coerce(
+        cls, records: Union["KeywordBatch", Sequence[KeywordRecord]]
+    ) -> "KeywordBatch":
+        """Accept either a batch or a list of KeywordRecord."""
+        if isinstance(records, KeywordBatch):
+            return records
+        return cls.from_records(list(records))
+
+    # -----------------------------------------------------------------
+    # Access
+    # -----------------------------------------------------------------
+
+    def values(self, name: str) -> np.ndarray:
+        """Numeric column as float64 with NaN where the value is missing."""
+        vals = getattr(self, name).astype(np.float64, copy=True)
+        vals[~self.present[name]] = np.nan
+        return vals
+
+    def take(self, idx: np.ndarray) -> "KeywordBatch":
+        """Row subset (index or boolean array) as a new batch."""
+        return KeywordBatch(
+            keyword=self.keyword[idx],
+            volume=self.volume[idx],
+            cpc=self.cpc[idx],
+            kd=self.kd[idx],
+            clicks=self.clicks[idx],
+            competition=self.competition[idx],
+            present={k: v[idx] for k, v in self.present.items()},
+            url=self.url[idx],
+            competition_label=self.competition_label[idx],
+            source=self.source[idx],
+            locale=self.locale[idx],
+            intent=None if self.intent is None else self.intent[idx],
+        )
+
+    def record(self, i: int) -> KeywordRecord:
+        p = self.present
+        return KeywordRecord(
+            keyword=self.keyword[i],
+            source=self.source[i],
+            locale=self.locale[i],
+            volume=int(self.volume[i]) if p["volume"][i] else None,
+            cpc=float(self.cpc[i]) if p["cpc"][i] else None,
+            kd=float(self.kd[i]) if p["kd"][i] else None,
+            clicks=float(self.clicks[i]) if p["clicks"][i] else None,
+            url=self.url[i],
+            competition=float(self.competition[i]) if p["competition"][i] else None,
+            competition_label=self.competition_label[i],
+            intent=None if self.intent is None else INTENTS[int(self.intent[i])],
+        )
+
+    def to_records(self, idx: Optional[np.ndarray] = None) -> List[KeywordRecord]:
+        rows = range(len(self)) if idx is None else np.asarray(idx).tolist()
+        return [self.record(i) for i in rows]
+
+
+def batch_groups(clusters: Sequence) -> List[Tuple[KeywordBatch, np.ndarray, np.ndarray]]:
+    """
+    Group clusters by the batch their `member_idx` points into: one
+    (batch, gather index, cluster row) triple per distinct batch, where the
+    gather index concatenates the members of that batch's clusters and the
+    cluster row gives each member's position in `clusters`. Clusters from
+    one pipeline run share a batch and form a single group; clusters built
+    from `members=` each carry their own. Clusters without a batch are skipped.
+    """
+    groups: Dict[int, Tuple[KeywordBatch, List[int]]] = {}
+    for i, cl in enumerate(clusters):
+        if cl.batch is not None and cl.member_idx is not None:
+            groups.setdefault(id(cl.batch), (cl.batch, []))[1].append(i)
+    out: List[Tuple[KeywordBatch, np.ndarray, np.ndarray]] = []
+    for batch, rows in groups.values():
+        idx = [np.asarray(clusters[i].member_idx, dtype=np.int64) for i in rows]
+        out.append((
+            batch,
+            np.concatenate(idx),
+            np.repeat(np.asarray(rows, dtype=np.int64), [len(a) for a in idx]),
+        ))
+    return out
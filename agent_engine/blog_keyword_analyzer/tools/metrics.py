@@ -33,11 +33,31 @@ class RunMetrics:
     keywords_clustered: int = 0
     keywords_not_clustered: int = 0
     clusters_created: int = 0
+    cluster_cache_hit: Optional[bool] = None
+    # incremental mode: keywords placed in an existing model cluster / new clusters
+    keywords_assigned_existing: Optional[int] = None
+    clusters_spawned: Optional[int] = None
+
+    # --- SerpAPI ingestion (None when keywords came from a file) ---
+    serp_requests: Optional[int] = None
+    serp_cache_hits: Optional[int] = None
+    serp_cache_misses: Optional[int] = None
+
+    # --- k selection ---
+    k_selected: Optional[int] = None
+    k_search_method: Optional[str] = None
+    k_search_seconds: float = 0.0
+    k_search_curve: List[Dict[str, Any]] = field(default_factory=list)
+
     clusters_used_for_topics: int = 0
     topics_generated_raw: int = 0
     topics_after_dedup: int = 0
     existing_topics_loaded: int = 0
+    existing_topics_sent: int = 0     # after relevance ranking / token budget
+    prompt_tokens_estimate: int = 0   # local estimate of the topic prompt size
     duplicates_dropped: int = 0
+    # one {"topic", "existing_title", "existing_url", "similarity", "match"} per dropped topic
+    duplicate_matches: List[Dict[str, Any]] = field(default_factory=list)
 
     # --- LLM / content-index metrics ---
     llm_requests: int = 0
@@ -97,6 +117,23 @@ class RunMetrics:
             }
         )
 
+    def set_k_search(
+        self,
+        k: int,
+        method: str,
+        curve: Optional[List[Dict[str, Any]]] = None,
+        seconds: float = 0.0,
+    ) -> None:
+        self.k_selected = k
+        self.k_search_method = method
+        self.k_search_curve = list(curve or [])
+        self.k_search_seconds = seconds
+
+    def set_serp_stats(self, requests: int, cache_hits: int, cache_misses: int) -> None:
+        self.serp_requests = requests
+        self.serp_cache_hits = cache_hits
+        self.serp_cache_misses = cache_misses
+
     def set_cluster_score_stats(self, scores: List[float]) -> None:
         if not scores:
             return
@@ -128,11 +165,24 @@ class RunMetrics:
             "keywords_clustered": self.keywords_clustered,
             "keywords_not_clustered": self.keywords_not_clustered,
             "clusters_created": self.clusters_created,
+            "cluster_cache_hit": self.cluster_cache_hit,
+            "keywords_assigned_existing": self.keywords_assigned_existing,
+            "clusters_spawned": self.clusters_spawned,
+            "serp_requests": self.serp_requests,
+            "serp_cache_hits": self.serp_cache_hits,
+            "serp_cache_misses": self.serp_cache_misses,
+            "k_selected": self.k_selected,
+            "k_search_method": self.k_search_method,
+            "k_search_seconds": self.k_search_seconds,
+            "k_search_curve": self.k_search_curve,
             "clusters_used_for_topics": self.clusters_used_for_topics,
             "topics_generated_raw": self.topics_generated_raw,
             "topics_after_dedup": self.topics_after_dedup,
             "existing_topics_loaded": self.existing_topics_loaded,
+            "existing_topics_sent": self.existing_topics_sent,
+            "prompt_tokens_estimate": self.prompt_tokens_estimate,
             "duplicates_dropped": self.duplicates_dropped,
+            "duplicate_matches": self.duplicate_matches,
             "llm_requests": self.llm_requests,
             "llm_failures": self.llm_failures,
             "llm_duration_seconds": self.llm_duration_seconds,
@@ -176,17 +226,38 @@ class RunMetrics:
         lines.append(f"  - keywords_clustered  : {self.keywords_clustered}")
         lines.append(f"  - keywords_not_clustered  : {self.keywords_not_clustered}")
         lines.append(f"  - clusters_created    : {self.clusters_created}")
+        if self.cluster_cache_hit is not None:
+            lines.append(f"  - cluster_cache_hit   : {self.cluster_cache_hit}")
+        if self.clusters_spawned is not None:
+            lines.append(f"  - assigned_existing   : {self.keywords_assigned_existing}")
+            lines.append(f"  - clusters_spawned    : {self.clusters_spawned}")
+        if self.serp_requests is not None:
+            lines.append(f"  - serp_requests       : {self.serp_requests}")
+            lines.append(
+                f"  - serp_cache          : {self.serp_cache_hits} hits / {self.serp_cache_misses} misses"
+            )
+        if self.k_selected is not None:
+            lines.append(
+                f"  - k_selected          : {self.k_selected} "
+                f"({self.k_search_method}, {len(self.k_search_curve)} candidates, "
+                f"{self.k_search_seconds:.3f} s)"
+            )
         lines.append(f"  - clusters_used       : {self.clusters_used_for_topics}")
         lines.append(f"  - topics_generated_raw: {self.topics_generated_raw}")
         lines.append(f"  - topics_after_dedup  : {self.topics_after_dedup}")
-        lines.append(f"  - existing_topics     : {self.existing_topics_loaded}")
+        lines.append(f"  - existing_topics     : {self.existing_topics_loaded} ({self.existing_topics_sent} sent)")
         lines.append(f"  - duplicates_dropped  : {self.duplicates_dropped}")
+        for m in self.duplicate_matches:
+            lines.append(
+                f"      {m['topic']!r} ~ {m['existing_title'] or m['existing_url']!r} "
+                f"({m['match']}, {m['similarity']:.2f}{'' if m.get('dropped', True) else ', kept'})"
+            )
 
         # LLM / content index
         lines.append(f"  - llm_requests        : {self.llm_requests}")
         lines.append(f"  - llm_failures        : {self.llm_failures}")
         lines.append(f"  - llm_duration_total  : {self.llm_duration_seconds:.3f} s")
-        lines.append(f"  - llm_prompt_tokens   : {self.llm_prompt_tokens}")
+        lines.append(f"  - llm_prompt_tokens   : {self.llm_prompt_tokens} (estimated {self.prompt_tokens_estimate})")
         lines.append(f"  - llm_completion_tokens  : {self.llm_completion_tokens}")
         total_tokens = self.llm_prompt_tokens + self.llm_completion_tokens
         lines.append(f"  - llm_total_tokens    : {total_tokens}")
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .phrase_mining import STOP_WORDS, WORD_RX
+
+# Universal hashing modulo a Mersenne prime; a * x + b stays below 2**64
+_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY = np.uint64(np.iinfo(np.uint32).max)
+
+
+def shingles(text: str) -> List[str]:
+    """
+    Word unigrams and bigrams of a title, stop words dropped, so "How to
+    Convert Excel to PDF in Python" and "Convert Excel to PDF with Python"
+    share every shingle while "... in Java" shares about half.
+    """
+    words = [w for w in WORD_RX.findall(text.lower()) if w not in STOP_WORDS]
+    return list(dict.fromkeys(words + [f"{a} {b}" for a, b in zip(words, words[1:])]))
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = 0.95) -> Tuple[int, int]:
+    """
+    (bands, rows) for banding `num_perm` signature values: the most rows
+    per band (fewest candidates) that still make a pair with Jaccard
+    `threshold` share a band with probability >= `recall`.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+@dataclass
+class MinHashLSH:
+    """
+    MinHash signatures of texts plus an LSH band index over them.
+
+    Each band of `rows` signature values is hashed to one uint64; per band
+    the keys are kept sorted, so a query is `bands` binary searches, and
+    only the texts sharing a band key are compared. Similarity is the
+    fraction of equal signature values, an estimate of the Jaccard
+    similarity of the shingle sets.
+    """
+
+    threshold: float = 0.7
+    num_perm: int = 128
+    seed: int = 1
+    signatures: np.ndarray = field(default=None, repr=False)  # (n, num_perm) uint64
+    _band_keys: List[np.ndarray] = field(default_factory=list, repr=False)
+    _band_ids: List[np.ndarray] = field(default_factory=list, repr=False)
+
+    def __post_init__(self) -> None:
+        rng = np.random.default_rng(self.seed)
+        self._a = rng.integers(1, int(_PRIME), self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), self.num_perm, dtype=np.uint64)
+        self.bands, self.rows = lsh_params(self.threshold, self.num_perm)
+        self._band_mix = rng.integers(1, np.iinfo(np.int64).max, self.rows, dtype=np.uint64) | np.uint64(1)
+        if self.signatures is None:
+            self.signatures = np.empty((0, self.num_perm), dtype=np.uint64)
+
+    def signature_matrix(self, texts: Sequence[str], chunk: int = 65536) -> np.ndarray:
+        """
+        (len(texts), num_perm) MinHash signatures. Shingles are crc32-hashed
+        and permuted in chunks, then reduced per text with minimum.reduceat;
+        a text without shingles gets a constant signature that matches
+        nothing else.
+        """
+        hashed = [[zlib.crc32(s.encode("utf-8")) for s in shingles(t)] for t in texts]
+        sizes = np.array([len(h) for h in hashed], dtype=np.int64)
+        flat = np.fromiter((x for h in hashed for x in h), dtype=np.uint64, count=int(sizes.sum()))
+        owner = np.repeat(np.arange(len(texts)), sizes)
+
+        sig = np.full((len(texts), self.num_perm), _EMPTY, dtype=np.uint64)
+        for lo in range(0, len(flat), chunk):
+            part, who = flat[lo:lo + chunk], owner[lo:lo + chunk]
+            perm = (self._a[None, :] * (part[:, None] % _PRIME) + self._b[None, :]) % _PRIME
+            starts = np.r_[0, np.flatnonzero(np.diff(who)) + 1]
+            rows = who[starts]
+            sig[rows] = np.minimum(sig[rows], np.minimum.reduceat(perm, starts, axis=0))
+        return sig
+
+    def _band_hashes(self, sig: np.ndarray) -> np.ndarray:
+        """(n, bands) uint64 keys; uint64 arithmetic wraps, which is fine for hashing."""
+        used = sig[:, : self.bands * self.rows].reshape(len(sig), self.bands, self.rows)
+        return (used * self._band_mix).sum(axis=2, dtype=np.uint64)
+
+    def index(self, texts: Sequence[str]) -> "MinHashLSH":
+        """Replace the index with `texts` (ids are positions in `texts`)."""
+        self.signatures = self.signature_matrix(texts)
+        keys = self._band_hashes(self.signatures)
+        self._band_keys, self._band_ids = [], []
+        for b in range(self.bands):
+            order = np.argsort(keys[:, b], kind="stable")
+            self._band_keys.append(keys[order, b])
+            self._band_ids.append(order)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def query(self, text: str) -> List[Tuple[int, float]]:
+        """Indexed texts with estimated Jaccard >= threshold, most similar first."""
+        sig = self.signature_matrix([text])
+        if not len(self) or sig[0, 0] == _EMPTY:
+            return []
+        keys = self._band_hashes(sig)[0]
+        found = []
+        for b in range(self.bands):
+            lo = np.searchsorted(self._band_keys[b], keys[b], side="left")
+            hi = np.searchsorted(self._band_keys[b], keys[b], side="right")
+            if hi > lo:
+                found.append(self._band_ids[b][lo:hi])
+        if not found:
+            return []
+        candidates = np.unique(np.concatenate(found))
+        similarity = (self.signatures[candidates] == sig[0]).mean(axis=1)
+        hits = similarity >= self.threshold
+        order = np.argsort(-similarity[hits], kind="stable")
+        return [(int(i), float(s)) for i, s in zip(candidates[hits][order], similarity[hits][order])]
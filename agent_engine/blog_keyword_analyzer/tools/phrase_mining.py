@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, CountVectorizer
+
+# Words kept inside a phrase ("excel to pdf", "save as pdf") but never at its edges
+CONNECTORS = frozenset({"to", "in", "for", "with", "of", "as", "from", "into", "vs", "on"})
+STOP_WORDS = frozenset(ENGLISH_STOP_WORDS) | {"vs", "using", "use", "way", "ways", "step", "easily", "free", "online"}
+
+WORD_RX = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+# Punctuation that ends a phrase (words across it never form a candidate)
+BREAK_RX = re.compile(r"[.,;:!?()\[\]{}|/\\\"“”'’…·•–—]+(?:\s|$)|\s[-–—|]\s|[\"“”()|…·•]")
+
+# Pseudo-volume of a phrase seen once in the #1 organic result
+PSEUDO_VOLUME_SCALE = 100
+
+
+@dataclass
+class SerpText:
+    """A title/snippet (`kind="snippet"`) or a related search / PAA question (`kind="query"`) with its SERP position (1-based)."""
+
+    text: str
+    position: int
+    kind: str = "snippet"
+
+
+def position_weight(position: np.ndarray) -> np.ndarray:
+    """DCG-style discount: 1 for position 1, ~0.63 for 2, ~0.29 for 10."""
+    return 1.0 / np.log2(1.0 + np.maximum(position, 1))
+
+
+def candidate_phrases(text: str, max_words: int = 4) -> List[str]:
+    """
+    Candidate keyphrases of one text: word n-grams (1..max_words) that stay
+    within one clause, contain no stop words other than CONNECTORS and do
+    not start or end with a connector or a bare number.
+    """
+    out: List[str] = []
+    for clause in BREAK_RX.split(text.lower()):
+        words = WORD_RX.findall(clause)
+        n = len(words)
+        for i in range(n):
+            w0 = words[i]
+            if w0 in STOP_WORDS or w0.isdigit():
+                continue
+            for j in range(i, min(n, i + max_words)):
+                w = words[j]
+                if w in STOP_WORDS and w not in CONNECTORS:
+                    break
+                if w in CONNECTORS or w.isdigit():
+                    continue
+                out.append(" ".join(words[i:j + 1]))
+    return out
+
+
+def mine_keyphrases(
+    texts: Sequence[SerpText],
+    max_phrases: int = 200,
+    max_words: int = 4,
+) -> List[Tuple[str, int]]:
+    """
+    Keyphrases with a pseudo-volume from SERP titles/snippets and queries.
+
+    RAKE-style scoring, all counts as sparse matrix products:
+
+    - X: text x candidate counts; every text is discounted by its SERP
+      position, so `freq = w @ X` is the position-weighted frequency
+    - W: candidate x word incidence; word score = degree / frequency over
+      all candidate occurrences, phrase quality = sum of its word scores
+    - rank = freq * log1p(quality); single words, and candidates found in
+      only one text when there are enough texts, are dropped, as is a
+      phrase that a longer kept phrase contains with at least the same
+      frequency
+
+    Queries (related searches, PAA questions) are real searches: each one
+    is kept whole as a keyphrase besides feeding candidate counts.
+
+    Pseudo-volume = PSEUDO_VOLUME_SCALE * position-weighted frequency, so a
+    phrase in the top result of several SERPs outranks one seen once on
+    page 3. Returned sorted by pseudo-volume, highest first.
+    """
+    if not texts:
+        return []
+
+    docs = [t.text for t in texts]
+    pos = np.array([t.position for t in texts], dtype=np.float64)
+    is_query = np.array([t.kind == "query" for t in texts])
+    w = position_weight(pos)
+
+    cv = CountVectorizer(analyzer=lambda s: candidate_phrases(s, max_words))
+    try:
+        X = cv.fit_transform(docs).tocsc()
+    except ValueError:  # no candidate in any text
+        X = None
+
+    phrases: Dict[str, float] = {}
+    if X is not None:
+        names = cv.get_feature_names_out()
+        freq = np.asarray(X.T @ w).ravel()
+        df = np.diff(X.indptr)  # texts containing each candidate (counts are per text)
+        occ = np.asarray(X.sum(axis=0)).ravel()
+
+        # RAKE word scores over the candidate vocabulary
+        wv = CountVectorizer(token_pattern=WORD_RX.pattern, lowercase=False, stop_words=list(CONNECTORS))
+        W = wv.fit_transform(names)
+        n_words = np.asarray(W.sum(axis=1)).ravel()
+        word_freq = W.T @ occ
+        word_deg = W.T @ (occ * n_words)
+        word_score = np.divide(word_deg, word_freq, out=np.zeros_like(word_deg, dtype=np.float64), where=word_freq > 0)
+        quality = W @ word_score
+
+        min_df = 2 if (~is_query).sum() >= 10 else 1
+        keep = (df >= min_df) & (n_words >= 2)  # single words are too broad for topics
+        rank = freq * np.log1p(quality)
+        top = [i for i in np.argsort(-rank, kind="stable") if keep[i]][: 3 * max_phrases]
+
+        padded = {i: f" {names[i]} " for i in top}
+        kept = [
+            i for i in top
+            if not any(j != i and freq[j] >= freq[i] and padded[i] in padded[j] for j in top)
+        ][:max_phrases]
+        phrases = {names[i]: float(freq[i]) for i in kept}
+
+    # Queries are kept whole (normalized); repeated queries add up
+    for t, wt in zip(texts, w):
+        if t.kind != "query":
+            continue
+        q = " ".join(WORD_RX.findall(t.text.lower()))
+        if q:
+            phrases[q] = phrases.get(q, 0.0) + float(wt)
+
+    ranked = sorted(phrases.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [(p, max(1, int(round(PSEUDO_VOLUME_SCALE * f)))) for p, f in ranked]
@@ -1,16 +1,21 @@
 from __future__ import annotations
-from typing import List, Optional
+from dataclasses import replace
+from typing import List, Union
+import numpy as np
 from ..schemas import KeywordRecord
+from .keyword_batch import KeywordBatch
 
-def preprocess(records: List[KeywordRecord]) -> List[KeywordRecord]:
-    cleaned: List[KeywordRecord] = []
-    for r in records:
-        if not r.keyword:
-            continue
-        kd = r.kd
-        if kd is not None:
-            if kd <= 1.0:
-                kd = kd * 100.0
-            kd = max(0.0, min(100.0, kd))
-        cleaned.append(KeywordRecord(**{**r.dict(), "kd": kd}))
-    return cleaned
+def preprocess(records: Union[KeywordBatch, List[KeywordRecord]]) -> KeywordBatch:
+    """Cleaned copy of the keywords; a batch passed in is left unchanged."""
+    batch = KeywordBatch.coerce(records)
+
+    keep = batch.keyword.astype(bool)
+    if not keep.all():
+        batch = batch.take(keep)
+
+    # KD given as 0..1 is scaled to percent, then clamped to 0..100
+    kd = batch.kd.copy()
+    has_kd = batch.present["kd"]
+    kd = np.where(has_kd & (kd <= 1.0), kd * 100.0, kd)
+    kd[has_kd] = np.clip(kd[has_kd], 0.0, 100.0)
+    return replace(batch, kd=kd)
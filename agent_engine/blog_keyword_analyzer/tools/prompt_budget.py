@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+from ..schemas import Cluster
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Fields of an existing post sent to the LLM (dedup context + internal link targets)
+PAYLOAD_FIELDS = ("title", "url", "slug", "platforms")
+
+_PIECE_RX = re.compile(r"\w+|[^\w\s]+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken's o200k_base encoding when the optional package is installed, else None."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as exc:  # encoding files not cached and no network
+        logger.debug("tiktoken encoding unavailable (%s); estimating tokens.", exc)
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token count of `text`: exact with tiktoken installed, otherwise a local
+    estimate of one token per started 4 characters of each word or
+    punctuation run (BPE vocabularies merge `","` and `/-` sequences).
+    """
+    enc = _encoding()
+    if enc is not None:
+        return len(enc.encode(text))
+    return sum((len(p) + 3) // 4 for p in _PIECE_RX.findall(text))
+
+
+def _post_text(post: Mapping[str, Any]) -> str:
+    slug = str(post.get("slug") or "").replace("-", " ")
+    return f"{post.get('title') or ''} {slug}"
+
+
+def bm25_scores(posts: Sequence[Mapping[str, Any]], queries: Sequence[str]) -> np.ndarray:
+    """
+    (len(posts), len(queries)) BM25 scores of each post (title + slug) for
+    each query, with idf over the posts. Query terms count once.
+    """
+    if not posts or not queries:
+        return np.zeros((len(posts), len(queries)))
+    cv = CountVectorizer(stop_words="english", token_pattern=r"(?u)\b\w[\w+#]*\b")
+    try:
+        tf = cv.fit_transform([_post_text(p) for p in posts]).tocsr().astype(np.float64)
+    except ValueError:  # no terms at all
+        return np.zeros((len(posts), len(queries)))
+
+    n = tf.shape[0]
+    df = np.bincount(tf.indices, minlength=tf.shape[1])
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    doc_len = np.asarray(tf.sum(axis=1)).ravel()
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / max(doc_len.mean(), 1e-9))
+
+    # Saturated term weights, in place on the sparse data
+    rows = np.repeat(np.arange(n), np.diff(tf.indptr))
+    tf.data = idf[tf.indices] * tf.data * (BM25_K1 + 1) / (tf.data + norm[rows])
+
+    q = cv.transform(queries)
+    q.data[:] = 1.0
+    return np.asarray((tf @ q.T).todense())
+
+
+def cluster_queries(clusters: Sequence[Cluster], max_keywords: int = 12) -> List[str]:
+    """One BM25 query per cluster: its label terms plus the keywords sent to the LLM."""
+    return [" ".join([*(c.label_terms or []), c.label or "", *c.keywords[:max_keywords]]) for c in clusters]
+
+
+def _ranked_candidates(scores: np.ndarray) -> Iterator[int]:
+    """
+    Post positions, best first: the clusters take turns, each contributing
+    its next best-matching post (BM25 > 0, newest first on ties); then
+    every post, newest first. Positions may repeat.
+    """
+    n, n_queries = scores.shape
+    newest_first = -np.arange(n)
+    ranked = []
+    for c in range(n_queries):
+        order = np.lexsort((newest_first, -scores[:, c]))
+        ranked.append(order[scores[order, c] > 0])
+    for r in range(max((len(x) for x in ranked), default=0)):
+        for order in ranked:
+            if r < len(order):
+                yield int(order[r])
+    yield from range(n - 1, -1, -1)
+
+
+def select_existing_topics(
+    existing_topics: Sequence[Mapping[str, Any]],
+    clusters: Sequence[Cluster],
+    token_budget: int,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    The existing posts to put in the topic prompt, compacted to
+    PAYLOAD_FIELDS, and their estimated token count.
+
+    When all of them do not fit in `token_budget` tokens, posts are taken
+    by BM25 relevance to the chosen clusters (each cluster in turn gets its
+    next closest post, so one cluster cannot crowd out the others), then
+    newest first, while their JSON fits; a title already sent is not sent
+    again. A budget of 0 or less keeps every post, in the original order.
+
+    The post-generation duplicate filter still checks every existing post,
+    so the budget bounds the prompt, not the dedup safety net.
+    """
+    compact = [{f: e.get(f) for f in PAYLOAD_FIELDS} for e in existing_topics]
+    costs = [estimate_tokens(json.dumps(c)) + 1 for c in compact]  # +1 for the list separator
+    if token_budget <= 0 or sum(costs) <= token_budget:
+        return compact, sum(costs)
+
+    scores = bm25_scores(existing_topics, cluster_queries(clusters))
+    min_cost = min(costs)
+    chosen: List[int] = []
+    seen_titles: set[str] = set()
+    seen: set[int] = set()
+    used = 0
+    for i in _ranked_candidates(scores):
+        if i in seen:
+            continue
+        seen.add(i)
+        title = str(compact[i].get("title") or "").lower().strip()
+        if (title and title in seen_titles) or used + costs[i] > token_budget:
+            continue
+        seen_titles.add(title)
+        chosen.append(i)
+        used += costs[i]
+        if token_budget - used < min_cost:
+            break
+    return [compact[i] for i in chosen], used
@@ -1,59 +1,314 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
-from ..schemas import Cluster
+import itertools
+from dataclasses import dataclass
+from typing import Any, Callable, List, Dict, Optional, Tuple, Union
+from ..schemas import Cluster, WeightSweepResult
+from .keyword_batch import batch_groups
 import numpy as np
 
-def _nz(vals):
-    return [float(v) for v in vals if v is not None]
+# Member-level columns aggregated per cluster
+AGG_COLUMNS = ("volume", "kd", "cpc", "competition")
 
-def _nrm(v: float, lo: float, hi: float) -> float:
-    if hi <= lo:
-        return 0.0
-    return (v - lo) / (hi - lo)
-
-def score_clusters(clusters: List[Cluster], weights: Dict[str, float]) -> List[Cluster]:
-    vols, kds, cpcs = [], [], []
-    for cl in clusters:
-        vols += _nz([m.volume for m in cl.members])
-        kds  += _nz([m.kd for m in cl.members])
-        cpcs += _nz([m.cpc for m in cl.members])
-
-    v_lo, v_hi = (min(vols), max(vols)) if vols else (0.0, 1.0)
-    kd_lo, kd_hi = (min(kds), max(kds)) if kds else (0.0, 100.0)
-    cpc_lo, cpc_hi = (min(cpcs), max(cpcs)) if cpcs else (0.0, 5.0)
-
-    intent_w = {"informational":0.25, "commercial":0.6, "transactional":1.0, "navigational":0.2}
-
-    for cl in clusters:
-        vols_c = _nz([m.volume for m in cl.members])
-        kds_c  = _nz([m.kd for m in cl.members])
-        cpcs_c = _nz([m.cpc for m in cl.members])
-        comps = [m.competition for m in cl.members if m.competition is not None]
-
-        avg_v = float(sum(vols_c)/len(vols_c)) if vols_c else 0.0
-        avg_kd = float(sum(kds_c)/len(kds_c)) if kds_c else 0.0
-        avg_cpc = float(sum(cpcs_c)/len(cpcs_c)) if cpcs_c else 0.0
-        avg_comp = float(np.mean(comps)) if comps else None
-
-        v_s = _nrm(avg_v, v_lo, v_hi)
-        kd_s = _nrm(avg_kd, kd_lo, kd_hi)
-        cpc_s = _nrm(avg_cpc, cpc_lo, cpc_hi)
-        brand_s = cl.metrics.brand_fit
-        intent_s = intent_w.get(cl.metrics.intent, 0.25)
-
-
-        score = (
-            weights["volume"] * v_s
-            - weights["kd"] * kd_s
-            + weights["cpc"] * cpc_s
-            + weights["brand"] * brand_s
-            + weights["intent"] * intent_s
+# Score features, in feature-matrix column order, and their sign in the score
+FEATURES = ("volume", "kd", "cpc", "brand", "intent")
+FEATURE_SIGNS = np.array([1.0, -1.0, 1.0, 1.0, 1.0])
+
+INTENT_WEIGHTS: Dict[str, float] = {
+    "informational": 0.25,
+    "commercial": 0.6,
+    "transactional": 1.0,
+    "navigational": 0.2,
+}
+
+# Range used when no member carries a value for the column
+_DEFAULT_RANGES: Dict[str, Tuple[float, float]] = {
+    "volume": (0.0, 1.0),
+    "kd": (0.0, 100.0),
+    "cpc": (0.0, 5.0),
+    "competition": (0.0, 1.0),
+}
+
+
+@dataclass
+class ColumnStats:
+    """Population statistics of one member-level column (missing values excluded)."""
+
+    n: int
+    lo: float
+    hi: float
+    mean: float
+    std: float
+
+
+@dataclass
+class ClusterAggregates:
+    """
+    Per-cluster sums / counts of member columns plus population stats.
+
+    `count[name][i]` / `total[name][i]` are the number and sum of non-missing
+    values of column `name` in cluster i.
+    """
+
+    count: Dict[str, np.ndarray]
+    total: Dict[str, np.ndarray]
+    stats: Dict[str, ColumnStats]
+
+    def mean(self, name: str) -> np.ndarray:
+        """Per-cluster average, 0.0 where a cluster has no values."""
+        cnt = self.count[name]
+        out = np.zeros_like(self.total[name])
+        np.divide(self.total[name], cnt, out=out, where=cnt > 0)
+        return out
+
+
+def _column_stats(name: str, vals: np.ndarray) -> ColumnStats:
+    if not vals.size:
+        lo, hi = _DEFAULT_RANGES[name]
+        return ColumnStats(n=0, lo=lo, hi=hi, mean=0.0, std=0.0)
+    return ColumnStats(
+        n=int(vals.size),
+        lo=float(vals.min()),
+        hi=float(vals.max()),
+        mean=float(vals.mean()),
+        std=float(vals.std()),
+    )
+
+
+def update_column_stats(name: str, st: Optional[ColumnStats], vals: np.ndarray) -> ColumnStats:
+    """
+    Fold more non-missing values of column `name` into running stats.
+
+    Means and variances are merged pairwise (Chan et al.), so streaming
+    chunk by chunk gives the same stats as one pass over all values.
+    """
+    if st is None or st.n == 0:
+        return _column_stats(name, vals)
+    if not vals.size:
+        return st
+    n_b = int(vals.size)
+    mean_b = float(vals.mean())
+    m2_b = float(((vals - mean_b) ** 2).sum())
+    n = st.n + n_b
+    delta = mean_b - st.mean
+    m2 = st.std ** 2 * st.n + m2_b + delta ** 2 * st.n * n_b / n
+    return ColumnStats(
+        n=n,
+        lo=min(st.lo, float(vals.min())),
+        hi=max(st.hi, float(vals.max())),
+        mean=st.mean + delta * n_b / n,
+        std=float(np.sqrt(max(m2, 0.0) / n)),
+    )
+
+
+def aggregate_clusters(clusters: List[Cluster]) -> ClusterAggregates:
+    """
+    Compute all cluster aggregates in one pass of grouped reductions.
+
+    Member indexes of the clusters sharing a batch are concatenated into one
+    gather index with a parallel label array (see `batch_groups`), so each
+    column costs one gather per batch and two bincounts.
+    """
+    nc = len(clusters)
+    groups = batch_groups(clusters)
+    labels = np.concatenate([rows for _, _, rows in groups]) if groups else np.empty(0, dtype=np.int64)
+
+    count: Dict[str, np.ndarray] = {}
+    total: Dict[str, np.ndarray] = {}
+    stats: Dict[str, ColumnStats] = {}
+    for name in AGG_COLUMNS:
+        vals = (
+            np.concatenate([batch.values(name)[idx] for batch, idx, _ in groups])
+            if groups else np.empty(0)
         )
-        cl.metrics.avg_volume = round(avg_v, 3)
-        cl.metrics.avg_kd = round(avg_kd, 3)
-        cl.metrics.avg_cpc = round(avg_cpc, 3)
-        cl.metrics.score = round(float(score), 6)
-        cl.metrics.avg_competition = avg_comp
+        ok = ~np.isnan(vals)
+        count[name] = np.bincount(labels, weights=ok.astype(np.float64), minlength=nc)
+        total[name] = np.bincount(labels, weights=np.where(ok, vals, 0.0), minlength=nc)
+        stats[name] = _column_stats(name, vals[ok])
+    return ClusterAggregates(count=count, total=total, stats=stats)
+
+
+# -------------------------------------------------------------------
+# Normalizers: (per-cluster values, population stats) -> normalized values
+# -------------------------------------------------------------------
+
+def _minmax(v: np.ndarray, st: ColumnStats) -> np.ndarray:
+    if st.hi <= st.lo:
+        return np.zeros_like(v)
+    return (v - st.lo) / (st.hi - st.lo)
+
+
+def _zscore(v: np.ndarray, st: ColumnStats) -> np.ndarray:
+    if st.std <= 0:
+        return np.zeros_like(v)
+    return (v - st.mean) / st.std
+
+
+def _log_minmax(v: np.ndarray, st: ColumnStats) -> np.ndarray:
+    lo, hi = np.log1p(max(st.lo, 0.0)), np.log1p(max(st.hi, 0.0))
+    if hi <= lo:
+        return np.zeros_like(v)
+    return (np.log1p(np.maximum(v, 0.0)) - lo) / (hi - lo)
+
+
+NORMALIZERS: Dict[str, Callable[[np.ndarray, ColumnStats], np.ndarray]] = {
+    "minmax": _minmax,
+    "zscore": _zscore,
+    "log": _log_minmax,
+}
+
+
+# Features whose normalizer can be chosen per run
+NORMALIZED_FEATURES = ("volume", "kd", "cpc")
+
+
+def _resolve_normalizers(normalizers: Optional[Dict[str, str]]) -> Dict[str, Callable]:
+    chosen = {name: "minmax" for name in NORMALIZED_FEATURES}
+    for feature, norm in (normalizers or {}).items():
+        if feature not in chosen:
+            raise ValueError(f"Unknown normalized feature '{feature}'; expected one of {sorted(chosen)}")
+        if norm not in NORMALIZERS:
+            raise ValueError(f"Unknown normalizer '{norm}'; expected one of {sorted(NORMALIZERS)}")
+        chosen[feature] = norm
+    return {feature: NORMALIZERS[norm] for feature, norm in chosen.items()}
+
+
+def _intent_value(cl: Cluster) -> float:
+    """Expected intent weight over the cluster's intent distribution (dominant intent without one)."""
+    dist = cl.metrics.intent_distribution
+    if dist:
+        return sum(share * INTENT_WEIGHTS.get(intent, 0.25) for intent, share in dist.items())
+    return INTENT_WEIGHTS.get(cl.metrics.intent, 0.25)
+
+
+def build_feature_matrix(
+    clusters: List[Cluster],
+    normalizers: Optional[Dict[str, str]] = None,
+    agg: Optional[ClusterAggregates] = None,
+) -> np.ndarray:
+    """
+    Cluster-feature matrix F of shape (n_clusters, len(FEATURES)).
+
+    Scores for any weight dict are `F @ weight_vector(weights)`.
+    """
+    if agg is None:
+        agg = aggregate_clusters(clusters)
+    norm = _resolve_normalizers(normalizers)
+
+    brand = np.fromiter((cl.metrics.brand_fit for cl in clusters), dtype=np.float64, count=len(clusters))
+    intent = np.fromiter((_intent_value(cl) for cl in clusters), dtype=np.float64, count=len(clusters))
+    return np.column_stack([
+        norm["volume"](agg.mean("volume"), agg.stats["volume"]),
+        norm["kd"](agg.mean("kd"), agg.stats["kd"]),
+        norm["cpc"](agg.mean("cpc"), agg.stats["cpc"]),
+        brand,
+        intent,
+    ]) if clusters else np.empty((0, len(FEATURES)))
+
+
+def weight_vector(weights: Dict[str, float]) -> np.ndarray:
+    """Signed weights aligned with FEATURES (KD counts against a cluster)."""
+    return np.array([weights[f] for f in FEATURES], dtype=np.float64) * FEATURE_SIGNS
+
+
+def score_clusters(
+    clusters: List[Cluster],
+    weights: Dict[str, float],
+    normalizers: Optional[Dict[str, str]] = None,
+    agg: Optional[ClusterAggregates] = None,
+) -> List[Cluster]:
+    """
+    Fill cluster metrics (averages + score) and sort clusters by score, descending.
+
+    `normalizers` maps "volume" / "kd" / "cpc" to a NORMALIZERS key
+    (default "minmax" for all three). Pass precomputed `agg` (aligned with
+    `clusters`) when members are not all in memory, e.g. streamed clusters.
+    """
+    if agg is None:
+        agg = aggregate_clusters(clusters)
+    features = build_feature_matrix(clusters, normalizers, agg=agg)
+    scores = features @ weight_vector(weights)
+
+    avg_v = agg.mean("volume")
+    avg_kd = agg.mean("kd")
+    avg_cpc = agg.mean("cpc")
+    avg_comp = agg.mean("competition")
+    has_comp = agg.count["competition"] > 0
+
+    for i, cl in enumerate(clusters):
+        cl.metrics.avg_volume = round(float(avg_v[i]), 3)
+        cl.metrics.avg_kd = round(float(avg_kd[i]), 3)
+        cl.metrics.avg_cpc = round(float(avg_cpc[i]), 3)
+        cl.metrics.score = round(float(scores[i]), 6)
+        cl.metrics.avg_competition = float(avg_comp[i]) if has_comp[i] else None
 
     clusters.sort(key=lambda c: c.metrics.score, reverse=True)
     return clusters
+
+
+# -------------------------------------------------------------------
+# Weight sweeps
+# -------------------------------------------------------------------
+
+def expand_weight_grid(
+    spec: Union[Dict[str, Any], List[Dict[str, float]]],
+    base: Dict[str, float],
+) -> List[Dict[str, float]]:
+    """
+    Turn a sweep spec into a list of complete weight dicts.
+
+    - list of dicts: each dict overrides `base`
+    - dict of lists (or scalars): cartesian product over the listed values
+    """
+    if isinstance(spec, list):
+        configs = [{**base, **{k: float(v) for k, v in item.items()}} for item in spec]
+    elif isinstance(spec, dict):
+        keys = list(spec)
+        axes = [v if isinstance(v, (list, tuple)) else [v] for v in spec.values()]
+        configs = [
+            {**base, **{k: float(v) for k, v in zip(keys, combo)}}
+            for combo in itertools.product(*axes)
+        ]
+    else:
+        raise ValueError("Weight sweep must be a list of weight dicts or a dict of value lists.")
+
+    for cfg in configs:
+        unknown = set(cfg) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown weight keys {sorted(unknown)}; expected {list(FEATURES)}")
+    return configs
+
+
+def sweep_weights(
+    clusters: List[Cluster],
+    weight_configs: List[Dict[str, float]],
+    normalizers: Optional[Dict[str, str]] = None,
+    top_n: Optional[int] = None,
+    agg: Optional[ClusterAggregates] = None,
+) -> List[WeightSweepResult]:
+    """
+    Rank one clustering result under many weight configurations.
+
+    The cluster-feature matrix is built once; all configurations are scored
+    with a single (configs x features) @ (features x clusters) product.
+    Clusters are not modified. `agg` (aligned with `clusters`) replaces the
+    member-level aggregation, e.g. for streamed clusters.
+    """
+    if not weight_configs:
+        return []
+    features = build_feature_matrix(clusters, normalizers, agg=agg)
+    W = np.vstack([weight_vector(w) for w in weight_configs])
+    scores = np.round(W @ features.T, 6)
+
+    # Stable sort on -score matches score_clusters' tie order
+    order = np.argsort(-scores, axis=1, kind="stable")
+    if top_n is not None:
+        order = order[:, :top_n]
+
+    ids = [cl.cluster_id for cl in clusters]
+    return [
+        WeightSweepResult(
+            weights=cfg,
+            ranking=[(ids[j], float(scores[row, j])) for j in order[row]],
+        )
+        for row, cfg in enumerate(weight_configs)
+    ]
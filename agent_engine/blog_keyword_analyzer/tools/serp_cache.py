@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+CacheKey = Tuple[str, str, str, str, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS serp_cache (
+    engine      TEXT    NOT NULL,
+    q           TEXT    NOT NULL,
+    hl          TEXT    NOT NULL,
+    gl          TEXT    NOT NULL,
+    page        INTEGER NOT NULL,
+    version     INTEGER NOT NULL,
+    fetched_at  REAL    NOT NULL,
+    accessed_at REAL    NOT NULL,
+    body        BLOB    NOT NULL,
+    PRIMARY KEY (engine, q, hl, gl, page)
+);
+CREATE INDEX IF NOT EXISTS serp_cache_accessed ON serp_cache (accessed_at);
+"""
+
+
+def cache_key(params: Dict[str, Any]) -> CacheKey:
+    """
+    (engine, q, hl, gl, page) of a SerpAPI /search request. The query is
+    case- and whitespace-normalized; `api_key` is never part of the key.
+    """
+    q = " ".join(str(params.get("q", "")).lower().split())
+    page = int(params.get("start") or 0) // 10
+    return (
+        str(params.get("engine") or "google"),
+        q,
+        str(params.get("hl", "")),
+        str(params.get("gl", "")),
+        page,
+    )
+
+
+class SerpCache:
+    """
+    SQLite-backed SerpAPI response cache shared by every run on this machine.
+
+    - entries older than `ttl_seconds` are misses (and deleted on eviction)
+    - after each write, expired entries go first, then least-recently-read
+      ones until the stored bodies fit in `max_bytes`
+    - concurrent requests for the same key inside this process are
+      coalesced: one fetch, every caller gets its result
+
+    `hits`, `misses` and `coalesced` count lookups since creation.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[CacheKey, threading.Event] = {}
+        self._inflight_async: Dict[CacheKey, asyncio.Future] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # -- storage --------------------------------------------------------
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Cached response for `key`, or None when missing, expired or unreadable."""
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT body, fetched_at, version FROM serp_cache "
+                    "WHERE engine=? AND q=? AND hl=? AND gl=? AND page=?",
+                    key,
+                ).fetchone()
+                if row is None or row[2] != CACHE_VERSION or now - row[1] > self.ttl_seconds:
+                    return None
+                conn.execute(
+                    "UPDATE serp_cache SET accessed_at=? "
+                    "WHERE engine=? AND q=? AND hl=? AND gl=? AND page=?",
+                    (now, *key),
+                )
+            return json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError) as exc:
+            logger.warning("SERP cache read failed for %r: %s", key, exc)
+            return None
+
+    def put(self, key: CacheKey, data: Dict[str, Any]) -> None:
+        now = time.time()
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO serp_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, CACHE_VERSION, now, now, body),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as exc:
+            logger.warning("SERP cache write failed for %r: %s", key, exc)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute(
+            "DELETE FROM serp_cache WHERE fetched_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM serp_cache").fetchone()[0]
+        removed = 0
+        if total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT rowid, LENGTH(body) FROM serp_cache ORDER BY accessed_at"
+            ).fetchall()
+            drop = []
+            for rowid, size in rows[:-1]:  # never evict the newest entry
+                if total <= self.max_bytes:
+                    break
+                drop.append((rowid,))
+                total -= size
+            conn.executemany("DELETE FROM serp_cache WHERE rowid=?", drop)
+            removed = len(drop)
+        if expired or removed:
+            logger.info("SERP cache: dropped %d expired and %d LRU entries", expired, removed)
+
+    # -- lookups with coalescing -----------------------------------------
+
+    def get_or_fetch(
+        self,
+        params: Dict[str, Any],
+        fetch: Callable[[], Optional[Dict[str, Any]]],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached response for `params`, calling `fetch()` on a miss. Threads
+        asking for a key that is already being fetched wait for that fetch.
+        `None` results (failed requests) are not cached.
+        """
+        key = cache_key(params)
+        while True:
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    self._inflight[key] = threading.Event()
+                    break
+                self.coalesced += 1
+            event.wait()
+            # The owner has stored its result; if it failed, fetch ourselves
+            data = self.get(key)
+            if data is not None:
+                return data
+
+        try:
+            data = self.get(key)
+            if data is not None:
+                with self._lock:
+                    self.hits += 1
+                return data
+            with self._lock:
+                self.misses += 1
+            data = fetch()
+            if data is not None:
+                self.put(key, data)
+            return data
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    async def aget_or_fetch(
+        self,
+        params: Dict[str, Any],
+        fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """`get_or_fetch` for coroutines: one in-flight fetch per key per event loop."""
+        key = cache_key(params)
+        pending = self._inflight_async.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_async[key] = future
+        try:
+            data = await fetch()
+            if data is not None:
+                self.put(key, data)
+            future.set_result(data)
+            return data
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            if self._inflight_async.get(key) is future:
+                del self._inflight_async[key]
+
+
+@lru_cache(maxsize=4)
+def _open(path: str, ttl_seconds: float, max_bytes: int) -> SerpCache:
+    return SerpCache(Path(path), ttl_seconds, max_bytes)
+
+
+def open_serp_cache(path: Path) -> Optional[SerpCache]:
+    """
+    Process-wide SerpCache at `path` (one instance per path, so coalescing
+    spans every caller), or None when SERPAPI_CACHE_TTL_HOURS is 0.
+    """
+    ttl = settings.SERPAPI_CACHE_TTL_HOURS * 3600.0
+    if ttl <= 0:
+        return None
+    return _open(str(Path(path).resolve()), ttl, settings.SERPAPI_CACHE_MAX_MB * 1024 * 1024)
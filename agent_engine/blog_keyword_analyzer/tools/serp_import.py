@@ -1,12 +1,36 @@
 # src/agents/kra/tools/serp_import.py
 from __future__ import annotations
 
-import requests
+import asyncio
+import logging
 import re
-from typing import List, Optional, Tuple
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import requests
 
 from ..config import settings
 from ..schemas import KeywordRecord
+from .phrase_mining import SerpText, mine_keyphrases
+from .serp_cache import SerpCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SerpStats:
+    """SerpAPI usage of one fetch/harvest call (`requests` = paid API calls)."""
+
+    requests: int = 0
+    failures: int = 0
+    queries: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    skipped: int = 0  # not sent: the request budget was spent
+    seconds: float = 0.0
 
 
 def _locale_to_hl_gl(locale: str) -> Tuple[str, str]:
@@ -31,19 +55,24 @@ def fetch_serp_keywords(
     product: str,
     locale: str = "en-US",
     max_keywords: int = 50,
+    cache: Optional[SerpCache] = None,
+    stats: Optional[SerpStats] = None,
 ) -> List[KeywordRecord]:
     """
     Use SerpAPI to pull search-intent-enriched keywords from Google SERPs.
 
     Strategy:
       - Build a query from product + topic.
-      - Pull organic result titles/snippets.
-      - Pull 'People Also Ask' / related searches when present.
+      - Mine short keyphrases from organic result titles/snippets.
+      - Add 'People Also Ask' / related searches when present.
       - Deduplicate and normalize into KeywordRecord instances.
 
-    NOTE: Google SERP does not provide search volume/KD/CPC,
-    so we leave those fields as None and let your scoring logic
-    treat volume=0 or use fallbacks.
+    NOTE: Google SERP does not provide search volume/KD/CPC. `volume`
+    is a pseudo-volume from how often and how high up a phrase appears
+    (see phrase_mining.mine_keyphrases); KD/CPC stay None.
+
+    With `cache`, a response fetched within the cache TTL is reused and
+    no API credit is spent.
     """
     if not settings.SERPAPI_API_KEY:
         raise RuntimeError("SERPAPI_API_KEY is not configured in settings/.env")
@@ -59,39 +88,74 @@ def fetch_serp_keywords(
         "api_key": settings.SERPAPI_API_KEY,
     }
 
-    resp = requests.get("https://serpapi.com/search", params=params, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
+    stats = stats if stats is not None else SerpStats()
 
-    keywords: List[str] = []
+    def fetch() -> Dict[str, Any]:
+        stats.requests += 1
+        resp = requests.get(f"{settings.SERPAPI_BASE_URL.rstrip('/')}/search", params=params, timeout=30)
+        resp.raise_for_status()
+        return resp.json()
 
-    # 1) Organic result titles/snippets
-    for item in data.get("organic_results", []):
-        title = item.get("title") or ""
-        if title:
-            keywords.append(title)
-        snippet = item.get("snippet") or ""
-        if snippet:
-            # we can split snippet into smaller phrases, but keep it simple for now
-            keywords.append(snippet)
+    stats.queries = 1
+    if cache is None:
+        data = fetch()
+    else:
+        requests_before = stats.requests
+        data = cache.get_or_fetch(params, fetch)
+        if stats.requests == requests_before:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+    return _to_records(mine_keyphrases(_extract_texts(data), max_phrases=max_keywords), locale, max_keywords)
+
+
+def _extract_texts(data: Dict[str, Any], start: int = 0) -> List[SerpText]:
+    """Titles/snippets and PAA / related-search queries of one SerpAPI response, with positions."""
+    texts: List[SerpText] = []
+
+    # 1) Organic result titles/snippets (position is absolute across pages)
+    for i, item in enumerate(data.get("organic_results", [])):
+        position = int(item.get("position") or start + i + 1)
+        for field in ("title", "snippet"):
+            text = item.get(field) or ""
+            if text:
+                texts.append(SerpText(text, position))
 
     # 2) People Also Ask / related questions
-    for item in data.get("related_questions", []) or data.get("people_also_ask", []):
+    for i, item in enumerate(data.get("related_questions", []) or data.get("people_also_ask", [])):
         question = item.get("question") or item.get("title") or ""
         if question:
-            keywords.append(question)
+            texts.append(SerpText(question, i + 1, kind="query"))
 
     # 3) Related searches
-    for item in data.get("related_searches", []):
+    for i, item in enumerate(data.get("related_searches", [])):
         rel = item.get("query") or item.get("title") or ""
         if rel:
-            keywords.append(rel)
+            texts.append(SerpText(rel, i + 1, kind="query"))
+    return texts
 
+
+def _expansion_queries(data: Dict[str, Any]) -> List[str]:
+    """Follow-up queries from a response: related searches, then PAA questions."""
+    out: List[str] = []
+    for item in data.get("related_searches", []):
+        q = item.get("query") or ""
+        if q:
+            out.append(q)
+    for item in data.get("related_questions", []) or data.get("people_also_ask", []):
+        q = item.get("question") or ""
+        if q:
+            out.append(q)
+    return out
+
+
+def _to_records(phrases: List[Tuple[str, int]], locale: str, max_keywords: int) -> List[KeywordRecord]:
     # Normalize/dedupe
     seen = set()
     normalized_keywords: List[KeywordRecord] = []
 
-    for kw in keywords:
+    for kw, volume in phrases:
         kw_clean = kw.strip()
         if not kw_clean:
             continue
@@ -107,7 +171,7 @@ def fetch_serp_keywords(
                 keyword=kw_clean,
                 source="serpapi",
                 locale=locale,
-                volume=None,
+                volume=volume,
                 cpc=None,
                 kd=None,
                 clicks=None,
@@ -121,3 +185,208 @@ def fetch_serp_keywords(
             break
 
     return normalized_keywords
+
+
+# -------------------------------------------------------------------
+# Async multi-query harvesting
+# -------------------------------------------------------------------
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second on average, bursts of up
+    to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+@dataclass
+class _SerpTask:
+    depth: int
+    query: str
+    start: int = 0
+
+
+async def _fetch_json(
+    client: httpx.AsyncClient,
+    params: Dict[str, Any],
+    limiter: asyncio.Semaphore,
+    bucket: TokenBucket,
+    stats: SerpStats,
+    cache: Optional[SerpCache] = None,
+    max_requests: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    fetched = False
+
+    async def fetch() -> Optional[Dict[str, Any]]:
+        nonlocal fetched
+        fetched = True
+        async with limiter:
+            await bucket.acquire()
+            # No await between the check and the count, so the budget is exact
+            if max_requests is not None and stats.requests >= max_requests:
+                stats.skipped += 1
+                return None
+            stats.requests += 1
+            try:
+                resp = await client.get("/search", params=params)
+                resp.raise_for_status()
+                return resp.json()
+            except (httpx.HTTPError, ValueError) as exc:
+                stats.failures += 1
+                logger.warning("SerpAPI request failed for q=%r start=%s: %s", params.get("q"), params.get("start"), exc)
+                return None
+
+    if cache is None:
+        return await fetch()
+    # Cache hits skip the concurrency limit and the rate limiter
+    data = await cache.aget_or_fetch(params, fetch)
+    if fetched:
+        stats.cache_misses += 1
+    else:
+        stats.cache_hits += 1
+    return data
+
+
+async def harvest_serp_keywords_async(
+    topic: str,
+    product: str,
+    locale: str = "en-US",
+    max_keywords: int = 500,
+    platforms: Optional[Sequence[str]] = None,
+    max_pages: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_requests: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    rate_per_sec: Optional[float] = None,
+    base_url: Optional[str] = None,
+    stats: Optional[SerpStats] = None,
+    cache: Optional[SerpCache] = None,
+) -> List[KeywordRecord]:
+    """
+    Breadth-first SerpAPI harvesting from "{product} {topic}".
+
+    Seeds are the base query plus one variant per platform. Every response
+    adds its titles, snippets and queries and, up to `max_depth`, its
+    related searches and PAA questions as new queries; result pages
+    2..`max_pages` are fetched via `start`. Queries are fetched in BFS
+    order, in rounds of `concurrency` requests over one pooled
+    `httpx.AsyncClient` (`rate_per_sec` token bucket). After every round
+    keyphrases are mined from all texts so far (so a phrase repeated across
+    SERPs gets a higher pseudo-volume), and the harvest stops as soon as
+    they yield `max_keywords` records. No paid request is sent past
+    `max_requests` (default SERPAPI_MAX_REQUESTS); cache hits are free.
+
+    `base_url` (default SERPAPI_BASE_URL) can point at a local replay server,
+    see scripts/serp_replay_server.py. With `cache`, responses fetched within
+    the cache TTL are reused instead of spending API credits.
+    """
+    if not settings.SERPAPI_API_KEY:
+        raise RuntimeError("SERPAPI_API_KEY is not configured in settings/.env")
+
+    max_pages = max_pages or settings.SERPAPI_MAX_PAGES
+    max_depth = settings.SERPAPI_MAX_DEPTH if max_depth is None else max_depth
+    max_requests = settings.SERPAPI_MAX_REQUESTS if max_requests is None else max_requests
+    concurrency = concurrency or settings.SERPAPI_CONCURRENCY
+    rate_per_sec = settings.SERPAPI_RATE_PER_SEC if rate_per_sec is None else rate_per_sec
+    stats = stats if stats is not None else SerpStats()
+    hl, gl = _locale_to_hl_gl(locale)
+
+    base = f"{product} {topic}".strip()
+    seeds = [base] + [f"{base} {p}" for p in (platforms or [])]
+
+    seen_queries: set[str] = set()
+    pending: Deque[_SerpTask] = deque()
+    for q in seeds:
+        if q.lower() not in seen_queries:
+            seen_queries.add(q.lower())
+            pending.append(_SerpTask(depth=0, query=q))
+
+    texts: List[SerpText] = []
+    records: List[KeywordRecord] = []
+    limiter = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate_per_sec)
+    t0 = time.perf_counter()
+
+    async with httpx.AsyncClient(
+        base_url=(base_url or settings.SERPAPI_BASE_URL).rstrip("/"),
+        timeout=30,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    ) as client:
+        while pending and len(records) < max_keywords and stats.requests < max_requests:
+            batch = [pending.popleft() for _ in range(min(concurrency, len(pending)))]
+            params = [
+                {
+                    "engine": settings.SERPAPI_ENGINE or "google",
+                    "q": task.query,
+                    "hl": hl,
+                    "gl": gl,
+                    "api_key": settings.SERPAPI_API_KEY,
+                    **({"start": task.start} if task.start else {}),
+                }
+                for task in batch
+            ]
+            responses = await asyncio.gather(
+                *(_fetch_json(client, p, limiter, bucket, stats, cache, max_requests) for p in params)
+            )
+
+            # Results are consumed in request order, so output does not
+            # depend on which request finished first.
+            for task, data in zip(batch, responses):
+                if not data:
+                    continue
+                # Repeats are kept: they raise the phrase's pseudo-volume
+                texts.extend(_extract_texts(data, start=task.start))
+
+                page = task.start // 10 + 1
+                if page < max_pages and data.get("organic_results"):
+                    pending.append(_SerpTask(depth=task.depth, query=task.query, start=task.start + 10))
+                if task.depth < max_depth:
+                    for q in _expansion_queries(data):
+                        if q.lower() not in seen_queries:
+                            seen_queries.add(q.lower())
+                            pending.append(_SerpTask(depth=task.depth + 1, query=q))
+
+            # Count what would be emitted: deduplicated keyphrases, not raw texts
+            records = _to_records(mine_keyphrases(texts, max_phrases=max_keywords), locale, max_keywords)
+
+    stats.queries = len(seen_queries)
+    stats.seconds = time.perf_counter() - t0
+    logger.info(
+        "SERP harvest: %d keyphrases from %d texts, %d requests (%d failed, %d over budget, %d queries, "
+        "%d cache hits) in %.2fs",
+        len(records), len(texts), stats.requests, stats.failures, stats.skipped, stats.queries,
+        stats.cache_hits, stats.seconds,
+    )
+    return records
+
+
+def harvest_serp_keywords(
+    topic: str,
+    product: str,
+    locale: str = "en-US",
+    max_keywords: int = 500,
+    **kwargs: Any,
+) -> List[KeywordRecord]:
+    """Blocking wrapper around `harvest_serp_keywords_async`."""
+    return asyncio.run(
+        harvest_serp_keywords_async(topic, product, locale=locale, max_keywords=max_keywords, **kwargs)
+    )
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from ..config import settings
+from ..schemas import Cluster, ClusterMetrics
+from .cluster import _cluster_term_weights, _top_terms
+from .cluster_backends import HASHING_PARAMS, KMEANS_PARAMS, label_matrix
+from .k_search import search_k
+from .keyword_batch import KeywordBatch
+from .metrics import RunMetrics
+from .scoring import AGG_COLUMNS, ClusterAggregates, ColumnStats, update_column_stats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamClusterResult:
+    """
+    Clusters built without holding the keyword file in memory.
+
+    `clusters` only carry a top-by-volume member sample (`n_members` is the
+    full count); `agg` holds the full-population aggregates, aligned with
+    `clusters`, for `score_clusters(..., agg=...)`.
+    """
+
+    clusters: List[Cluster]
+    agg: ClusterAggregates
+    keywords: int
+
+
+def _keep_top_members(
+    sample: KeywordBatch,
+    sample_labels: np.ndarray,
+    per_cluster: int,
+) -> np.ndarray:
+    """
+    Row indexes of `sample` keeping the `per_cluster` highest-volume rows of
+    each cluster (ties and missing volume go to the earlier row).
+    """
+    volume = np.where(sample.present["volume"], sample.volume, -1)
+    order = np.lexsort((np.arange(len(sample)), -volume, sample_labels))
+    grouped = sample_labels[order]
+    starts = np.searchsorted(grouped, grouped, side="left")
+    rank = np.arange(order.size) - starts
+    return order[rank < per_cluster]
+
+
+def stream_cluster(
+    batches: Callable[[], Iterable[KeywordBatch]],
+    k: Optional[int] = None,
+    k_search: str = "elbow",
+    metrics: Optional[RunMetrics] = None,
+    label_terms: int = 5,
+    label_method: str = "tfidf",
+    sample_per_cluster: int = 200,
+) -> StreamClusterResult:
+    """
+    Two-pass HashingVectorizer + MiniBatchKMeans clustering over keyword chunks.
+
+    `batches` must return a fresh iterator over the same chunks on each call
+    (e.g. re-reading the file):
+
+    1. `partial_fit` on every chunk; k is `k` or `search_k` on the first chunk.
+    2. `predict` every chunk, folding member counts, column sums/counts and
+       population stats into running aggregates and keeping the top
+       `sample_per_cluster` members per cluster by volume.
+
+    Label terms are computed from the member samples. Memory is bounded by
+    the chunk size, k x hashing features for the centroids and the samples.
+    """
+    vectorizer = HashingVectorizer(**HASHING_PARAMS)
+
+    # --- Pass 1: fit centroids ---
+    kmeans: Optional[MiniBatchKMeans] = None
+    for batch in batches():
+        if not len(batch):
+            continue
+        X = vectorizer.transform(batch.keyword.tolist())
+        if kmeans is None:
+            if k:
+                k_final, method = k, "forced"
+            else:
+                found = search_k(
+                    X,
+                    method=k_search,
+                    volume=batch.values("volume"),
+                    time_budget_s=settings.KRA_K_SEARCH_MAX_SECONDS,
+                    n_jobs=settings.KRA_K_SEARCH_JOBS,
+                )
+                k_final, method = found.k, f"{found.method} (first chunk)"
+            k_final = min(k_final, X.shape[0])
+            if metrics is not None:
+                metrics.set_k_search(k_final, method)
+            kmeans = MiniBatchKMeans(n_clusters=k_final, **KMEANS_PARAMS)
+        kmeans.partial_fit(X)
+
+    if kmeans is None:
+        empty = ClusterAggregates(count={}, total={}, stats={})
+        return StreamClusterResult(clusters=[], agg=empty, keywords=0)
+
+    # --- Pass 2: assign, aggregate, sample ---
+    nc = kmeans.n_clusters
+    n_members = np.zeros(nc, dtype=np.int64)
+    first_row = np.full(nc, np.iinfo(np.int64).max, dtype=np.int64)
+    count = {name: np.zeros(nc) for name in AGG_COLUMNS}
+    total = {name: np.zeros(nc) for name in AGG_COLUMNS}
+    stats: Dict[str, Optional[ColumnStats]] = {name: None for name in AGG_COLUMNS}
+    sample: Optional[KeywordBatch] = None
+    sample_labels = np.empty(0, dtype=np.int64)
+    offset = 0
+
+    for batch in batches():
+        if not len(batch):
+            continue
+        labels = kmeans.predict(vectorizer.transform(batch.keyword.tolist())).astype(np.int64)
+
+        n_members += np.bincount(labels, minlength=nc)
+        rows = offset + np.arange(labels.size)
+        np.minimum.at(first_row, labels, rows)
+        offset += labels.size
+
+        for name in AGG_COLUMNS:
+            vals = batch.values(name)
+            ok = ~np.isnan(vals)
+            count[name] += np.bincount(labels, weights=ok.astype(np.float64), minlength=nc)
+            total[name] += np.bincount(labels, weights=np.where(ok, vals, 0.0), minlength=nc)
+            stats[name] = update_column_stats(name, stats[name], vals[ok])
+
+        sample = batch if sample is None else KeywordBatch.concat([sample, batch])
+        sample_labels = np.concatenate([sample_labels, labels])
+        keep = np.sort(_keep_top_members(sample, sample_labels, sample_per_cluster))
+        sample, sample_labels = sample.take(keep), sample_labels[keep]
+
+    # Clusters in first-seen order, like cluster_records
+    used = np.flatnonzero(n_members > 0)
+    used = used[np.argsort(first_row[used], kind="stable")]
+    pos = np.full(nc, -1, dtype=np.int64)
+    pos[used] = np.arange(used.size)
+
+    X_label, feature_names = label_matrix(sample.keyword.tolist())
+    weights = _cluster_term_weights(X_label, pos[sample_labels], used.size, method=label_method)
+
+    # Sample members highest volume first
+    member_order = _keep_top_members(sample, sample_labels, sample_per_cluster)
+    member_labels = sample_labels[member_order]
+
+    clusters: List[Cluster] = []
+    for row, lab in enumerate(used.tolist()):
+        idxs = member_order[member_labels == lab]
+        terms = _top_terms(weights, row, feature_names, label_terms)
+        clusters.append(Cluster(
+            cluster_id=f"c{lab}",
+            label=terms[0] if terms else sample.keyword[idxs[0]],
+            label_terms=terms,
+            member_idx=idxs,
+            batch=sample,
+            n_members=int(n_members[lab]),
+            metrics=ClusterMetrics(),
+        ))
+
+    agg = ClusterAggregates(
+        count={name: c[used] for name, c in count.items()},
+        total={name: t[used] for name, t in total.items()},
+        stats={name: update_column_stats(name, st, np.empty(0)) for name, st in stats.items()},
+    )
+    logger.info(
+        "Streamed %d keywords into %d clusters (k=%d, %d sampled members)",
+        offset, len(clusters), nc, len(sample),
+    )
+    return StreamClusterResult(clusters=clusters, agg=agg, keywords=offset)
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from ..config import settings
+from .embeddings import embed_keywords, embeddings_available
+
+logger = logging.getLogger(__name__)
+
+# Titles are short: 1024 hashed uni/bigram features keep collisions rare at 2 KB per topic (float16)
+FINGERPRINT_HASHING_PARAMS = {
+    "n_features": 2 ** 10,
+    "ngram_range": (1, 2),
+    "alternate_sign": False,
+    "norm": "l2",
+    "stop_words": "english",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id              INTEGER PRIMARY KEY,
+    brand           TEXT NOT NULL,  -- normalized (lowercase)
+    product         TEXT NOT NULL,
+    platform        TEXT,
+    run_id          TEXT,
+    created_at      REAL NOT NULL,
+    title           TEXT NOT NULL,
+    angle           TEXT,
+    primary_keyword TEXT,
+    fingerprint_model TEXT NOT NULL,
+    fingerprint     BLOB NOT NULL   -- float16, L2-normalized
+);
+CREATE INDEX IF NOT EXISTS topics_scope ON topics (brand, product, platform, fingerprint_model);
+"""
+
+
+def _norm(value: Optional[str]) -> Optional[str]:
+    return value.lower().strip() if value else None
+
+
+@dataclass
+class RegisteredTopic:
+    """A topic emitted by an earlier run."""
+
+    title: str
+    angle: Optional[str] = None
+    primary_keyword: Optional[str] = None
+    platform: Optional[str] = None
+    run_id: Optional[str] = None
+    created_at: float = 0.0
+
+
+@dataclass
+class TopicMatch:
+    """A generated topic that nearly duplicates `other` (same run or registry); kept when not `dropped`."""
+
+    title: str
+    other: str
+    similarity: float
+    source: str  # "run" | "registry"
+    run_id: Optional[str] = None
+    dropped: bool = True
+
+
+@dataclass
+class TopicRegistry:
+    """
+    Append-only SQLite store of every topic emitted per brand/product
+    (and platform), each with an L2-normalized vector fingerprint of its
+    title.
+
+    Fingerprints are hashed word uni/bigrams by default (no fitted
+    vocabulary, so they stay comparable across runs), or local
+    sentence-transformers embeddings with `model="embedding"`; only rows
+    fingerprinted the same way are compared. Lookups load the scope's
+    fingerprints as one matrix and use exact cosine similarity, a single
+    matrix product at registry sizes of tens of thousands of topics.
+    """
+
+    path: Path
+    model: str = "hashing"
+    _vectorizer: Any = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.model == "embedding" and not embeddings_available():
+            logger.warning("sentence-transformers is not installed; topic fingerprints fall back to hashing.")
+            self.model = "hashing"
+        if self.model == "hashing":
+            self._vectorizer = HashingVectorizer(**FINGERPRINT_HASHING_PARAMS)
+        with closing(self._connect()):
+            pass
+
+    @property
+    def fingerprint_model(self) -> str:
+        if self.model == "hashing":
+            return f"hashing:{FINGERPRINT_HASHING_PARAMS['n_features']}"
+        return f"embedding:{settings.KRA_EMBEDDING_MODEL}"
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def fingerprints(self, titles: Sequence[str]) -> np.ndarray:
+        """(len(titles), d) float32 L2-normalized fingerprints."""
+        if not titles:
+            return np.empty((0, 0), dtype=np.float32)
+        if self.model == "hashing":
+            return self._vectorizer.transform(list(titles)).toarray().astype(np.float32)
+        return embed_keywords(list(titles), cache_dir=self.path.parent / "embeddings").astype(np.float32)
+
+    def load(
+        self,
+        brand: str,
+        product: str,
+        platform: Optional[str] = None,
+    ) -> Tuple[List[RegisteredTopic], np.ndarray]:
+        """Registered topics of one brand/product/platform, oldest first, with their fingerprints."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT title, angle, primary_keyword, platform, run_id, created_at, fingerprint FROM topics "
+                "WHERE brand = ? AND product = ? AND platform IS ? AND fingerprint_model = ? ORDER BY id",
+                (_norm(brand), _norm(product), _norm(platform), self.fingerprint_model),
+            ).fetchall()
+        topics = [RegisteredTopic(*row[:6]) for row in rows]
+        if not rows:
+            return topics, np.empty((0, 0), dtype=np.float32)
+        return topics, np.vstack([np.frombuffer(row[6], dtype=np.float16) for row in rows]).astype(np.float32)
+
+    def add(
+        self,
+        brand: str,
+        product: str,
+        platform: Optional[str],
+        run_id: Optional[str],
+        topics: Sequence[Any],
+        fingerprints: Optional[np.ndarray] = None,
+    ) -> int:
+        """Append TopicIdea-like objects (title/angle/primary_keyword); returns how many were stored."""
+        titles = [getattr(t, "title", "") or "" for t in topics]
+        if fingerprints is None:
+            fingerprints = self.fingerprints(titles)
+        now = time.time()
+        rows = [
+            (
+                _norm(brand), _norm(product), _norm(platform), run_id, now,
+                title, getattr(t, "angle", None), getattr(t, "primary_keyword", None),
+                self.fingerprint_model, vec.astype(np.float16).tobytes(),
+            )
+            for t, title, vec in zip(topics, titles, fingerprints)
+            if title
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO topics (brand, product, platform, run_id, created_at, title, angle, "
+                "primary_keyword, fingerprint_model, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def seed(
+        self,
+        brand: str,
+        product: str,
+        platform: Optional[str],
+        run_id: Optional[str],
+        topics: Sequence[Any],
+    ) -> int:
+        """Like `add`, but skips titles the scope already holds, so re-seeding from the same files is a no-op."""
+        with closing(self._connect()) as conn:
+            known = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT title FROM topics WHERE brand = ? AND product = ? AND platform IS ? "
+                    "AND fingerprint_model = ?",
+                    (_norm(brand), _norm(product), _norm(platform), self.fingerprint_model),
+                )
+            }
+        new: List[Any] = []
+        for t in topics:
+            title = getattr(t, "title", "") or ""
+            if title and title not in known:
+                known.add(title)
+                new.append(t)
+        return self.add(brand, product, platform, run_id, new) if new else 0
+
+    def taken_angles(
+        self,
+        brand: str,
+        product: str,
+        platform: Optional[str] = None,
+        limit: Optional[int] = None,
+        threshold: Optional[float] = None,
+    ) -> List[str]:
+        """
+        Compact summary of what earlier runs already proposed, for the topic
+        prompt: registered titles newest first, each near-duplicate group
+        collapsed to its newest title, at most `limit` (default
+        KRA_TAKEN_ANGLES_MAX).
+        """
+        limit = settings.KRA_TAKEN_ANGLES_MAX if limit is None else limit
+        threshold = settings.KRA_TOPIC_DUP_THRESHOLD if threshold is None else threshold
+        topics, vectors = self.load(brand, product, platform)
+        picked: List[int] = []
+        for i in range(len(topics) - 1, -1, -1):
+            if len(picked) >= limit:
+                break
+            if picked and float((vectors[picked] @ vectors[i]).max()) >= threshold:
+                continue
+            picked.append(i)
+        return [topics[i].title for i in picked]
+
+
+def dedup_topics(
+    topics: Sequence[Any],
+    registry: TopicRegistry,
+    brand: str,
+    product: str,
+    platform: Optional[str] = None,
+    threshold: Optional[float] = None,
+    drop_repeats: bool = True,
+) -> Tuple[List[Any], List[TopicMatch], np.ndarray]:
+    """
+    Find near-duplicate topics (cosine similarity of title fingerprints >=
+    `threshold`, default KRA_TOPIC_DUP_THRESHOLD): first against every topic
+    the registry holds for this brand/product/platform, then within the run,
+    where the earlier (higher-ranked) topic wins. Duplicates within the run
+    are dropped; repeats of a registered topic only when `drop_repeats`.
+
+    Returns (kept topics, one TopicMatch per duplicate, fingerprints of the
+    kept topics) so the caller can register them without re-embedding.
+    """
+    threshold = settings.KRA_TOPIC_DUP_THRESHOLD if threshold is None else threshold
+    titles = [getattr(t, "title", "") or "" for t in topics]
+    vectors = registry.fingerprints(titles)
+    if not len(titles):
+        return [], [], vectors
+
+    previous, prev_vectors = registry.load(brand, product, platform)
+    best_prev = np.full(len(titles), -1.0)
+    best_prev_idx = np.zeros(len(titles), dtype=np.int64)
+    if previous:
+        sims = vectors @ prev_vectors.T
+        best_prev_idx = sims.argmax(axis=1)
+        best_prev = sims[np.arange(len(titles)), best_prev_idx]
+    within = vectors @ vectors.T
+
+    kept: List[int] = []
+    matches: List[TopicMatch] = []
+    for i, title in enumerate(titles):
+        if best_prev[i] >= threshold:
+            prev = previous[best_prev_idx[i]]
+            matches.append(TopicMatch(title, prev.title, float(best_prev[i]), "registry", prev.run_id, drop_repeats))
+            if drop_repeats:
+                continue
+        if kept:
+            j = kept[int(within[i, kept].argmax())]
+            if within[i, j] >= threshold:
+                matches.append(TopicMatch(title, titles[j], float(within[i, j]), "run"))
+                continue
+        kept.append(i)
+
+    return [topics[i] for i in kept], matches, vectors[kept]
+
+
+def open_topic_registry(path: Path, model: Optional[str] = None) -> TopicRegistry:
+    return TopicRegistry(path=path, model=model or settings.KRA_TOPIC_FINGERPRINT)
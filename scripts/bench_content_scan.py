@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Benchmark the blog content scan (index_builder.build_blog_index) in serial,
+thread-pool and process-pool mode over a synthetic Hugo-style content tree.
+
+Usage (from project root):
+
+    python scripts/bench_content_scan.py                    # 20k posts in a temp dir
+    python scripts/bench_content_scan.py --posts 5000 --body-kb 50
+    python scripts/bench_content_scan.py --root /path/to/blog/content --keep
+
+Every mode must return the same entries in the same order; the script
+exits non-zero if they differ.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agent_engine.blog_keyword_analyzer.config import settings  # noqa: E402
+from agent_engine.blog_keyword_analyzer.tools.index_builder import build_blog_index  # noqa: E402
+
+PRODUCTS = ["cells", "words", "pdf", "slides", "email", "imaging", "barcode", "ocr"]
+PLATFORMS = ["Python", "Java", "C#", ".NET", "Node.js", "C++", "Android"]
+FORMATS = ["Excel", "PDF", "Word", "CSV", "JSON", "HTML", "PNG", "PowerPoint"]
+
+
+def make_tree(root: Path, posts: int, body_kb: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    body = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 17 + "\n") * max(1, body_kb)
+    for i in range(posts):
+        product = rng.choice(PRODUCTS)
+        platform = rng.choice(PLATFORMS)
+        src, dst = rng.sample(FORMATS, 2)
+        day = f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+        slug = f"{day}-convert-{src.lower()}-to-{dst.lower()}-in-{platform.lower().strip('.')}-{i}"
+        folder = root / product / slug
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / "index.md").write_text(
+            "---\n"
+            f"title: Convert {src} to {dst} in {platform}\n"
+            f"seoTitle: How to Convert {src} to {dst} in {platform} | Aspose.{product.title()}\n"
+            f"description: Learn how to convert {src} files to {dst} programmatically in {platform}.\n"
+            f"date: {day}T10:{i % 60:02d}:00+00:00\n"
+            "draft: false\n"
+            f"url: /{product}/convert-{src.lower()}-to-{dst.lower()}-{i}/\n"
+            "author: Benchmark\n"
+            f"summary: Step-by-step guide to {src} to {dst} conversion.\n"
+            f"tags: ['{src}', '{dst}', '{platform}', 'conversion']\n"
+            f"categories: ['Aspose.{product.title()} Product Family']\n"
+            "---\n\n" + body,
+            encoding="utf-8",
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark serial vs parallel blog content scans.")
+    parser.add_argument("--root", help="Existing content root to scan (default: generate a synthetic tree).")
+    parser.add_argument("--posts", type=int, default=20000, help="Synthetic posts to generate.")
+    parser.add_argument("--body-kb", type=int, default=4, help="Approximate body size per synthetic post.")
+    parser.add_argument("--workers", type=int, default=0, help="Pool size (0 = default for the mode).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per mode; the best time is reported.")
+    parser.add_argument("--modes", default="serial,thread,process")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated tree.")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.root:
+        root = Path(args.root).expanduser().resolve()
+    else:
+        tmp = Path(tempfile.mkdtemp(prefix="kra-scan-bench-"))
+        root = tmp / "content"
+        t0 = time.perf_counter()
+        make_tree(root, args.posts, args.body_kb)
+        print(f"Generated {args.posts} posts under {root} in {time.perf_counter() - t0:.1f} s")
+
+    settings.BLOG_CONTENT_ROOT = str(root)
+    settings.BLOG_SCAN_WORKERS = args.workers
+
+    baseline = None
+    ok = True
+    try:
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            settings.BLOG_SCAN_MODE = mode
+            best = float("inf")
+            for _ in range(max(1, args.repeat)):
+                t0 = time.perf_counter()
+                entries = build_blog_index()
+                best = min(best, time.perf_counter() - t0)
+            if baseline is None:
+                baseline = (mode, best, entries)
+                note = ""
+            else:
+                same = entries == baseline[2]
+                ok = ok and same
+                note = f"  x{baseline[1] / best:.2f} vs {baseline[0]}" + ("" if same else "  OUTPUT DIFFERS")
+            print(f"{mode:<8} {len(entries):>7} posts  {best:8.3f} s{note}")
+    finally:
+        if tmp is not None and not args.keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import subprocess
 from pathlib import Path
 from typing import Any, Dict
 
+import json
 import yaml  # make sure pyyaml is in requirements.txt
 
 
@@ -40,6 +41,18 @@ def build_command(engine: Dict[str, Any]) -> list[str]:
         )
         if serp_topic:
             cmd.extend(["--serp-topic", serp_topic])
+
+        serp_mode = engine.get("serp_mode") or engine.get("serp-mode")
+        if serp_mode:
+            cmd.extend(["--serp-mode", serp_mode])
+
+        for key in ("serp_max_keywords", "serp_max_requests"):
+            value = engine.get(key) or engine.get(key.replace("_", "-"))
+            if value:
+                cmd.extend(["--" + key.replace("_", "-"), str(value)])
+
+        if not bool(engine.get("use_serp_cache", engine.get("use-serp-cache", True))):
+            cmd.append("--no-serp-cache")
     else:
         input_file = engine.get("input_file")
         if not input_file:
@@ -68,11 +81,62 @@ def build_command(engine: Dict[str, Any]) -> list[str]:
     if platform:
         cmd.extend(["--platform", platform])
 
+    import_mode = engine.get("import_mode")
+    if import_mode:
+        cmd.extend(["--import-mode", import_mode])
+
+    label_method = engine.get("label_method")
+    if label_method:
+        cmd.extend(["--label-method", label_method])
+
+    k_search = engine.get("k_search")
+    if k_search:
+        cmd.extend(["--k-search", k_search])
+
+    vectorizer = engine.get("vectorizer")
+    if vectorizer:
+        cmd.extend(["--vectorizer", vectorizer])
+
+    cluster_backend = engine.get("cluster_backend")
+    if cluster_backend:
+        cmd.extend(["--cluster-backend", cluster_backend])
+
+    # Keep cluster IDs stable across weekly refreshes
+    if bool(engine.get("incremental", False)):
+        cmd.append("--incremental")
+
+    # Chunked clustering for files too large to load whole
+    if bool(engine.get("stream", False)):
+        cmd.append("--stream")
+        if engine.get("chunk_size"):
+            cmd.extend(["--chunk-size", str(engine["chunk_size"])])
+
+    # e.g. normalizers: {volume: log}
+    for feature, norm in (engine.get("normalizers") or {}).items():
+        cmd.extend(["--normalize", f"{feature}={norm}"])
+
+    # Rank clusters under several weightings instead of generating topics
+    weight_sweep = engine.get("weight_sweep")
+    if weight_sweep:
+        cmd.extend(["--weight-sweep", json.dumps(weight_sweep)])
+
     # Optional: if your CLI supports --no-content-index
     use_content_index = bool(engine.get("use_content_index", True))
     if not use_content_index:
         cmd.append("--no-content-index")
 
+    if not bool(engine.get("use_cluster_cache", True)):
+        cmd.append("--no-cluster-cache")
+
+    if not bool(engine.get("use_topic_registry", True)):
+        cmd.append("--no-topic-registry")
+    if bool(engine.get("drop_repeated_topics", False)):
+        cmd.append("--drop-repeated-topics")
+
+    # Generate topics in concurrent LLM requests of this many clusters each
+    if engine.get("topic_shard_size"):
+        cmd.extend(["--topic-shard-size", str(engine["topic_shard_size"])])
+
     return cmd
 
 
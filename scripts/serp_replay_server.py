@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Local stand-in for SerpAPI that replays recorded JSON responses.
+
+Recordings are JSON files in a directory, each shaped like:
+
+    {"request": {"q": "aspose.cells convert csv to excel", "start": 0},
+     "response": { ...SerpAPI /search JSON... }}
+
+GET /search?q=...&start=... returns the recording with the same (lowercased)
+q and start, or an empty result page when there is none. Other parameters
+(api_key, hl, gl, engine) are ignored.
+
+No recordings ship with the repo: capture your own once with --record,
+which forwards unknown requests to https://serpapi.com and saves them into
+the directory (needs a real SERPAPI_API_KEY), then replay them offline:
+
+    python scripts/serp_replay_server.py --dir serp_recordings --port 8765 --record
+    SERPAPI_BASE_URL=http://127.0.0.1:8765 SERPAPI_API_KEY=<real key> \\
+        python -m agent_engine.blog_keyword_analyzer.runner --use-serp-api --serp-mode harvest ...
+
+    python scripts/serp_replay_server.py --dir serp_recordings --port 8765
+    SERPAPI_BASE_URL=http://127.0.0.1:8765 SERPAPI_API_KEY=replay \\
+        python -m agent_engine.blog_keyword_analyzer.runner --use-serp-api --serp-mode harvest ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+EMPTY_RESPONSE: Dict[str, Any] = {"organic_results": [], "related_searches": [], "related_questions": []}
+
+
+def _key(q: str, start: Any) -> Tuple[str, int]:
+    return q.strip().lower(), int(start or 0)
+
+
+def load_recordings(directory: Path) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    recordings: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for path in sorted(directory.glob("*.json")):
+        item = json.loads(path.read_text(encoding="utf-8"))
+        req = item.get("request") or {}
+        recordings[_key(req.get("q", ""), req.get("start"))] = item.get("response") or {}
+    return recordings
+
+
+def make_handler(directory: Path, record: bool):
+    recordings = load_recordings(directory)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            url = urllib.parse.urlsplit(self.path)
+            if url.path.rstrip("/") != "/search":
+                self.send_error(404)
+                return
+            params = dict(urllib.parse.parse_qsl(url.query))
+            key = _key(params.get("q", ""), params.get("start"))
+
+            with lock:
+                data = recordings.get(key)
+            if data is None and record:
+                data = self._forward(params)
+                with lock:
+                    recordings[key] = data
+                name = hashlib.sha1(f"{key[0]}|{key[1]}".encode("utf-8")).hexdigest()[:16]
+                (directory / f"{name}.json").write_text(
+                    json.dumps({"request": {"q": key[0], "start": key[1]}, "response": data}, indent=2),
+                    encoding="utf-8",
+                )
+            if data is None:
+                data = EMPTY_RESPONSE
+
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        @staticmethod
+        def _forward(params: Dict[str, str]) -> Dict[str, Any]:
+            url = "https://serpapi.com/search?" + urllib.parse.urlencode(params)
+            with urllib.request.urlopen(url, timeout=30) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            sys.stderr.write("[serp-replay] " + (fmt % args) + "\n")
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded SerpAPI responses over HTTP.")
+    parser.add_argument("--dir", required=True, help="Directory with recorded JSON files.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--record", action="store_true", help="Forward unknown requests to SerpAPI and save them.")
+    args = parser.parse_args()
+
+    directory = Path(args.dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(directory, args.record))
+    print(f"Replaying SerpAPI from {directory} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from agent_engine.blog_keyword_analyzer.schemas import Cluster, ClusterMetrics, KeywordRecord
+from agent_engine.blog_keyword_analyzer.tools.intent_brand import annotate_intent_brand
+from agent_engine.blog_keyword_analyzer.tools.scoring import aggregate_clusters, score_clusters
+
+
+def _cluster(cluster_id, rows):
+    return Cluster(
+        cluster_id=cluster_id,
+        label=cluster_id,
+        metrics=ClusterMetrics(),
+        members=[KeywordRecord(keyword=kw, source="upload", volume=volume) for kw, volume in rows],
+    )
+
+
+def _two_clusters():
+    # Built from `members=`, so each cluster carries its own batch
+    a = _cluster("a", [("what is an xlsx file", 10), ("how to open xlsx", 20)])
+    b = _cluster("b", [("buy excel license price", 1000)])
+    return a, b
+
+
+def test_aggregates_read_each_clusters_own_batch():
+    a, b = _two_clusters()
+    agg = aggregate_clusters([a, b])
+    assert agg.mean("volume").tolist() == [15.0, 1000.0]
+    assert agg.stats["volume"].n == 3
+
+
+def test_score_ranks_clusters_from_separate_batches():
+    a, b = _two_clusters()
+    ranked = score_clusters([a, b], weights={"volume": 1.0, "kd": 0.0, "cpc": 0.0, "brand": 0.0, "intent": 0.0})
+    assert [c.cluster_id for c in ranked] == ["b", "a"]
+    assert b.metrics.avg_volume == 1000.0
+
+
+def test_intent_is_classified_from_each_clusters_own_batch():
+    a, b = _two_clusters()
+    annotate_intent_brand([a, b], product="Aspose.Cells", brand="Aspose")
+    assert a.metrics.intent == "informational"
+    assert b.metrics.intent == "transactional"
+    assert b.metrics.intent_distribution["transactional"] == 1.0
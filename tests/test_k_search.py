@@ -0,0 +1,18 @@
+from pathlib import Path
+
+from agent_engine.blog_keyword_analyzer.schemas import RunRequest
+from agent_engine.blog_keyword_analyzer.tools import cluster_backends
+from agent_engine.blog_keyword_analyzer.tools.file_import import import_batch
+from agent_engine.blog_keyword_analyzer.tools.k_search import search_k
+from agent_engine.blog_keyword_analyzer.tools.preprocess import preprocess
+
+KEYWORDS = Path(__file__).resolve().parents[1] / "content" / "Aspose" / "keywords.csv"
+
+
+def test_search_does_not_return_the_largest_candidate():
+    batch = preprocess(import_batch(RunRequest(file_path=str(KEYWORDS))))
+    X, _ = cluster_backends.label_matrix(batch.keyword.tolist())
+    for method in ("elbow", "silhouette"):
+        found = search_k(X, method=method, volume=batch.values("volume"), n_jobs=1, time_budget_s=120)
+        assert found.method == method
+        assert found.k < max(p["k"] for p in found.curve), method